@@ -1,15 +1,22 @@
 # admin_handlers.py
 import re
-import logging
 import asyncio
+import logging
+from bisect import bisect_left
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters import Text, Regexp
 
 from auto_calc import save_auto_calc_setting, load_auto_calc_setting
 
-from loader import dp, bot, pause_polling, resume_polling
+from loader import dp, bot
+from locks import sheet_rows_lock
+from api_usage import usage_report, format_usage_report
+from search import FACETS, get_search_index
+from outbox import enqueue_messages
+from pagination import page_cb, item_cb, action_cb, open_list, get_list, drop_list, drop_lists, send_page, show_page
 from config import ADMINS, friendly_names
+from models import parse_number
 from states import AdminMenuStates, AdminReview
 from keyboards import (
     remove_keyboard, get_admin_root_menu, get_admin_moderation_menu,
@@ -17,12 +24,18 @@ from keyboards import (
 )
 from db import (
     load_users, save_users, load_applications, save_applications,
-    approve_user, block_user,
-    update_application_status, delete_application_from_file_entirely
+    approve_user, block_user, approve_users, block_users,
+    update_application_status, delete_application_from_file_entirely,
+    get_applications_by_status, get_users_with_status,
+    add_users_listener, get_approved_user, get_approved_users,
+    get_pending_user, get_pending_users, find_user_by_name,
+    update_applications_status, get_user_applications, store_lock,
+    load_pending_purge, save_pending_purge
 )
 from gsheet_utils import (
-    export_database, admin_remove_app_permanently,
-    get_worksheet1, get_worksheet2, delete_price_cell_in_table2
+    export_database,
+    get_worksheet1, get_worksheet2, delete_price_cell_in_table2,
+    delete_rows_batch, paint_rows, unconfirmed_price_columns, STATUS_ROW_COLORS
 )
 
 ############################################
@@ -32,67 +45,303 @@ from gsheet_utils import (
 async def admin_remove_app_permanently(user_id: int, app_index: int):
     """
     Видаляє заявку адміністратора з файлу та з обох таблиць (worksheet1 та worksheet2).
-    Призупиняє polling, видаляє заявку, видаляє рядки у таблицях з затримкою між ними,
-    оновлює індекси рядків, після затримки відновлює polling.
+    На час видалення рядків та оновлення індексів бере ексклюзивний доступ
+    до рядків від видаленого до кінця таблиці (sheet_rows_lock): задачі, що
+    працюють з рядками вище, не чекають, решта – лише цю коротку секцію.
+    Файл змінюється під store_lock(), але не під час запитів до Google Sheets.
     """
     logging.info(f"Адміністратор видаляє заявку: user_id={user_id}, app_index={app_index}")
-    
-    # Призупиняємо polling
-    pause_polling()
-    logging.info("Polling призупинено перед видаленням заявки.")
-    
-    apps = load_applications()
+    if not await finish_pending_purge():
+        logging.error("Таблиця1 ще не оновлена після пакетного видалення – видалення заявки відкладено.")
+        return False
     uid = str(user_id)
-    if uid not in apps or app_index < 0 or app_index >= len(apps[uid]):
+    _, user_apps = get_user_applications(uid)
+    if not 0 <= app_index < len(user_apps):
         logging.error("Не знайдено заявку для видалення.")
-        resume_polling()
         return False
+    # Поки чекаємо на лок, індекс може зсунутись – далі шукаємо заявку за timestamp
+    timestamp = user_apps[app_index].get("timestamp", "")
+
+    def current_rows():
+        _, user_apps = get_user_applications(uid)
+        for app in user_apps:
+            if app.get("timestamp", "") == timestamp:
+                return (app["sheet_row"], None) if app.get("sheet_row") else None
+        return None
+
+    async with sheet_rows_lock.rows(current_rows, exclusive=True):
+        with store_lock():
+            user_apps = load_applications().get(uid, [])
+            idx = next((i for i, app in enumerate(user_apps) if app.get("timestamp", "") == timestamp), None)
+            if idx is None:
+                logging.error("Не знайдено заявку для видалення.")
+                return False
+            sheet_row = user_apps[idx].get("sheet_row")
+            logging.debug(f"Заявка знаходиться у рядку: {sheet_row}")
+
+            # Видаляємо заявку з локального файлу
+            delete_application_from_file_entirely(user_id, idx)
+            logging.debug("Заявка видалена з локального файлу.")
+
+        # Якщо визначено рядок у Google Sheets, видаляємо дані
+        if sheet_row:
+            try:
+                # Видаляємо рядок у таблиці2 (ws2)
+                ws2 = get_worksheet2()
+                ws2.delete_rows(sheet_row)
+                logging.debug(f"Видалено рядок {sheet_row} у таблиці2.")
+
+                # Видаляємо рядок у таблиці1 (ws1)
+                ws1 = get_worksheet1()
+                ws1.delete_rows(sheet_row)
+                logging.debug(f"Видалено рядок {sheet_row} у таблиці1.")
+
+                # Оновлюємо sheet_row для решти заявок (якщо рядки зміщуються)
+                with store_lock():
+                    updated_apps = load_applications()
+                    for u_str, user_apps in updated_apps.items():
+                        for a in user_apps:
+                            old_row = a.get("sheet_row", 0)
+                            if old_row and old_row > sheet_row:
+                                a["sheet_row"] = old_row - 1
+                    save_applications(updated_apps)
+                logging.debug("Оновлено номери рядків для заявок після видалення.")
+
+            except Exception as e:
+                logging.exception(f"Помилка видалення рядка в Google Sheets: {e}")
 
-    app = apps[uid][app_index]
-    sheet_row = app.get("sheet_row")
-    logging.debug(f"Заявка знаходиться у рядку: {sheet_row}")
+    return True
 
-    # Видаляємо заявку з локального файлу
-    delete_application_from_file_entirely(user_id, app_index)
-    logging.debug("Заявка видалена з локального файлу.")
 
-    # Якщо визначено рядок у Google Sheets, видаляємо дані
-    if sheet_row:
-        try:
-            # Видаляємо рядок у таблиці2 (ws2)
-            ws2 = get_worksheet2()
-            ws2.delete_rows(sheet_row)
-            logging.debug(f"Видалено рядок {sheet_row} у таблиці2.")
-            
-            # Затримка 3 секунди перед видаленням у таблиці1
-            await asyncio.sleep(3)
-            
-            # Видаляємо рядок у таблиці1 (ws1)
-            ws1 = get_worksheet1()
-            ws1.delete_rows(sheet_row)
-            logging.debug(f"Видалено рядок {sheet_row} у таблиці1.")
-
-            # Оновлюємо sheet_row для решти заявок (якщо рядки зміщуються)
-            updated_apps = load_applications()
-            for u_str, user_apps in updated_apps.items():
-                for a in user_apps:
-                    old_row = a.get("sheet_row", 0)
-                    if old_row and old_row > sheet_row:
-                        a["sheet_row"] = old_row - 1
-            save_applications(updated_apps)
-            logging.debug("Оновлено номери рядків для заявок після видалення.")
+PURGE_RETRY_DELAYS = (2, 10, 30)  # Паузи між повторами видалення рядків з таблиці1
 
+
+async def _delete_rows_from_ws1(rows) -> bool:
+    """Видаляє рядки з таблиці1, повторюючи спробу з паузами PURGE_RETRY_DELAYS."""
+    for attempt, delay in enumerate((0,) + PURGE_RETRY_DELAYS, start=1):
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            delete_rows_batch(get_worksheet1(), rows)
+            return True
         except Exception as e:
-            logging.exception(f"Помилка видалення рядка в Google Sheets: {e}")
+            logging.exception(f"Помилка видалення рядків {rows} з таблиці1 (спроба {attempt}): {e}")
+    return False
 
-    # Чекаємо 20 секунд перед відновленням polling'у
-    logging.info("Чекаємо 20 секунд перед відновленням polling'у.")
-    await asyncio.sleep(20)
-    resume_polling()
-    logging.info("Polling відновлено після видалення заявки.")
+
+def _apply_purge(purge_keys, deleted_rows) -> int:
+    """
+    Після видалення рядків deleted_rows з обох таблиць: прибирає заявки purge_keys
+    з файлу і зсуває sheet_row решти. Заявка з purge_keys, яку встигли відновити,
+    лишається, але вже без рядка. Повертає кількість видалених заявок.
+    """
+    deleted_rows = sorted(deleted_rows)
+    with store_lock():
+        apps = load_applications()
+        purged = 0
+        for uid in list(apps.keys()):
+            kept = []
+            for app in apps[uid]:
+                if (uid, app.get("timestamp", "")) in purge_keys:
+                    if app.get("proposal_status") == "deleted":
+                        purged += 1
+                        continue
+                    app.pop("sheet_row", None)
+                kept.append(app)
+            if kept:
+                apps[uid] = kept
+            else:
+                apps.pop(uid)
+
+        # Кожен рядок зсувається вгору на кількість видалених рядків над ним
+        for user_apps in apps.values():
+            for a in user_apps:
+                old_row = a.get("sheet_row", 0)
+                if old_row:
+                    a["sheet_row"] = old_row - bisect_left(deleted_rows, old_row)
+
+        save_applications(apps)
+    return purged
+
+
+async def finish_pending_purge() -> bool:
+    """
+    Довершує видалення рядків з таблиці1, що не вдалося минулого разу
+    (див. db.load_pending_purge). False – таблиця1 досі не оновилась;
+    тоді інші видалення рядків не виконуються, щоб номери в журналі не застаріли.
+    """
+    pending = load_pending_purge()
+    if pending is None:
+        return True
+    rows = pending["rows"]
+    async with sheet_rows_lock.writer(min(rows)):
+        if not await _delete_rows_from_ws1(rows):
+            return False
+        purged = _apply_purge({tuple(key) for key in pending["purge_keys"]}, rows)
+        save_pending_purge(None)
+    logging.info(f"Видалення рядків {rows} з таблиці1 довершено, видалено заявок: {purged}.")
     return True
 
 
+async def admin_purge_deleted_applications():
+    """
+    Остаточно видаляє всі заявки зі статусом "deleted" за один прохід:
+    один batchUpdate на кожну таблицю, одна перенумерація sheet_row
+    для решти заявок і один запис файлу. Повертає кількість видалених заявок
+    або None, якщо рядки не вдалося видалити з обох таблиць.
+    Таблиця2 оновлюється першою; якщо після неї таблиця1 не оновилась і після
+    повторів, номери в файлі лишаються як у таблиці1, а видалення з таблиці1
+    записується в журнал (save_pending_purge) і довершується наступним викликом.
+    Лок бере рядки від першого видаленого до кінця таблиці; файл змінюється
+    під store_lock() уже після запитів до Google Sheets.
+    """
+    if not await finish_pending_purge():
+        return None
+
+    def first_deleted_row():
+        rows = [entry["app_data"].get("sheet_row") for entry in get_applications_by_status("deleted")]
+        rows = [row for row in rows if row]
+        return (min(rows), None) if rows else None
+
+    async with sheet_rows_lock.rows(first_deleted_row, exclusive=True) as locked:
+        first_row = locked[0] if locked else None
+        # Що видаляємо: заявки (user_id, timestamp) і їхні рядки. Рядки вище first_row
+        # лок не захищає – такі заявки (позначені щойно іншим процесом) лишаються до наступного разу
+        purge_keys = set()
+        deleted_rows = set()
+        for entry in get_applications_by_status("deleted"):
+            row = entry["app_data"].get("sheet_row")
+            if row and (first_row is None or row < first_row):
+                continue
+            purge_keys.add((entry["user_id"], entry["app_data"].get("timestamp", "")))
+            if row:
+                deleted_rows.add(row)
+
+        if not purge_keys:
+            return 0
+
+        deleted_rows = sorted(deleted_rows)
+        if deleted_rows:
+            try:
+                delete_rows_batch(get_worksheet2(), deleted_rows)
+            except Exception as e:
+                logging.exception(f"Помилка пакетного видалення рядків у таблиці2: {e}")
+                logging.error(f"Рядки не видалено з таблиць, заявки ({len(purge_keys)}) лишились у файлі до наступного разу.")
+                return None
+            if not await _delete_rows_from_ws1(deleted_rows):
+                save_pending_purge({"rows": deleted_rows, "purge_keys": sorted(purge_keys)})
+                logging.error(
+                    f"Рядки {deleted_rows} видалено з таблиці2, але не з таблиці1: номери рядків у файлі "
+                    f"не змінено, видалення з таблиці1 буде повторено."
+                )
+                return None
+
+        purged = _apply_purge(purge_keys, deleted_rows)
+    logging.info(f"Остаточно видалено {purged} заявок, рядків у таблицях: {len(deleted_rows)}.")
+    return purged
+
+
+############################################
+# Посторінкові списки (pagination.py)
+############################################
+# «Підтверджені», «Видалені», «База користувачів» і «Видалення заявок»
+# показуються inline-кнопками посторінково. Payload заявки – user_id, індекс і
+# timestamp: індекс може зсунутись після видалення сусідньої заявки, тоді
+# заявку знаходимо за timestamp.
+
+APP_STATUS_LISTS = {
+    "confirmed": "Підтверджені заявки",
+    "deleted": "«Видалені» заявки",
+}
+
+
+def open_app_status_list(chat_id: int, status: str):
+    entries = get_applications_by_status(status)
+    entries.sort(key=lambda entry: entry["app_data"].get("timestamp", ""), reverse=True)
+    items = [
+        (
+            f"{i}. {entry['app_data'].get('culture', 'Невідомо')} | {entry['app_data'].get('quantity', 'Невідомо')}",
+            {"user_id": entry["user_id"], "app_index": entry["app_index"], "timestamp": entry["app_data"].get("timestamp", "")}
+        )
+        for i, entry in enumerate(entries, start=1)
+    ]
+    return open_list(chat_id, status, APP_STATUS_LISTS[status], items)
+
+
+def resolve_app_entry(payload: dict):
+    """{"user_id", "app_index", "app_data"} для payload зі списку або None, якщо заявки вже немає."""
+    user_apps = load_applications().get(str(payload["user_id"]), [])
+    idx = payload["app_index"]
+    if not (0 <= idx < len(user_apps) and user_apps[idx].get("timestamp", "") == payload["timestamp"]):
+        idx = next((i for i, app in enumerate(user_apps) if app.get("timestamp", "") == payload["timestamp"]), None)
+        if idx is None:
+            return None
+    return {"user_id": str(payload["user_id"]), "app_index": idx, "app_data": user_apps[idx]}
+
+
+def open_approved_users_list(chat_id: int):
+    approved = get_approved_users()
+    items = sorted(
+        ((info.get("fullname") or f"ID:{uid}", uid) for uid, info in approved.items()),
+        key=lambda item: item[0].casefold()
+    )
+    return open_list(chat_id, "approved_users", "Схвалені користувачі", items)
+
+
+def _on_users_changed(changed):
+    # Схвалених додали/видалили/перейменували – відкриті списки в усіх адмінів застаріли
+    if "approved" in changed:
+        drop_lists("approved_users")
+
+
+add_users_listener(_on_users_changed)
+
+
+def list_back_keyboard(*extra_rows):
+    kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    for row in extra_rows:
+        kb.row(*row)
+    kb.add("Назад")
+    return kb
+
+
+async def send_approved_users_list(message: types.Message, text: str) -> bool:
+    """Список схвалених: спершу reply-клавіатура дій, потім сторінка списку. False – список порожній."""
+    snapshot = get_list(message.chat.id, "approved_users") or open_approved_users_list(message.chat.id)
+    if not len(snapshot):
+        return False
+    await message.answer(text, reply_markup=list_back_keyboard(("Вивантажити базу", "Розсилка")))
+    await send_page(message, snapshot)
+    return True
+
+
+async def send_app_status_list(message: types.Message, status: str, text: str, rebuild: bool = False) -> bool:
+    snapshot = None if rebuild else get_list(message.chat.id, status)
+    snapshot = snapshot or open_app_status_list(message.chat.id, status)
+    if not len(snapshot):
+        return False
+    await message.answer(text, reply_markup=list_back_keyboard())
+    await send_page(message, snapshot)
+    return True
+
+
+async def _list_from_callback(query: types.CallbackQuery, callback_data: dict):
+    if str(query.from_user.id) not in ADMINS:
+        await query.answer("Немає доступу.")
+        return None
+    snapshot = get_list(query.message.chat.id, callback_data["list"], callback_data["snap"])
+    if snapshot is None:
+        await query.answer("Список застарів, відкрийте його знову.", show_alert=True)
+    return snapshot
+
+
+@dp.callback_query_handler(page_cb.filter(), state="*")
+async def admin_list_page(query: types.CallbackQuery, callback_data: dict):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is not None:
+        await show_page(query, snapshot, int(callback_data["page"]))
+
+
 ############################################
 # Вхід в адмін-меню
 ############################################
@@ -108,6 +357,106 @@ async def admin_entry_point(message: types.Message, state: FSMContext):
     await AdminMenuStates.choosing_section.set()
 
 
+@dp.message_handler(commands=["api_usage"], state="*")
+async def admin_api_usage(message: types.Message, state: FSMContext):
+    if str(message.from_user.id) not in ADMINS:
+        await message.answer("Немає доступу.", reply_markup=remove_keyboard())
+        return
+
+    await message.answer(format_usage_report(usage_report()))
+
+
+############################################
+# Пошук заявок (/find)
+############################################
+# /find пшен херсон status:confirmed currency:usd – кожне слово шукається як
+# префікс у назві ФГ, ЄДРПОУ, області/району/міста, культурі, групі та телефоні;
+# фасет:значення звужує результат. Результати – посторінковий список "search".
+
+FACET_ALIASES = {
+    "status": "status", "статус": "status",
+    "currency": "currency", "валюта": "currency",
+    "culture": "culture", "культура": "culture",
+}
+FACET_TITLES = {"status": "Статус", "currency": "Валюта", "culture": "Культура"}
+FIND_USAGE = (
+    "Використання: /find <слова> [status:...] [currency:...] [culture:...]\n"
+    "Наприклад: /find пшен херсон status:confirmed"
+)
+
+
+def parse_find_query(text: str):
+    """'пшен status:confirmed' -> ('пшен', {'status': 'confirmed'})"""
+    words, filters = [], {}
+    for part in text.split():
+        name, sep, value = part.partition(":")
+        facet = FACET_ALIASES.get(name.casefold()) if sep else None
+        if facet and value:
+            filters[facet] = value
+        else:
+            words.append(part)
+    return " ".join(words), filters
+
+
+def facet_summary(counts: dict, top: int = 5) -> str:
+    lines = []
+    for facet in FACETS:
+        values = sorted(counts[facet].items(), key=lambda item: (-item[1], item[0]))
+        if values:
+            shown = ", ".join(f"{value} – {count}" for value, count in values[:top])
+            lines.append(f"{FACET_TITLES[facet]}: {shown}")
+    return "\n".join(lines)
+
+
+def found_app_items(results, show_status: bool = False):
+    """Результати search_applications -> пари (мітка, payload) для open_list."""
+    items = []
+    for i, ((user_id, app_index), app) in enumerate(results, start=1):
+        label = f"{i}. {app.get('culture', '')} | {app.get('fgh_name', '')} | {app.get('quantity', '')} т"
+        if show_status:
+            label += f" | {app.get('proposal_status', '')}"
+        items.append((label, {"user_id": user_id, "app_index": app_index, "timestamp": app.get("timestamp", "")}))
+    return items
+
+
+@dp.message_handler(commands=["find"], state="*")
+async def admin_find_applications(message: types.Message, state: FSMContext):
+    if str(message.from_user.id) not in ADMINS:
+        await message.answer("Немає доступу.", reply_markup=remove_keyboard())
+        return
+
+    text, filters = parse_find_query(message.get_args() or "")
+    if not text.strip() and not filters:
+        await message.answer(FIND_USAGE)
+        return
+    index = get_search_index()
+    results = index.search(text, filters)
+    if not results:
+        await message.answer("Нічого не знайдено.")
+        return
+
+    snapshot = open_list(message.chat.id, "search", "Знайдені заявки", found_app_items(results), columns=1)
+    summary = facet_summary(index.facet_counts(key for key, _ in results))
+    if summary:
+        await message.answer(summary)
+    await send_page(message, snapshot)
+
+
+@dp.callback_query_handler(item_cb.filter(list="search"), state="*")
+async def admin_select_search_result(query: types.CallbackQuery, callback_data: dict):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is None:
+        return
+    payload = snapshot.payload(int(callback_data["pos"]))
+    entry = resolve_app_entry(payload) if payload else None
+    if entry is None:
+        await query.answer("Заявку вже видалено, повторіть пошук.", show_alert=True)
+        return
+    app_data = entry["app_data"]
+    await query.message.answer(app_details_text(app_data, app_data.get("proposal_status", "")), parse_mode="HTML")
+    await query.answer()
+
+
 @dp.message_handler(state=AdminMenuStates.choosing_section)
 async def admin_menu_choosing_section(message: types.Message, state: FSMContext):
     text = message.text.strip()
@@ -128,57 +477,61 @@ async def admin_menu_choosing_section(message: types.Message, state: FSMContext)
 # МОДЕРАЦІЯ КОРИСТУВАЧІВ
 ############################################
 
+APPROVED_NOTICE = (
+    "Вітаємо! Ви пройшли модерацію і тепер можете користуватися ботом. "
+    "Для початку роботи натисніть /start у меню."
+)
+BLOCKED_NOTICE = "На жаль, Ви не пройшли модерацію і Вас заблоковано."
+
+
+def pending_users_keyboard(pending: dict) -> types.ReplyKeyboardMarkup:
+    """Кнопка з ПІБ на кожного очікуючого користувача + «Назад»."""
+    kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
+    for uid, info in pending.items():
+        kb.add(info.get("fullname", "Невідомо"))
+    kb.add("Назад")
+    return kb
+
 @dp.message_handler(state=AdminMenuStates.moderation_section)
 async def admin_moderation_section_handler(message: types.Message, state: FSMContext):
     text = message.text.strip()
 
     if text == "Користувачі на модерацію":
-        users_data = load_users()
-        pending = users_data.get("pending_users", {})
+        pending = get_pending_users()
         if not pending:
             await message.answer("Немає заявок на модерацію.", reply_markup=get_admin_moderation_menu())
             return
-        
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        for uid, info in pending.items():
-            kb.add(info.get("fullname", "Невідомо"))
-        kb.add("Назад")
-        
-        await message.answer("Оберіть заявку для перегляду:", reply_markup=kb)
+
+        await message.answer("Оберіть заявку для перегляду:", reply_markup=pending_users_keyboard(pending))
         await AdminReview.waiting_for_application_selection.set()
-        await state.update_data(pending_dict=pending, from_moderation_menu=True)
+        await state.update_data(from_moderation_menu=True)
 
     elif text == "База користувачів":
-        users_data = load_users()
-        approved = users_data.get("approved_users", {})
-        if not approved:
+        open_approved_users_list(message.chat.id)
+        if not await send_approved_users_list(message, "Список схвалених користувачів:"):
             await message.answer("Немає схвалених користувачів.", reply_markup=get_admin_moderation_menu())
             return
-        
-        approved_dict = {}
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for u_id, info in approved.items():
-            name = info.get("fullname", f"ID:{u_id}")
-            approved_dict[name] = u_id
-            row.append(name)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.row("Вивантажити базу", "Розсилка")
-        kb.add("Назад")
 
-        await state.update_data(approved_dict=approved_dict, from_moderation_menu=True)
-        await message.answer("Список схвалених користувачів:", reply_markup=kb)
+        await state.update_data(from_moderation_menu=True)
         await AdminReview.viewing_approved_list.set()
 
+    elif text == "Масова модерація":
+        snapshot = open_pending_bulk_list(message.chat.id)
+        if not len(snapshot):
+            await message.answer("Немає заявок на модерацію.", reply_markup=get_admin_moderation_menu())
+            return
+        await message.answer(
+            "Позначте користувачів і оберіть дію під списком. "
+            "Кожен отримає повідомлення про рішення."
+        )
+        await send_page(message, snapshot)
+
     elif text == "Очистити заблокованих":
-        users_data = load_users()
-        # Очищаємо список заблокованих
-        users_data["blocked_users"] = []
-        save_users(users_data)
+        with store_lock():
+            users_data = load_users()
+            # Очищаємо список заблокованих
+            users_data["blocked_users"] = []
+            save_users(users_data)
 
         await message.answer(
             "Список заблокованих користувачів успішно очищено!",
@@ -192,7 +545,7 @@ async def admin_moderation_section_handler(message: types.Message, state: FSMCon
     else:
         await message.answer(
             "Оберіть зі списку: «Користувачі на модерацію», «База користувачів», "
-            "«Очистити заблокованих» або «Назад»."
+            "«Масова модерація», «Очистити заблокованих» або «Назад»."
         )
 
 @dp.message_handler(state=AdminReview.waiting_for_application_selection)
@@ -202,23 +555,15 @@ async def admin_select_pending_application(message: types.Message, state: FSMCon
         await AdminMenuStates.moderation_section.set()
         return
 
-    data = await state.get_data()
-    pending = data.get("pending_dict", {})
-    selected_fullname = message.text.strip()
-    uid = None
-    for pending_uid, info in pending.items():
-        if info.get("fullname", "").strip() == selected_fullname:
-            uid = pending_uid
-            break
-
-    if not uid:
+    uid = find_user_by_name(message.text, "pending")
+    info = get_pending_user(uid) if uid else None
+    if info is None:
         await message.answer(
             "Заявку не знайдено. Спробуйте ще раз або натисніть 'Назад'.",
             reply_markup=remove_keyboard()
         )
         return
 
-    info = pending[uid]
     from datetime import datetime
     from zoneinfo import ZoneInfo
     timestamp_str = info.get("timestamp", "")
@@ -254,8 +599,6 @@ async def admin_decision_pending_user(message: types.Message, state: FSMContext)
         await message.answer("Не знайдено користувача.", reply_markup=remove_keyboard())
         return
 
-    users_data = load_users()
-
     # Дії залежно від натисненої кнопки
     if message.text == "Дозволити":
         approve_user(uid)
@@ -263,12 +606,7 @@ async def admin_decision_pending_user(message: types.Message, state: FSMContext)
 
         # Надсилаємо повідомлення користувачу
         try:
-            await bot.send_message(
-                int(uid),
-                "Вітаємо! Ви пройшли модерацію і тепер можете користуватися ботом. "
-                "Для початку роботи натисніть /start у меню.",
-                reply_markup=remove_keyboard()
-            )
+            await bot.send_message(int(uid), APPROVED_NOTICE, reply_markup=remove_keyboard())
         except Exception as e:
             logging.exception(f"Не вдалося надіслати повідомлення користувачу {uid}: {e}")
 
@@ -278,19 +616,17 @@ async def admin_decision_pending_user(message: types.Message, state: FSMContext)
 
         # Надсилаємо повідомлення користувачу
         try:
-            await bot.send_message(
-                int(uid),
-                "На жаль, Ви не пройшли модерацію і Вас заблоковано.",
-                reply_markup=remove_keyboard()
-            )
+            await bot.send_message(int(uid), BLOCKED_NOTICE, reply_markup=remove_keyboard())
         except Exception as e:
             logging.exception(f"Не вдалося надіслати повідомлення користувачу {uid}: {e}")
 
     elif message.text == "Видалити":
         # Лише видаляємо користувача з pending, щоб він міг знову подати заявку
-        if uid in users_data.get("pending_users", {}):
-            users_data["pending_users"].pop(uid)
-            save_users(users_data)
+        with store_lock():
+            users_data = load_users()
+            if uid in users_data.get("pending_users", {}):
+                users_data["pending_users"].pop(uid)
+                save_users(users_data)
 
         response_text = (
             "Користувача вилучено зі списку pending_users. "
@@ -313,8 +649,8 @@ async def back_to_pending_list(message: types.Message, state: FSMContext):
                          reply_markup=remove_keyboard())  # або якась ваша клавіатура
 
     # 2) Повертаємось у стан waiting_for_application_selection
-    #   (де ви показували список pending-користувачів)
-    pending = (await state.get_data()).get("pending_dict", {})
+    #   (де ви показували список pending-користувачів) – список будуємо заново з довідника
+    pending = get_pending_users()
 
     if not pending:
         # Якщо вже немає пендінг-користувачів – просто повертаємось у меню «Модерація»:
@@ -322,14 +658,85 @@ async def back_to_pending_list(message: types.Message, state: FSMContext):
         await AdminMenuStates.moderation_section.set()
     else:
         # Показуємо перелік користувачів знову
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        for uid, info in pending.items():
-            kb.add(info.get("fullname", "Невідомо"))
-        kb.add("Назад")
-        await message.answer("Оберіть заявку для перегляду:", reply_markup=kb)
+        await message.answer("Оберіть заявку для перегляду:", reply_markup=pending_users_keyboard(pending))
         await AdminReview.waiting_for_application_selection.set()
 
 
+############################################
+# Масова модерація
+############################################
+# Inline-список очікуючих з позначками (мультивибір pagination). Дія над
+# обраними – один запис users.json (approve_users / block_users), а
+# повідомлення користувачам ідуть однією транзакцією в outbox, звідки
+# drain_outbox надсилає їх не швидше за OUTBOX_RATE_PER_SECOND.
+
+BULK_MODERATION_ACTIONS = (
+    ("all", "Обрати всіх / зняти позначки"),
+    ("approve", "Дозволити обраних"),
+    ("block", "Заблокувати обраних"),
+)
+
+
+def open_pending_bulk_list(chat_id: int):
+    pending = get_pending_users()
+    items = [
+        (f"{info.get('fullname') or 'Невідомо'} | {info.get('phone', '')}", uid)
+        for uid, info in sorted(pending.items(), key=lambda item: item[1].get("timestamp", ""))
+    ]
+    return open_list(
+        chat_id, "pending_bulk", "Користувачі на модерацію", items,
+        columns=1, selectable=True, actions=BULK_MODERATION_ACTIONS
+    )
+
+
+@dp.callback_query_handler(item_cb.filter(list="pending_bulk"), state="*")
+async def admin_bulk_toggle_user(query: types.CallbackQuery, callback_data: dict):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is not None:
+        snapshot.toggle(int(callback_data["pos"]))
+        await show_page(query, snapshot, snapshot.page)
+
+
+@dp.callback_query_handler(action_cb.filter(list="pending_bulk"), state="*")
+async def admin_bulk_moderate(query: types.CallbackQuery, callback_data: dict):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is None:
+        return
+    action = callback_data["action"]
+    if action == "all":
+        snapshot.toggle_all()
+        await show_page(query, snapshot, snapshot.page)
+        return
+    if action not in ("approve", "block"):
+        await query.answer()
+        return
+
+    selected = snapshot.selected_payloads()
+    if not selected:
+        await query.answer("Нікого не обрано.", show_alert=True)
+        return
+    # Лише ті, хто досі очікує: іншого міг уже схвалити чи заблокувати інший адмін
+    pending = get_pending_users()
+    uids = [uid for uid in selected if uid in pending]
+    if action == "approve":
+        done = approve_users(uids)
+        notice, verdict = APPROVED_NOTICE, "Дозволено"
+    else:
+        done = block_users(uids)
+        notice, verdict = BLOCKED_NOTICE, "Заблоковано"
+    try:
+        await asyncio.to_thread(enqueue_messages, [(uid, notice, remove_keyboard()) for uid in done])
+    except Exception as e:
+        logging.exception(f"Не вдалося поставити в чергу повідомлення після масової модерації: {e}")
+
+    drop_list(query.message.chat.id, "pending_bulk")
+    result = f"{verdict} користувачів: {len(done)}."
+    if len(done) < len(selected):
+        result += f"\nПропущено (вже опрацьовані): {len(selected) - len(done)}."
+    await query.message.edit_text(result)
+    await query.answer()
+
+
 ############################################
 # База користувачів (схвалені)
 ############################################
@@ -338,34 +745,12 @@ async def back_to_pending_list(message: types.Message, state: FSMContext):
 async def handle_export_database(message: types.Message, state: FSMContext):
     try:
         export_database()
-        data = await state.get_data()
-        approved_dict = data.get("approved_dict", {})
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for name in approved_dict.keys():
-            row.append(name)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.add("Вивантажити базу", "Назад")
-        await message.answer("База успішно вивантажена до Google Sheets.", reply_markup=kb)
+        text = "База успішно вивантажена до Google Sheets."
     except Exception as e:
         logging.exception(f"Помилка вивантаження бази: {e}")
-        data = await state.get_data()
-        approved_dict = data.get("approved_dict", {})
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for name in approved_dict.keys():
-            row.append(name)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.add("Вивантажити базу", "Назад")
-        await message.answer("Помилка вивантаження бази.", reply_markup=kb)
+        text = "Помилка вивантаження бази."
+    if not await send_approved_users_list(message, text):
+        await message.answer(text, reply_markup=list_back_keyboard(("Вивантажити базу",)))
 
 
 @dp.message_handler(state=AdminReview.viewing_approved_list)
@@ -373,7 +758,6 @@ async def admin_view_approved_list(message: types.Message, state: FSMContext):
     text = message.text.strip()
     data = await state.get_data()
     from_moderation_menu = data.get("from_moderation_menu", False)
-    approved_dict = data.get("approved_dict", {})
     # Обробка кнопки "Розсилка"
     if text == "Розсилка":
         kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
@@ -390,16 +774,20 @@ async def admin_view_approved_list(message: types.Message, state: FSMContext):
             await state.finish()
             await message.answer("Головне меню адміна:", reply_markup=get_admin_root_menu())
         return
-    if text not in approved_dict:
-        await message.answer("Оберіть користувача зі списку або натисніть «Назад».")
+    await message.answer("Оберіть користувача у списку вище або натисніть «Назад».")
+
+
+@dp.callback_query_handler(item_cb.filter(list="approved_users"), state="*")
+async def admin_select_approved_user(query: types.CallbackQuery, callback_data: dict, state: FSMContext):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is None:
         return
-    user_id = approved_dict[text]
-    users_data = load_users()
-    approved_users = users_data.get("approved_users", {})
-    if str(user_id) not in approved_users:
-        await message.answer("Користувача не знайдено серед схвалених.")
+    user_id = snapshot.payload(int(callback_data["pos"]))
+    info = get_approved_user(user_id)
+    if info is None:
+        drop_list(query.message.chat.id, "approved_users")
+        await query.answer("Користувача не знайдено серед схвалених.", show_alert=True)
         return
-    info = approved_users[str(user_id)]
     fullname = info.get("fullname", "—")
     phone = info.get("phone", "—")
     details = (
@@ -412,7 +800,8 @@ async def admin_view_approved_list(message: types.Message, state: FSMContext):
     kb.add("Назад")
     await state.update_data(selected_approved_user_id=str(user_id), selected_fullname=fullname)
     await AdminReview.viewing_approved_user.set()
-    await message.answer(details, reply_markup=kb)
+    await query.message.answer(details, reply_markup=kb)
+    await query.answer()
 
 
 @dp.message_handler(Text(equals="Розсилка"), state=AdminReview.viewing_approved_list)
@@ -426,48 +815,21 @@ async def handle_mass_mailing_prompt(message: types.Message, state: FSMContext):
 @dp.message_handler(state=AdminReview.sending_mass_message)
 async def process_mass_mailing(message: types.Message, state: FSMContext):
     if message.text == "Скасувати":
-        data = await state.get_data()
-        approved_dict = data.get("approved_dict", {})
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for name in approved_dict.keys():
-            row.append(name)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.row("Вивантажити базу", "Розсилка")
-        kb.add("Назад")
         await AdminReview.viewing_approved_list.set()
-        await message.answer("База користувачів:", reply_markup=kb)
+        await send_approved_users_list(message, "База користувачів:")
         return
 
-    users_data = load_users()
-    approved_users = users_data.get("approved_users", {})
     failed = []
-    for uid in approved_users.keys():
+    for uid in get_approved_users():
         try:
             await bot.send_message(int(uid), message.text, reply_markup=remove_keyboard())
         except Exception as e:
             logging.exception(f"Не вдалося надіслати повідомлення користувачу {uid}: {e}")
             failed.append(uid)
     response = "Розсилка виконана." if not failed else f"Повідомлення не надіслано наступним користувачам: {', '.join(failed)}"
-    data = await state.get_data()
-    approved_dict = data.get("approved_dict", {})
-    kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    row = []
-    for name in approved_dict.keys():
-        row.append(name)
-        if len(row) == 2:
-            kb.row(*row)
-            row = []
-    if row:
-        kb.row(*row)
-    kb.row("Вивантажити базу", "Розсилка")
-    kb.add("Назад")
     await AdminReview.viewing_approved_list.set()
-    await message.answer(response, reply_markup=kb)
+    if not await send_approved_users_list(message, response):
+        await message.answer(response, reply_markup=list_back_keyboard())
 
 
 @dp.message_handler(Text(equals="Відправити повідомлення"), state=AdminReview.viewing_approved_user)
@@ -485,8 +847,7 @@ async def process_send_private_message(message: types.Message, state: FSMContext
     if message.text == "Скасувати":
         data = await state.get_data()
         user_id_str = data.get("selected_approved_user_id")
-        users_data = load_users()
-        info = users_data.get("approved_users", {}).get(user_id_str, {})
+        info = get_approved_user(user_id_str) or {}
         fullname = info.get("fullname", "—")
         phone = info.get("phone", "—")
         details = (
@@ -508,8 +869,7 @@ async def process_send_private_message(message: types.Message, state: FSMContext
     except Exception as e:
         logging.exception(f"Не вдалося надіслати повідомлення користувачу {user_id_str}: {e}")
         response = "Помилка відправлення повідомлення."
-    users_data = load_users()
-    info = users_data.get("approved_users", {}).get(user_id_str, {})
+    info = get_approved_user(user_id_str) or {}
     fullname = info.get("fullname", "—")
     phone = info.get("phone", "—")
     details = (
@@ -535,27 +895,11 @@ async def admin_view_approved_single_user(message: types.Message, state: FSMCont
 
     # Кнопка "Назад"
     if text == "Назад":
-        users_data = load_users()
-        approved = users_data.get("approved_users", {})
-        if not approved:
+        # Повертаємо список знову (на ту ж сторінку)
+        if not await send_approved_users_list(message, "Список схвалених користувачів:"):
             await message.answer("Наразі немає схвалених користувачів.", reply_markup=get_admin_moderation_menu())
             await AdminMenuStates.moderation_section.set()
             return
-        # Повертаємо список знову
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for uid, info in approved.items():
-            fname = info.get("fullname", f"ID:{uid}")
-            row.append(fname)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.row("Вивантажити базу", "Розсилка")
-        kb.add("Назад")
-
-        await message.answer("Список схвалених користувачів:", reply_markup=kb)
         await AdminReview.viewing_approved_list.set()
         return
 
@@ -569,17 +913,18 @@ async def admin_view_approved_single_user(message: types.Message, state: FSMCont
 
     # Кнопка "Видалити" (повністю видаляє користувача з users.json)
     elif text == "Видалити":
-        users_data = load_users()
         uid = str(user_id_str)
-        # Прибираємо з усіх списків: approved_users, pending_users, blocked_users
-        if uid in users_data.get("approved_users", {}):
-            users_data["approved_users"].pop(uid)
-        if uid in users_data.get("pending_users", {}):
-            users_data["pending_users"].pop(uid)
-        if uid in users_data.get("blocked_users", []):
-            users_data["blocked_users"].remove(uid)
-
-        save_users(users_data)
+        with store_lock():
+            users_data = load_users()
+            # Прибираємо з усіх списків: approved_users, pending_users, blocked_users
+            if uid in users_data.get("approved_users", {}):
+                users_data["approved_users"].pop(uid)
+            if uid in users_data.get("pending_users", {}):
+                users_data["pending_users"].pop(uid)
+            if uid in users_data.get("blocked_users", []):
+                users_data["blocked_users"].remove(uid)
+
+            save_users(users_data)
         await message.answer(
             "Користувача повністю видалено з бази (усіх списків).",
             reply_markup=get_admin_moderation_menu()
@@ -617,8 +962,7 @@ async def admin_edit_approved_user_menu(message: types.Message, state: FSMContex
             await message.answer("Немає користувача. Повернення.", reply_markup=get_admin_moderation_menu())
             await AdminMenuStates.moderation_section.set()
             return
-        users_data = load_users()
-        user_info = users_data.get("approved_users", {}).get(user_id_str, {})
+        user_info = get_approved_user(user_id_str) or {}
         fullname = user_info.get("fullname", "—")
         phone = user_info.get("phone", "—")
         details = (
@@ -654,13 +998,16 @@ async def admin_edit_approved_user_fullname(message: types.Message, state: FSMCo
         await message.answer("Немає користувача для редагування.", reply_markup=get_admin_moderation_menu())
         await AdminMenuStates.moderation_section.set()
         return
-    users_data = load_users()
-    if user_id_str not in users_data.get("approved_users", {}):
+    with store_lock():
+        users_data = load_users()
+        found = user_id_str in users_data.get("approved_users", {})
+        if found:
+            users_data["approved_users"][user_id_str]["fullname"] = new_fullname
+            save_users(users_data)
+    if not found:
         await message.answer("Користувача не знайдено в approved_users.", reply_markup=get_admin_moderation_menu())
         await AdminMenuStates.moderation_section.set()
         return
-    users_data["approved_users"][user_id_str]["fullname"] = new_fullname
-    save_users(users_data)
     await message.answer("ПІБ успішно змінено!", reply_markup=remove_keyboard())
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     kb.row("Змінити ПІБ", "Змінити номер телефону")
@@ -681,13 +1028,16 @@ async def admin_edit_approved_user_phone(message: types.Message, state: FSMConte
         await message.answer("Немає користувача для редагування.", reply_markup=get_admin_moderation_menu())
         await AdminMenuStates.moderation_section.set()
         return
-    users_data = load_users()
-    if user_id_str not in users_data.get("approved_users", {}):
+    with store_lock():
+        users_data = load_users()
+        found = user_id_str in users_data.get("approved_users", {})
+        if found:
+            users_data["approved_users"][user_id_str]["phone"] = new_phone
+            save_users(users_data)
+    if not found:
         await message.answer("Користувача не знайдено в approved_users.", reply_markup=get_admin_moderation_menu())
         await AdminMenuStates.moderation_section.set()
         return
-    users_data["approved_users"][user_id_str]["phone"] = new_phone
-    save_users(users_data)
     await message.answer("Номер телефону успішно змінено!", reply_markup=remove_keyboard())
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     kb.row("Змінити ПІБ", "Змінити номер телефону")
@@ -704,66 +1054,18 @@ async def admin_edit_approved_user_phone(message: types.Message, state: FSMConte
 async def admin_requests_section_handler(message: types.Message, state: FSMContext):
     text = message.text.strip()
     if text == "Підтверджені":
-        apps = load_applications()
-        confirmed_apps = []
-        for user_id, user_applications in apps.items():
-            for idx, app_data in enumerate(user_applications):
-                if app_data.get("proposal_status") == "confirmed":
-                    confirmed_apps.append({
-                        "user_id": user_id,
-                        "app_index": idx,
-                        "app_data": app_data
-                    })
-        if not confirmed_apps:
+        if not await send_app_status_list(message, "confirmed", "Список підтверджених заявок:", rebuild=True):
             await message.answer("Немає підтверджених заявок.", reply_markup=get_admin_requests_menu())
             return
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for i, entry in enumerate(confirmed_apps, start=1):
-            culture = entry["app_data"].get("culture", "Невідомо")
-            quantity = entry["app_data"].get("quantity", "Невідомо")
-            btn_text = f"{i}. {culture} | {quantity}"
-            row.append(btn_text)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.add("Назад")
-        await state.update_data(confirmed_apps=confirmed_apps, from_requests_menu=True)
+        await state.update_data(from_requests_menu=True)
         await AdminReview.viewing_confirmed_list.set()
-        await message.answer("Список підтверджених заявок:", reply_markup=kb)
 
     elif text == "Видалені":
-        apps = load_applications()
-        deleted_apps = []
-        for user_id, user_applications in apps.items():
-            for idx, app_data in enumerate(user_applications):
-                if app_data.get("proposal_status") == "deleted":
-                    deleted_apps.append({
-                        "user_id": user_id,
-                        "app_index": idx,
-                        "app_data": app_data
-                    })
-        if not deleted_apps:
+        if not await send_app_status_list(message, "deleted", "Список «видалених» заявок:", rebuild=True):
             await message.answer("Немає видалених заявок.", reply_markup=get_admin_requests_menu())
             return
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for i, entry in enumerate(deleted_apps, start=1):
-            culture = entry["app_data"].get("culture", "Невідомо")
-            quantity = entry["app_data"].get("quantity", "Невідомо")
-            btn_text = f"{i}. {culture} | {quantity}"
-            row.append(btn_text)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.add("Назад")
-        await state.update_data(deleted_apps=deleted_apps, from_requests_menu=True)
+        await state.update_data(from_requests_menu=True)
         await AdminReview.viewing_deleted_list.set()
-        await message.answer("Список «видалених» заявок:", reply_markup=kb)
 
     elif text == "Видалення заявок":
         try:
@@ -772,34 +1074,24 @@ async def admin_requests_section_handler(message: types.Message, state: FSMConte
             if len(rows) <= 1:
                 await message.answer("У таблиці немає заявок.", reply_markup=get_admin_requests_menu())
                 return
-            kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-            temp_row = []
-            for i, row in enumerate(rows[1:], start=2):
-                if row and row[0].strip():
-                    request_number = row[0].strip()
-                    btn_text = f"{request_number} (рядок {i})"
-                    temp_row.append(btn_text)
-                    if len(temp_row) == 3:
-                        kb.row(*temp_row)
-                        temp_row = []
-            if temp_row:
-                kb.row(*temp_row)
-            kb.add("Назад")
-            await message.answer("Оберіть заявку для видалення:", reply_markup=kb)
+            items = [
+                (f"{row[0].strip()} (рядок {i})", i)
+                for i, row in enumerate(rows[1:], start=2)
+                if row and row[0].strip()
+            ]
+            snapshot = open_list(message.chat.id, "sheet_rows", "Заявки в таблиці", items, columns=3)
+            await message.answer("Оберіть заявку для видалення:", reply_markup=list_back_keyboard())
+            await send_page(message, snapshot)
             await AdminReview.confirm_deletion_app.set()
         except Exception as e:
             logging.exception("Помилка отримання заявок з Google Sheets")
             await message.answer("Помилка отримання заявок.", reply_markup=get_admin_requests_menu())
 
     elif text == "Редагування заявок":
-        apps = load_applications()
         users_with_active_apps = {}
-        for uid, user_apps in apps.items():
-            active_apps = [app for app in user_apps if app.get("proposal_status") == "active"]
-            if active_apps:
-                user_info = load_users().get("approved_users", {}).get(uid, {})
-                display_name = user_info.get("fullname", f"User {uid}")
-                users_with_active_apps[display_name] = uid
+        for uid in get_users_with_status("active"):
+            display_name = (get_approved_user(uid) or {}).get("fullname", f"User {uid}")
+            users_with_active_apps[display_name] = uid
         if not users_with_active_apps:
             await message.answer("Немає користувачів з активними заявками.", reply_markup=get_admin_requests_menu())
             return
@@ -811,6 +1103,10 @@ async def admin_requests_section_handler(message: types.Message, state: FSMConte
         await message.answer("Оберіть користувача для редагування заявок:", reply_markup=kb)
         await AdminReview.editing_applications_list.set()
 
+    elif text == "Масова зміна статусу":
+        await message.answer(BULK_STATUS_PROMPT, reply_markup=list_back_keyboard())
+        await AdminReview.bulk_status_filter.set()
+
     # Ось тут додаємо пункт «Ціна бота»:
     elif text == "Ціна бота":
         # Імпортуємо глобальну змінну з bot.py:
@@ -836,7 +1132,10 @@ async def admin_requests_section_handler(message: types.Message, state: FSMConte
         await AdminMenuStates.choosing_section.set()
 
     else:
-        await message.answer("Оберіть дію: «Підтверджені», «Видалені», «Редагування заявок», «Видалення заявок» або «Назад».")
+        await message.answer(
+            "Оберіть дію: «Підтверджені», «Видалені», «Редагування заявок», «Видалення заявок», "
+            "«Масова зміна статусу» або «Назад»."
+        )
 
 
 ############################################
@@ -850,7 +1149,20 @@ async def handle_delete_application_selection(message: types.Message, state: FSM
     if not match:
         await message.answer("Невірний формат вибору.", reply_markup=get_admin_requests_menu())
         return
-    row_number = int(match.group(1))
+    await select_sheet_row_for_deletion(message, state, int(match.group(1)))
+
+
+@dp.callback_query_handler(item_cb.filter(list="sheet_rows"), state="*")
+async def admin_select_sheet_row(query: types.CallbackQuery, callback_data: dict, state: FSMContext):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is None:
+        return
+    await AdminReview.confirm_deletion_app.set()
+    await select_sheet_row_for_deletion(query.message, state, snapshot.payload(int(callback_data["pos"])))
+    await query.answer()
+
+
+async def select_sheet_row_for_deletion(message: types.Message, state: FSMContext, row_number: int):
     apps = load_applications()
     found = False
     for uid, app_list in apps.items():
@@ -896,35 +1208,13 @@ async def confirm_deletion_yes(message: types.Message, state: FSMContext):
         return
     success = await admin_remove_app_permanently(int(uid), app_index)
     if success:
-        apps = load_applications()
-        deleted_apps = []
-        for user_id, user_apps in apps.items():
-            for idx, app_data in enumerate(user_apps):
-                if app_data.get("proposal_status") == "deleted":
-                    deleted_apps.append({
-                        "user_id": user_id,
-                        "app_index": idx,
-                        "app_data": app_data
-                    })
-        if deleted_apps:
-            kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-            temp_row = []
-            for i, entry in enumerate(deleted_apps, start=1):
-                culture = entry["app_data"].get("culture", "Невідомо")
-                quantity = entry["app_data"].get("quantity", "Невідомо")
-                btn_text = f"{i}. {culture} | {quantity}"
-                temp_row.append(btn_text)
-                if len(temp_row) == 3:
-                    kb.row(*temp_row)
-                    temp_row = []
-            if temp_row:
-                kb.row(*temp_row)
-            kb.add("Назад")
-            await state.update_data(deleted_apps=deleted_apps, from_requests_menu=True)
-            await message.answer(
-                f"Заявку з рядка {row_number} успішно видалено.\nОберіть заявку зі списку для подальших дій:",
-                reply_markup=kb
-            )
+        drop_list(message.chat.id, "sheet_rows")
+        if await send_app_status_list(
+            message, "deleted",
+            f"Заявку з рядка {row_number} успішно видалено.\nОберіть заявку зі списку для подальших дій:",
+            rebuild=True
+        ):
+            await state.update_data(from_requests_menu=True)
         else:
             kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
             kb.add("Назад")
@@ -939,32 +1229,16 @@ async def confirm_deletion_yes(message: types.Message, state: FSMContext):
 
 
 ############################################
-# Перегляд "Підтверджених" заявок
+# Перегляд "Підтверджених" та "Видалених" заявок
 ############################################
 
-@dp.message_handler(state=AdminReview.viewing_confirmed_list)
-async def admin_view_confirmed_list_choice(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    confirmed_apps = data.get("confirmed_apps", [])
-    from_requests_menu = data.get("from_requests_menu", False)
-    if message.text == "Назад":
-        if from_requests_menu:
-            await message.answer("Розділ 'Заявки':", reply_markup=get_admin_requests_menu())
-            await AdminMenuStates.requests_section.set()
-        else:
-            await state.finish()
-            await message.answer("Адмін меню:", reply_markup=get_admin_root_menu())
-        return
-    split_msg = message.text.split('.', 1)
-    if len(split_msg) < 2 or not split_msg[0].isdigit():
-        await message.answer("Оберіть номер заявки у форматі 'X. Культура | Кількість' або натисніть 'Назад'.")
-        return
-    choice = int(split_msg[0])
-    if choice < 1 or choice > len(confirmed_apps):
-        await message.answer("Невірний вибір.", reply_markup=remove_keyboard())
-        return
-    selected_entry = confirmed_apps[choice - 1]
-    app_data = selected_entry["app_data"]
+APP_DETAILS_HEADERS = {
+    "confirmed": "<b>ЗАЯВКА ПІДТВЕРДЖЕНА:</b>",
+    "deleted": "<b>«ВИДАЛЕНА» ЗАЯВКА:</b>",
+}
+
+
+def app_details_text(app_data: dict, status: str) -> str:
     timestamp = app_data.get("timestamp", "")
     from datetime import datetime
     try:
@@ -973,7 +1247,7 @@ async def admin_view_confirmed_list_choice(message: types.Message, state: FSMCon
     except:
         formatted_date = timestamp
     details = [
-        "<b>ЗАЯВКА ПІДТВЕРДЖЕНА:</b>",
+        APP_DETAILS_HEADERS.get(status) or f"<b>ЗАЯВКА ({status or 'без статусу'}):</b>",
         f"Дата створення: <b>{formatted_date}</b>",
         f"ФГ: <b>{app_data.get('fgh_name', '')}</b>",
         f"ЄДРПОУ: <b>{app_data.get('edrpou', '')}</b>",
@@ -989,165 +1263,119 @@ async def admin_view_confirmed_list_choice(message: types.Message, state: FSMCon
         f"Бажана ціна: <b>{app_data.get('price', '')}</b>",
         f"Пропозиція ціни: <b>{app_data.get('proposal', '')}</b>",
     ]
+    if status == "deleted":
+        details.append("\nЦя заявка позначена як «deleted».")
     extra = app_data.get("extra_fields", {})
     if extra:
         details.append("Додаткові параметри:")
         for key, value in extra.items():
             details.append(f"{friendly_names.get(key, key.capitalize())}: {value}")
+    return "\n".join(details)
+
+
+async def leave_app_status_list(message: types.Message, state: FSMContext):
+    data = await state.get_data()
+    if data.get("from_requests_menu", False):
+        await message.answer("Розділ 'Заявки':", reply_markup=get_admin_requests_menu())
+        await AdminMenuStates.requests_section.set()
+    else:
+        await state.finish()
+        await message.answer("Адмін меню:", reply_markup=get_admin_root_menu())
+
+
+@dp.message_handler(state=AdminReview.viewing_confirmed_list)
+async def admin_view_confirmed_list_choice(message: types.Message, state: FSMContext):
+    if message.text == "Назад":
+        await leave_app_status_list(message, state)
+        return
+    await message.answer("Оберіть заявку у списку вище або натисніть «Назад».")
+
+
+@dp.message_handler(state=AdminReview.viewing_deleted_list)
+async def admin_view_deleted_list_choice(message: types.Message, state: FSMContext):
+    if message.text == "Назад":
+        await leave_app_status_list(message, state)
+        return
+    await message.answer("Оберіть заявку у списку вище або натисніть «Назад».")
+
+
+@dp.callback_query_handler(item_cb.filter(list=["confirmed", "deleted"]), state="*")
+async def admin_select_status_app(query: types.CallbackQuery, callback_data: dict, state: FSMContext):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is None:
+        return
+    status = callback_data["list"]
+    payload = snapshot.payload(int(callback_data["pos"]))
+    entry = resolve_app_entry(payload) if payload else None
+    if entry is None or entry["app_data"].get("proposal_status") != status:
+        drop_list(query.message.chat.id, status)
+        await query.answer("Заявку вже змінено або видалено, відкрийте список знову.", show_alert=True)
+        return
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add("Видалити", "Назад")
-    await state.update_data(selected_confirmed=selected_entry, chosen_confirmed_index=choice - 1)
-    await AdminReview.viewing_confirmed_app.set()
-    await message.answer("\n".join(details), parse_mode="HTML", reply_markup=kb)
+    if status == "confirmed":
+        kb.add("Видалити", "Назад")
+        await state.update_data(selected_confirmed=payload)
+        await AdminReview.viewing_confirmed_app.set()
+    else:
+        kb.add("Видалити назавжди", "Назад")
+        await state.update_data(selected_deleted=payload)
+        await AdminReview.viewing_deleted_app.set()
+    await query.message.answer(app_details_text(entry["app_data"], status), parse_mode="HTML", reply_markup=kb)
+    await query.answer()
 
 
 @dp.message_handler(state=AdminReview.viewing_confirmed_app)
 async def admin_view_confirmed_app_handler(message: types.Message, state: FSMContext):
     data = await state.get_data()
-    selected_entry = data.get("selected_confirmed")
-    confirmed_apps = data.get("confirmed_apps", [])
-    chosen_index = data.get("chosen_confirmed_index")
-    if not selected_entry or chosen_index is None:
+    payload = data.get("selected_confirmed")
+    if not payload:
         await message.answer("Немає заявки для опрацювання.", reply_markup=get_admin_requests_menu())
         await state.finish()
         return
     if message.text == "Назад":
-        if not confirmed_apps:
+        if not await send_app_status_list(message, "confirmed", "Список підтверджених заявок:"):
             await state.finish()
             await message.answer("Список підтверджених заявок тепер порожній.", reply_markup=get_admin_requests_menu())
             return
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for i, entry in enumerate(confirmed_apps, start=1):
-            culture = entry["app_data"].get("culture", "Невідомо")
-            quantity = entry["app_data"].get("quantity", "Невідомо")
-            btn_text = f"{i}. {culture} | {quantity}"
-            row.append(btn_text)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.add("Назад")
         await AdminReview.viewing_confirmed_list.set()
-        await message.answer("Список підтверджених заявок:", reply_markup=kb)
         return
     elif message.text == "Видалити":
-        user_id = int(selected_entry["user_id"])
-        app_index = selected_entry["app_index"]
-        update_application_status(user_id, app_index, "deleted")
-        if 0 <= chosen_index < len(confirmed_apps):
-            confirmed_apps.pop(chosen_index)
-        await state.update_data(confirmed_apps=confirmed_apps, selected_confirmed=None, chosen_confirmed_index=None)
-        await message.answer("Заявка перенесена у 'видалені'.", reply_markup=get_admin_requests_menu())
+        entry = resolve_app_entry(payload)
+        if entry is not None:
+            update_application_status(int(entry["user_id"]), entry["app_index"], "deleted")
+        drop_list(message.chat.id, "confirmed")
+        drop_list(message.chat.id, "deleted")
+        await state.update_data(selected_confirmed=None)
+        if entry is None:
+            await message.answer("Помилка: Заявка не знайдена або вже була видалена.", reply_markup=get_admin_requests_menu())
+        else:
+            await message.answer("Заявка перенесена у 'видалені'.", reply_markup=get_admin_requests_menu())
         await AdminMenuStates.requests_section.set()
     else:
         await message.answer("Оберіть «Видалити» або «Назад».")
 
 
-############################################
-# Перегляд "Видалених"
-############################################
-
-@dp.message_handler(state=AdminReview.viewing_deleted_list)
-async def admin_view_deleted_list_choice(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    deleted_apps = data.get("deleted_apps", [])
-    from_requests_menu = data.get("from_requests_menu", False)
-    if message.text == "Назад":
-        if from_requests_menu:
-            await message.answer("Розділ 'Заявки':", reply_markup=get_admin_requests_menu())
-            await AdminMenuStates.requests_section.set()
-        else:
-            await state.finish()
-            await message.answer("Адмін меню:", reply_markup=get_admin_root_menu())
-        return
-    split_msg = message.text.split('.', 1)
-    if len(split_msg) < 2 or not split_msg[0].isdigit():
-        await message.answer("Оберіть номер заявки у форматі 'X. Культура | Кількість' або натисніть 'Назад'.")
-        return
-    choice = int(split_msg[0])
-    if choice < 1 or choice > len(deleted_apps):
-        await message.answer("Невірний вибір.", reply_markup=remove_keyboard())
-        return
-    selected_entry = deleted_apps[choice - 1]
-    app_data = selected_entry["app_data"]
-    timestamp = app_data.get("timestamp", "")
-    from datetime import datetime
-    try:
-        dt = datetime.fromisoformat(timestamp)
-        formatted_date = dt.strftime("%d.%m.%Y")
-    except:
-        formatted_date = timestamp
-    details = [
-        "<b>«ВИДАЛЕНА» ЗАЯВКА:</b>",
-        f"Дата створення: <b>{formatted_date}</b>",
-        f"ФГ: <b>{app_data.get('fgh_name', '')}</b>",
-        f"ЄДРПОУ: <b>{app_data.get('edrpou', '')}</b>",
-        f"Номер ФГ: {app_data.get('phone', '')}",
-        f"Область: <b>{app_data.get('region', '')}</b>",
-        f"Район: <b>{app_data.get('district', '')}</b>",
-        f"Місто: <b>{app_data.get('city', '')}</b>",
-        f"Група: <b>{app_data.get('group', '')}</b>",
-        f"Культура: <b>{app_data.get('culture', '')}</b>",
-        f"Кількість: <b>{app_data.get('quantity', '')} т</b>",
-        f"Форма оплати: <b>{app_data.get('payment_form', '')}</b>",
-        f"Валюта: <b>{app_data.get('currency', '')}</b>",
-        f"Бажана ціна: <b>{app_data.get('price', '')}</b>",
-        f"Пропозиція ціни: <b>{app_data.get('proposal', '')}</b>",
-        "\nЦя заявка позначена як «deleted»."
-    ]
-    extra = app_data.get("extra_fields", {})
-    if extra:
-        details.append("Додаткові параметри:")
-        for key, value in extra.items():
-            details.append(f"{friendly_names.get(key, key.capitalize())}: {value}")
-    kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add("Видалити назавжди", "Назад")
-    await state.update_data(selected_deleted=selected_entry, chosen_deleted_index=choice - 1)
-    await AdminReview.viewing_deleted_app.set()
-    await message.answer("\n".join(details), parse_mode="HTML", reply_markup=kb)
-
-
 @dp.message_handler(state=AdminReview.viewing_deleted_app)
 async def admin_view_deleted_app_handler(message: types.Message, state: FSMContext):
     data = await state.get_data()
-    selected_entry = data.get("selected_deleted")
-    deleted_apps = data.get("deleted_apps", [])
-    chosen_index = data.get("chosen_deleted_index")
-    if not selected_entry or chosen_index is None:
+    payload = data.get("selected_deleted")
+    if not payload:
         await message.answer("Немає заявки для опрацювання.", reply_markup=get_admin_requests_menu())
         await state.finish()
         return
     if message.text == "Назад":
-        if not deleted_apps:
+        if not await send_app_status_list(message, "deleted", "Список видалених заявок:"):
             await message.answer("Список видалених заявок порожній.", reply_markup=get_admin_requests_menu())
             await AdminMenuStates.requests_section.set()
             return
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for i, entry in enumerate(deleted_apps, start=1):
-            culture = entry["app_data"].get("culture", "Невідомо")
-            quantity = entry["app_data"].get("quantity", "Невідомо")
-            btn_text = f"{i}. {culture} | {quantity}"
-            row.append(btn_text)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.add("Назад")
         await AdminReview.viewing_deleted_list.set()
-        await message.answer("Список видалених заявок:", reply_markup=kb)
         return
     elif message.text == "Видалити назавжди":
-        user_id = int(selected_entry["user_id"])
-        app_index = selected_entry["app_index"]
-        success = await admin_remove_app_permanently(user_id, app_index)
+        entry = resolve_app_entry(payload)
+        success = entry is not None and await admin_remove_app_permanently(int(entry["user_id"]), entry["app_index"])
+        drop_list(message.chat.id, "deleted")
+        await state.update_data(selected_deleted=None)
         if success:
-            if 0 <= chosen_index < len(deleted_apps):
-                deleted_apps.pop(chosen_index)
-            await state.update_data(deleted_apps=deleted_apps, selected_deleted=None, chosen_deleted_index=None)
             await message.answer("Заявку остаточно видалено з файлу та таблиць.", reply_markup=get_admin_requests_menu())
         else:
             await message.answer("Помилка: Заявка не знайдена або вже була видалена.", reply_markup=get_admin_requests_menu())
@@ -1162,14 +1390,10 @@ async def admin_view_deleted_app_handler(message: types.Message, state: FSMConte
 
 @dp.message_handler(Text(equals="Редагування заявок"), state=AdminMenuStates.requests_section)
 async def handle_editing_applications(message: types.Message, state: FSMContext):
-    apps = load_applications()
     users_with_active_apps = {}
-    for uid, user_apps in apps.items():
-        active_apps = [app for app in user_apps if app.get("proposal_status") == "active"]
-        if active_apps:
-            user_info = load_users().get("approved_users", {}).get(uid, {})
-            display_name = user_info.get("fullname", f"User {uid}")
-            users_with_active_apps[display_name] = uid
+    for uid in get_users_with_status("active"):
+        display_name = (get_approved_user(uid) or {}).get("fullname", f"User {uid}")
+        users_with_active_apps[display_name] = uid
     if not users_with_active_apps:
         await message.answer("Немає користувачів з активними заявками.", reply_markup=get_admin_requests_menu())
         return
@@ -1297,6 +1521,117 @@ async def editing_app_status_back(message: types.Message, state: FSMContext):
     await AdminReview.editing_single_application.set()
 
 
+############################################
+# Масова зміна статусу заявок
+############################################
+# Заявки відбираються фільтром, як у /find (слова + status:/currency:/culture:),
+# і показуються списком з позначками. Дія над обраними – один запис файлу заявок
+# (update_applications_status) і один batchUpdate на таблицю (paint_rows): рядки
+# фарбуються кольором нового статусу, для підтверджених із ціною стирається
+# непідтверджена ціна. «Активна» лише знімає червоний/зелений фон підтверджених і
+# видалених – інші рядки не перефарбовуються, щоб не стерти їхнє виділення.
+
+BULK_STATUS_PROMPT = (
+    "Введіть фільтр заявок, як у /find: слова та/або status:..., currency:..., culture:...\n"
+    "Наприклад: status:active culture:ячмінь"
+)
+BULK_STATUS_ACTIONS = (
+    ("all", "Обрати всі / зняти позначки"),
+    ("active", "→ Активна"),
+    ("confirmed", "→ Підтверджена"),
+    ("deleted", "→ Видалена"),
+)
+
+
+@dp.message_handler(state=AdminReview.bulk_status_filter)
+async def admin_bulk_status_filter(message: types.Message, state: FSMContext):
+    if message.text == "Назад":
+        drop_list(message.chat.id, "bulk_status")
+        await message.answer("Розділ 'Заявки':", reply_markup=get_admin_requests_menu())
+        await AdminMenuStates.requests_section.set()
+        return
+
+    text, filters = parse_find_query(message.text or "")
+    if not text.strip() and not filters:
+        await message.answer(BULK_STATUS_PROMPT)
+        return
+    results = get_search_index().search(text, filters)
+    if not results:
+        await message.answer("Нічого не знайдено. Введіть інший фільтр або натисніть «Назад».")
+        return
+    snapshot = open_list(
+        message.chat.id, "bulk_status", "Заявки для зміни статусу", found_app_items(results, show_status=True),
+        columns=1, selectable=True, actions=BULK_STATUS_ACTIONS
+    )
+    await send_page(message, snapshot)
+
+
+@dp.callback_query_handler(item_cb.filter(list="bulk_status"), state="*")
+async def admin_bulk_toggle_app(query: types.CallbackQuery, callback_data: dict):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is not None:
+        snapshot.toggle(int(callback_data["pos"]))
+        await show_page(query, snapshot, snapshot.page)
+
+
+@dp.callback_query_handler(action_cb.filter(list="bulk_status"), state="*")
+async def admin_bulk_set_status(query: types.CallbackQuery, callback_data: dict):
+    snapshot = await _list_from_callback(query, callback_data)
+    if snapshot is None:
+        return
+    action = callback_data["action"]
+    if action == "all":
+        snapshot.toggle_all()
+        await show_page(query, snapshot, snapshot.page)
+        return
+    if action not in STATUS_ROW_COLORS:
+        await query.answer()
+        return
+
+    selected = snapshot.selected_payloads()
+    if not selected:
+        await query.answer("Нічого не обрано.", show_alert=True)
+        return
+    def selected_rows():
+        rows = []
+        for entry in selected:
+            _, user_apps = get_user_applications(entry["user_id"])
+            rows.extend(
+                app["sheet_row"] for app in user_apps
+                if app.get("timestamp", "") == entry["timestamp"] and app.get("sheet_row")
+            )
+        return (min(rows), max(rows)) if rows else None
+
+    # Обрані рядки таблиці не мають зсунутись між записом статусів і фарбуванням
+    async with sheet_rows_lock.rows(selected_rows):
+        updated = update_applications_status(selected, action)
+        placed = [
+            app for app, previous in updated
+            if app.get("sheet_row") and (action != "active" or previous in ("confirmed", "deleted"))
+        ]
+        clear_columns = (
+            {
+                app["sheet_row"]: unconfirmed_price_columns(app) for app in placed
+                if parse_number(app.get("proposal")) is not None
+            }
+            if action == "confirmed" else None
+        )
+        painted = paint_rows({app["sheet_row"]: STATUS_ROW_COLORS[action] for app in placed}, clear_columns) if placed else True
+
+    drop_list(query.message.chat.id, "bulk_status")
+    drop_list(query.message.chat.id, "confirmed")
+    drop_list(query.message.chat.id, "deleted")
+    label = dict(BULK_STATUS_ACTIONS)[action].lstrip("→ ")
+    result = f"Статус «{label}» встановлено для {len(updated)} заявок."
+    if len(updated) < len(selected):
+        result += f"\nБез змін (вже мали цей статус або видалені): {len(selected) - len(updated)}."
+    if not painted:
+        result += "\nНе вдалося оновити оформлення в таблиці, деталі – у логах."
+    await query.message.edit_text(result)
+    await query.message.answer("Введіть новий фільтр або натисніть «Назад».")
+    await query.answer()
+
+
 ############################################
 # УПРАВЛІННЯ «ЦІНОЮ БОТА»
 ############################################
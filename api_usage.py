@@ -0,0 +1,287 @@
+# api_usage.py
+import os
+import sys
+import json
+import time
+import fcntl
+import asyncio
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from html import escape
+
+from config import DATA_DIR, SHEETS_READ_QUOTA_PER_MINUTE
+
+USAGE_FILE = os.path.join(DATA_DIR, "api_usage.json")
+USAGE_LOCK_FILE = os.path.join(DATA_DIR, "api_usage.lock")
+USAGE_FLUSH_SECONDS = 60
+USAGE_KEEP_DAYS = 90
+
+############################################
+# Облік викликів Google API
+############################################
+# Кожен вихідний запит (Sheets/Drive, форматування, Geocoding, Routes)
+# рахується за ключем (api, operation, caller, status), де caller –
+# найближча функція бота у стеку викликів. Ковзні вікна по хвилинах за
+# останню годину – у пам'яті процесу; добові суми періодично дописуються
+# у USAGE_FILE (спільний для бота і воркера, запис під flock на USAGE_LOCK_FILE
+# через tmp-файл і os.replace, тож читач без flock не побачить половину файлу),
+# і звіт «за добу» береться з нього – тож містить виклики обох процесів.
+# record_api_call викликається і з потоків (asyncio.to_thread), тому стан у
+# пам'яті змінюється й читається лише під _state_lock.
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Обгортки, через які проходить виклик, – не «викликачі»
+_SKIP_FUNCTIONS = {"request", "wrapper", "async_wrapper", "record_api_call"}
+_SKIP_MODULES = {"api_usage", "timing", "tracing", "metrics", "benchmarks.fakes"}
+
+_minutes = deque(maxlen=60)  # (хвилина epoch, Counter) – лише цей процес
+_unflushed = {}  # дата -> Counter, ще не записаний у файл
+_last_calls = {}  # api -> (time.time(), status) останнього виклику – для /healthz
+_state_lock = threading.Lock()
+
+
+def find_caller(depth_limit: int = 40) -> str:
+    """Найближча функція коду бота (а не gspread/requests/обгорток) у стеку."""
+    frame = sys._getframe(2)
+    for _ in range(depth_limit):
+        if frame is None:
+            break
+        code = frame.f_code
+        filename = code.co_filename
+        if filename.startswith(_PROJECT_DIR) and code.co_name not in _SKIP_FUNCTIONS:
+            module = os.path.splitext(os.path.relpath(filename, _PROJECT_DIR))[0].replace(os.sep, ".")
+            if module not in _SKIP_MODULES:
+                return f"{module}.{code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _key_str(key) -> str:
+    return "|".join(str(part) for part in key)
+
+
+def record_api_call(api: str, operation: str, status, caller: str = None):
+    key = (api, operation, caller or find_caller(), str(status))
+    now = time.time()
+    minute = int(now // 60)
+    date = datetime.fromtimestamp(now).strftime("%Y-%m-%d")
+    with _state_lock:
+        if not _minutes or _minutes[-1][0] != minute:
+            _minutes.append((minute, Counter()))
+        _minutes[-1][1][key] += 1
+        _unflushed.setdefault(date, Counter())[_key_str(key)] += 1
+        _last_calls[api] = (now, str(status))
+
+
+def last_call_status() -> dict:
+    """{api: {"ago": секунд від останнього виклику, "status": його статус}}"""
+    now = time.time()
+    with _state_lock:
+        calls = list(_last_calls.items())
+    return {api: {"ago": round(now - at, 3), "status": status} for api, (at, status) in calls}
+
+
+def _unflushed_copy() -> dict:
+    with _state_lock:
+        return {date: Counter(counts) for date, counts in _unflushed.items()}
+
+
+############################################
+# Звіти
+############################################
+
+def _window(minutes: int) -> Counter:
+    border = int(time.time() // 60) - minutes + 1
+    total = Counter()
+    with _state_lock:
+        for minute, counts in _minutes:
+            if minute >= border:
+                total.update(counts)
+    return total
+
+
+def _group(counts: Counter, *fields) -> dict:
+    index = {"api": 0, "operation": 1, "caller": 2, "status": 3}
+    grouped = Counter()
+    for key, count in counts.items():
+        grouped[" ".join(key[index[f]] for f in fields)] += count
+    return dict(grouped.most_common())
+
+
+def _is_sheets_read(key) -> bool:
+    return key[0] == "sheets" and key[1].endswith(".get")
+
+
+def _day_counts(data: dict, date: str) -> Counter:
+    """Лічильники за date: з файлу (усі процеси) + ще не записані цим процесом."""
+    counts = Counter()
+    for source in (data, _unflushed_copy()):
+        for key, count in source.get(date, {}).items():
+            counts[tuple(key.split("|", 3))] += count
+    return counts
+
+
+def usage_report(top: int = 10) -> dict:
+    """
+    Остання хвилина/година – лише цей процес (ковзні вікна в пам'яті).
+    «Сьогодні» і «По днях» – з USAGE_FILE, куди пишуть і бот, і воркер,
+    плюс ще не записане цим процесом; виклики іншого процесу – із запізненням
+    до USAGE_FLUSH_SECONDS.
+    """
+    last_minute = _window(1)
+    last_hour = _window(60)
+    with _state_lock:
+        per_minute = [(minute, sum(counts.values())) for minute, counts in _minutes]
+    data = _read_usage_file()
+    today_date = datetime.now().strftime("%Y-%m-%d")
+    today = _day_counts(data, today_date)
+    return {
+        "last_minute": {
+            "scope": "process",
+            "by_api": _group(last_minute, "api"),
+            "sheets_reads": sum(c for k, c in last_minute.items() if _is_sheets_read(k)),
+            "sheets_read_quota": SHEETS_READ_QUOTA_PER_MINUTE,
+        },
+        "last_hour": {
+            "scope": "process",
+            "by_api": _group(last_hour, "api"),
+            "per_minute": [
+                {"minute": datetime.fromtimestamp(minute * 60).strftime("%H:%M"), "calls": calls}
+                for minute, calls in per_minute
+            ],
+        },
+        "today": {
+            "scope": "all_processes",
+            "date": today_date,
+            "by_api": _group(today, "api"),
+            "by_operation": _group(today, "api", "operation"),
+            "by_status": _group(today, "api", "status"),
+            "top_callers": dict(list(_group(today, "caller").items())[:top]),
+        },
+        "days": load_daily_totals(data),
+    }
+
+
+def _inline(counts: dict) -> str:
+    return ", ".join(f"{name}: {count}" for name, count in counts.items()) or "немає викликів"
+
+
+def format_usage_report(report: dict) -> str:
+    """Текст для адмін-команди /api_usage (HTML parse mode)."""
+    minute = report["last_minute"]
+    today = report["today"]
+    lines = [
+        "<b>Google API</b>",
+        "<i>Хвилина й година – лише цей процес; «Сьогодні» і «По днях» – бот і воркер разом "
+        f"(виклики іншого процесу – із запізненням до {USAGE_FLUSH_SECONDS} с).</i>",
+        f"Остання хвилина: {_inline(minute['by_api'])}",
+        f"Читання Sheets за хвилину: {minute['sheets_reads']} / {minute['sheets_read_quota']}",
+        f"Остання година: {_inline(report['last_hour']['by_api'])}",
+        "",
+        f"<b>Сьогодні ({today['date'] or '-'})</b>: {_inline(today['by_api'])}",
+        f"Статуси: {_inline(today['by_status'])}",
+        "Найчастіші викликачі:",
+    ]
+    lines.extend(f"  {escape(caller)}: {count}" for caller, count in today["top_callers"].items())
+    days = report["days"]
+    if days:
+        lines.append("")
+        lines.append("<b>По днях</b>:")
+        for date in sorted(days)[-7:]:
+            lines.append(f"  {date}: {_inline(days[date])}")
+    return "\n".join(lines)
+
+
+############################################
+# Збереження добових сум
+############################################
+
+def _locked_file():
+    # Лок – окремий файл: USAGE_FILE підміняється через os.replace, і flock
+    # на ньому самому лишився б на старому inode
+    f = open(USAGE_LOCK_FILE, "a")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+def _read_file() -> dict:
+    try:
+        with open(USAGE_FILE, "r", encoding="utf-8") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return {}
+    if not content.strip():
+        return {}
+    try:
+        return json.loads(content)
+    except ValueError:
+        logging.error(f"[API USAGE] Пошкоджений {USAGE_FILE}, починаємо заново.")
+        return {}
+
+
+def _write_file(data: dict):
+    tmp_path = f"{USAGE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, USAGE_FILE)
+
+
+def flush_usage():
+    """Дописує ще не збережені лічильники у USAGE_FILE (сумує з тим, що там уже є)."""
+    # Забираємо лічильники атомарно: виклики з інших потоків підуть уже в новий _unflushed
+    with _state_lock:
+        if not _unflushed:
+            return
+        pending = dict(_unflushed)
+        _unflushed.clear()
+    try:
+        with _locked_file():
+            data = _read_file()
+            for date, counts in pending.items():
+                day = data.setdefault(date, {})
+                for key, count in counts.items():
+                    day[key] = day.get(key, 0) + count
+            for date in sorted(data)[:-USAGE_KEEP_DAYS]:
+                data.pop(date)
+            _write_file(data)
+    except OSError as e:
+        logging.error(f"[API USAGE] Не вдалося записати {USAGE_FILE}: {e}")
+        with _state_lock:
+            for date, counts in pending.items():
+                _unflushed.setdefault(date, Counter()).update(counts)
+
+
+def _read_usage_file() -> dict:
+    if not os.path.exists(USAGE_FILE):
+        return {}
+    try:
+        with open(USAGE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"[API USAGE] Не вдалося прочитати {USAGE_FILE}: {e}")
+        return {}
+
+
+def load_daily_totals(data: dict = None) -> dict:
+    """Добові суми по API з файлу + ще не записані: {дата: {api: кількість}}."""
+    if data is None:
+        data = _read_usage_file()
+    totals = {}
+    for source in (data, _unflushed_copy()):
+        for date, counts in source.items():
+            day = totals.setdefault(date, Counter())
+            for key, count in counts.items():
+                day[key.split("|", 1)[0]] += count
+    return {date: dict(counts) for date, counts in sorted(totals.items())}
+
+
+async def run_usage_flusher(interval: int = USAGE_FLUSH_SECONDS):
+    """Фонове завдання: раз на interval секунд зберігає лічильники у файл."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            flush_usage()
+    finally:
+        flush_usage()
@@ -0,0 +1,271 @@
+# benchmarks/bench_db.py
+"""
+Мікробенчмарки сховища db.py на великих обсягах.
+
+    python -m benchmarks.bench_db --sizes 1000 10000 100000 --output db.json
+    python -m benchmarks.bench_db --backends json-indent sqlite --sizes 10000
+
+Для кожного розміру та бекенду міряється час load_applications,
+save_applications, add_application, update_application_status і
+delete_application_from_file_entirely (усі – через функції db.py),
+розмір файлу та пікова пам'ять (tracemalloc) під час load/save.
+Бекенд підміняє лише load_applications/save_applications, тож решта
+функцій db.py працює без змін – як було б і в продакшні.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import pickle
+import random
+import sqlite3
+import argparse
+import tempfile
+import platform
+import tracemalloc
+from abc import ABC, abstractmethod
+
+from benchmarks.harness import prepare_environment, percentiles, git_revision, write_results
+
+############################################
+# Альтернативні бекенди з тим самим інтерфейсом
+############################################
+
+class Backend(ABC):
+    name = ""
+    suffix = ".json"
+
+    @abstractmethod
+    def load(self, path):
+        """Заявки з файлу path."""
+
+    @abstractmethod
+    def save(self, path, apps):
+        """Записує заявки у файл path."""
+
+
+class JsonIndentBackend(Backend):
+    """
+    Поточна реалізація db.py (indent=2, ensure_ascii=False). Під час вимірювань
+    StoreUnderTest лишає справжні load_applications/save_applications з db.py.
+    """
+    name = "json-indent"
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, path, apps):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(apps, f, indent=2, ensure_ascii=False)
+
+
+class JsonCompactBackend(Backend):
+    name = "json-compact"
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, path, apps):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(apps, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class PickleBackend(Backend):
+    name = "pickle"
+    suffix = ".pickle"
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, path, apps):
+        with open(path, "wb") as f:
+            pickle.dump(apps, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class SqliteBackend(Backend):
+    """Один рядок на користувача (uid, JSON його заявок); save перезаписує все в одній транзакції."""
+    name = "sqlite"
+    suffix = ".sqlite3"
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE IF NOT EXISTS applications (uid TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        return conn
+
+    def load(self, path):
+        conn = self._connect(path)
+        try:
+            return {uid: json.loads(data) for uid, data in conn.execute("SELECT uid, data FROM applications")}
+        finally:
+            conn.close()
+
+    def save(self, path, apps):
+        conn = self._connect(path)
+        try:
+            with conn:
+                conn.execute("DELETE FROM applications")
+                conn.executemany(
+                    "INSERT INTO applications (uid, data) VALUES (?, ?)",
+                    ((uid, json.dumps(app_list, ensure_ascii=False)) for uid, app_list in apps.items())
+                )
+        finally:
+            conn.close()
+
+
+class OrjsonBackend(Backend):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            return self._orjson.loads(f.read())
+
+    def save(self, path, apps):
+        with open(path, "wb") as f:
+            f.write(self._orjson.dumps(apps))
+
+
+BACKENDS = {b.name: b for b in (JsonIndentBackend, JsonCompactBackend, PickleBackend, SqliteBackend, OrjsonBackend)}
+
+
+def make_backend(name: str):
+    try:
+        return BACKENDS[name]()
+    except ImportError as e:
+        print(f"Бекенд {name} пропущено: {e}", file=sys.stderr)
+        return None
+
+
+############################################
+# Вимірювання
+############################################
+
+class StoreUnderTest:
+    """Направляє функції db.py на файл бекенду."""
+
+    def __init__(self, db, backend: Backend, path: str):
+        self.db = db
+        self.backend = backend
+        self.path = path
+        self._original = (db.APPLICATIONS_FILE, db.load_applications, db.save_applications)
+
+    def __enter__(self):
+        self.db.APPLICATIONS_FILE = self.path
+        if self.backend.name != JsonIndentBackend.name:
+            self.db.load_applications = lambda: self.backend.load(self.path)
+            self.db.save_applications = lambda apps: self.backend.save(self.path, apps)
+        return self
+
+    def __exit__(self, *exc):
+        self.db.APPLICATIONS_FILE, self.db.load_applications, self.db.save_applications = self._original
+
+
+def _timed(func, repeat: int):
+    values = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        values.append(time.perf_counter() - started)
+    return percentiles(values)
+
+
+def _peak_memory_mb(func) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024 / 1024, 2)
+
+
+def bench_backend(db, backend: Backend, dataset, work_dir: str, repeat: int, seed: int) -> dict:
+    path = os.path.join(work_dir, f"applications_{backend.name}{backend.suffix}")
+    if os.path.exists(path):
+        os.remove(path)
+    rnd = random.Random(seed)
+    apps = dataset.applications
+    user_ids = list(apps)
+    template = next(iter(apps.values()))[0]
+
+    with StoreUnderTest(db, backend, path):
+        db.save_applications(apps)
+        result = {"file_bytes": os.path.getsize(path)}
+
+        result["load_applications"] = _timed(db.load_applications, repeat)
+        result["save_applications"] = _timed(lambda: db.save_applications(apps), repeat)
+
+        def add():
+            uid = rnd.choice(user_ids)
+            data = {k: v for k, v in template.items() if k not in ("timestamp", "user_id", "chat_id", "proposal_status")}
+            db.add_application(int(uid), int(uid), data)
+
+        def update():
+            uid = rnd.choice(user_ids)
+            db.update_application_status(int(uid), 0, "waiting", proposal="9000")
+
+        def delete():
+            # Видаляємо останню (щойно додану) заявку будь-якого користувача з 2+ заявками
+            current = db.load_applications()
+            uid = next(u for u in rnd.sample(user_ids, len(user_ids)) if len(current.get(u, [])) > 1)
+            db.delete_application_from_file_entirely(int(uid), len(current[uid]) - 1)
+
+        result["add_application"] = _timed(add, repeat)
+        result["update_application_status"] = _timed(update, repeat)
+        result["delete_application_from_file_entirely"] = _timed(delete, repeat)
+
+        result["load_peak_mb"] = _peak_memory_mb(db.load_applications)
+        result["save_peak_mb"] = _peak_memory_mb(lambda: db.save_applications(apps))
+    return result
+
+
+def main(args) -> dict:
+    import db
+    from benchmarks.datasets import generate_dataset
+
+    backends = [b for b in (make_backend(name) for name in args.backends) if b is not None]
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": vars(args),
+        },
+        "sizes": {},
+    }
+    for size in args.sizes:
+        dataset = generate_dataset(max(size // 10, 1), size, seed=args.seed, with_sheets=False)
+        db.save_users(dataset.users)
+        work_dir = tempfile.mkdtemp(prefix=f"bench-db-{size}-", dir=os.environ["DATA_DIR"])
+        results["sizes"][str(size)] = {
+            backend.name: bench_backend(db, backend, dataset, work_dir, args.repeat, args.seed)
+            for backend in backends
+        }
+        print(f"{size} заявок: готово", file=sys.stderr)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Мікробенчмарки сховища db.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--output", default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    prepare_environment(args.data_dir or tempfile.mkdtemp(prefix="bot-bench-db-"))
+    write_results(main(args), args.output)
@@ -0,0 +1,75 @@
+# benchmarks/compare.py
+"""
+Порівняння двох результатів benchmarks.run_load:
+
+    python -m benchmarks.compare base.json new.json --threshold 0.2
+
+Виводить метрики, що змінились, і завершується з кодом 1, якщо час
+(mean/p50/p95/p99/seconds) виріс більше ніж на threshold або зросла
+кількість викликів API.
+"""
+import sys
+import json
+import argparse
+
+TIME_KEYS = ("mean", "p50", "p95", "p99", "seconds")
+
+
+def flatten(data, prefix=""):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == "meta":
+                continue
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, data
+
+
+def compare(base: dict, new: dict, threshold: float):
+    base_flat = dict(flatten(base))
+    new_flat = dict(flatten(new))
+    rows = []
+    regressions = 0
+    for key in sorted(set(base_flat) | set(new_flat)):
+        old_value, new_value = base_flat.get(key), new_flat.get(key)
+        if old_value == new_value:
+            continue
+        leaf = key.rsplit(".", 1)[-1]
+        regression = False
+        if old_value is not None and new_value is not None:
+            if leaf in TIME_KEYS and old_value > 0:
+                regression = (new_value - old_value) / old_value > threshold
+            elif ".api_calls." in key or ".calls_per_update." in key:
+                regression = new_value > old_value
+        elif ".api_calls." in key and new_value:
+            regression = True
+        regressions += regression
+        rows.append((key, old_value, new_value, regression))
+    return rows, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Порівняння результатів бенчмарку")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимий відносний ріст часу")
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    rows, regressions = compare(base, new, args.threshold)
+    print(f"{base['meta']['revision']} -> {new['meta']['revision']}")
+    for key, old_value, new_value, regression in rows:
+        change = ""
+        if old_value and new_value is not None:
+            change = f"{(new_value - old_value) / old_value:+.1%}"
+        print(f"{'!' if regression else ' '} {key}: {old_value} -> {new_value} {change}")
+    print(f"Регресій: {regressions}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# benchmarks/datasets.py
+import random
+from datetime import datetime, timedelta
+
+############################################
+# Генератор синтетичних даних
+############################################
+# Дані узгоджені між собою: кожна заявка має sheet_row, і в таблицях
+# у цьому рядку лежить та сама заявка; прайс-лист містить ціни для всіх
+# комбінацій група/культура/валюта/форма оплати, тож автопрайс спрацьовує.
+
+CULTURES = [
+    ("Зернові", "Пшениця"),
+    ("Зернові", "Ячмінь"),
+    ("Зернові", "Кукурудза"),
+    ("Олійні", "Соняшник"),
+    ("Олійні", "Ріпак"),
+    ("Олійні", "Соя"),
+]
+LOCATIONS = [
+    ("Одеська", "Одеський", "Біляївка"),
+    ("Одеська", "Березівський", "Березівка"),
+    ("Миколаївська", "Вознесенський", "Вознесенськ"),
+    ("Херсонська", "Бериславський", "Берислав"),
+    ("Кіровоградська", "Голованівський", "Гайворон"),
+    ("Вінницька", "Тульчинський", "Тульчин"),
+]
+PAYMENTS = {
+    "uah": ["перерахунок з пдв", "перерахунок без пдв", "готівка"],
+    "dollar": ["валютний контракт", "готівка"],
+    "euro": ["валютний контракт"],
+}
+# (статус, вага)
+STATUSES = [("active", 50), ("waiting", 10), ("Agreed", 15), ("confirmed", 15), ("deleted", 10)]
+
+SHEET_WIDTH = 52
+FIRST_USER_ID = 100000
+
+
+class Dataset:
+    def __init__(self, users: dict, applications: dict, sheet_rows: list, price_rows: list):
+        self.users = users                # вміст users.json
+        self.applications = applications  # вміст applications_by_user.json
+        self.sheet_rows = sheet_rows      # рядки таблиць 1 і 2 (із заголовком)
+        self.price_rows = price_rows      # аркуш з цінами (SHEET2_NAME_2)
+
+    @property
+    def approved_ids(self):
+        return [int(uid) for uid in self.users["approved_users"]]
+
+    def button_text(self, user_id: int):
+        """Текст кнопки першої невидаленої заявки користувача (як у «Переглянути мої заявки»)."""
+        shown = [a for a in self.applications.get(str(user_id), []) if a.get("proposal_status") != "deleted"]
+        if not shown:
+            return None
+        app = shown[0]
+        suffix = " ✅" if app.get("proposal_status") == "confirmed" else ""
+        return f"1. {app['culture']} | {app['quantity']} т{suffix}"
+
+
+def _sheet_row(number: int, user_id: int, fullname: str, app: dict, manager_price: str) -> list:
+    row = [""] * SHEET_WIDTH
+    row[0] = str(number)
+    row[1] = datetime.fromisoformat(app["timestamp"]).strftime("%d.%m")
+    row[2] = "\n".join(fullname.split())
+    row[3] = app["fgh_name"]
+    row[4] = app["edrpou"]
+    row[5] = app["group"]
+    row[6] = app["culture"]
+    row[7] = f"{app['quantity']} Т"
+    row[8] = f"Область: {app['region']}\nРайон: {app['district']}\nНас. пункт: {app['city']}"
+    row[10] = app["payment_form"]
+    row[11] = {"dollar": "Долар", "euro": "Євро", "uah": "Грн"}[app["currency"]]
+    row[12] = app["price"]
+    row[13] = manager_price  # poll_manager_proposals читає manager_price з індексу 13
+    row[17] = app["phone"]
+    row[SHEET_WIDTH - 1] = str(user_id)
+    return row
+
+
+def generate_price_rows() -> list:
+    rows = [["Відстань", "Грн", "Долар", "Євро"] + [""] * 15]
+    for start in range(0, 1000, 50):
+        tariff = 100 + start
+        line = [f"{start}-{start + 50}", str(tariff), str(round(tariff / 40, 1)), str(round(tariff / 43, 1))]
+        rows.append(line + [""] * 15)
+    rows.append([""] * 19)
+
+    # Ціни по культурах – з третього рядка, колонки F.. (грн), L.. (долар), Q.. (євро)
+    for i, (group, culture) in enumerate(CULTURES):
+        base = 8000 + 500 * i
+        line = rows[2 + i]
+        line[5:10] = [group, culture, str(base), str(base - 300), str(base - 600)]
+        line[11:15] = [group, culture, str(round(base / 40)), str(round(base / 41))]
+        line[16:19] = [group, culture, str(round(base / 43))]
+    return rows
+
+
+def generate_dataset(users: int, applications: int, seed: int = 0, manager_price_share: float = 0.3,
+                     with_sheets: bool = True) -> Dataset:
+    rnd = random.Random(seed)
+    now = datetime.now()
+    statuses = [s for s, _ in STATUSES]
+    weights = [w for _, w in STATUSES]
+
+    users_data = {"approved_users": {}, "blocked_users": [], "pending_users": {}}
+    user_ids = []
+    for n in range(users):
+        uid = FIRST_USER_ID + n
+        record = {"fullname": f"Тестовий Користувач {n}", "phone": f"+38050{uid % 10_000_000:07d}"}
+        bucket = rnd.random()
+        if bucket < 0.9:
+            users_data["approved_users"][str(uid)] = record
+            user_ids.append(uid)
+        elif bucket < 0.97:
+            users_data["pending_users"][str(uid)] = record
+        else:
+            users_data["blocked_users"].append(str(uid))
+
+    apps = {}
+    sheet_rows = [[f"Колонка {c + 1}" for c in range(SHEET_WIDTH)]]
+    for number in range(1, applications + 1):
+        if not user_ids:
+            break
+        uid = rnd.choice(user_ids)
+        group, culture = rnd.choice(CULTURES)
+        region, district, city = rnd.choice(LOCATIONS)
+        currency = rnd.choice(list(PAYMENTS))
+        status = rnd.choices(statuses, weights)[0]
+        app = {
+            "fgh_name": f"ФГ Поле {number}",
+            "edrpou": f"{rnd.randrange(10_000_000, 99_999_999)}",
+            "group": group,
+            "culture": culture,
+            "quantity": str(rnd.choice([20, 50, 100, 250, 500, 1000])),
+            "region": region,
+            "district": district,
+            "city": city,
+            "extra_fields": {"vologhist": f"{rnd.randint(10, 16)}"},
+            "payment_form": rnd.choice(PAYMENTS[currency]),
+            "currency": currency,
+            "price": str(rnd.randrange(7000, 12000, 50)),
+            "phone": users_data["approved_users"][str(uid)]["phone"],
+            "timestamp": (now - timedelta(minutes=rnd.randrange(0, 60 * 24 * 30))).isoformat(),
+            "user_id": uid,
+            "chat_id": uid,
+            "proposal_status": status,
+            "sheet_row": number + 1,
+        }
+        if status in ("Agreed", "confirmed", "waiting"):
+            app["proposal"] = str(rnd.randrange(7000, 12000, 50))
+        manager_price = ""
+        if rnd.random() < manager_price_share and status != "deleted":
+            manager_price = str(rnd.randrange(7000, 12000, 50))
+        apps.setdefault(str(uid), []).append(app)
+        if with_sheets:
+            fullname = users_data["approved_users"][str(uid)]["fullname"]
+            sheet_rows.append(_sheet_row(number, uid, fullname, app, manager_price))
+
+    return Dataset(users_data, apps, sheet_rows, generate_price_rows() if with_sheets else [])
+
+
+def remap_user_ids(dataset: Dataset, user_ids) -> Dataset:
+    """
+    Віддає згенерованих схвалених користувачів (разом із заявками) під задані id –
+    наприклад, під псевдоніми з записаних апдейтів. Зайві згенеровані користувачі лишаються.
+    """
+    mapping = dict(zip(list(dataset.users["approved_users"]), (str(uid) for uid in user_ids)))
+    if len(mapping) < len(user_ids):
+        raise ValueError(f"Недостатньо згенерованих користувачів: {len(mapping)} < {len(user_ids)}")
+
+    approved = dataset.users["approved_users"]
+    dataset.users["approved_users"] = {mapping.get(uid, uid): record for uid, record in approved.items()}
+    applications = {}
+    for uid, app_list in dataset.applications.items():
+        new_uid = mapping.get(uid, uid)
+        for app in app_list:
+            app["user_id"] = app["chat_id"] = int(new_uid)
+            if dataset.sheet_rows:
+                dataset.sheet_rows[app["sheet_row"] - 1][SHEET_WIDTH - 1] = new_uid
+        applications[new_uid] = app_list
+    dataset.applications = applications
+    return dataset
@@ -0,0 +1,267 @@
+# benchmarks/fakes.py
+import time
+import json
+import asyncio
+import itertools
+from collections import Counter
+
+import requests
+from gspread.utils import a1_to_rowcol
+
+from metrics import SHEETS_CALLS, SHEETS_SECONDS
+from tracing import record_call
+from api_usage import record_api_call
+
+############################################
+# Фейковий Google Sheets
+############################################
+# Повторює ту частину API gspread, якою користується бот, і рахує запити
+# так само, як InstrumentedClient: одна операція = один HTTP-запит до API.
+# Затримка імітується time.sleep – як і справжній gspread, фейк блокує цикл подій.
+
+class FakeSheetsBackend:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.spreadsheets = {}
+
+    def call(self, operation: str):
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        seconds = time.perf_counter() - started
+        self.calls[operation] += 1
+        SHEETS_CALLS.inc(method=operation)
+        SHEETS_SECONDS.observe(seconds, method=operation)
+        record_call("sheets", operation, seconds)
+        record_api_call("sheets", operation, 200)
+
+    def add_spreadsheet(self, key: str) -> "FakeSpreadsheet":
+        spreadsheet = self.spreadsheets[key] = FakeSpreadsheet(self, key)
+        return spreadsheet
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, sheet_id: int, title: str, rows=None, cols: int = 26):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self._rows = [list(r) for r in (rows or [])]
+        self.col_count = max([cols] + [len(r) for r in self._rows])
+        self.row_count = max(1000, len(self._rows))
+        self.formats = {}  # row -> останній backgroundColor, застосований до рядка/клітинки
+
+    @property
+    def _backend(self):
+        return self.spreadsheet.backend
+
+    def _ensure(self, row: int, col: int):
+        while len(self._rows) < row:
+            self._rows.append([])
+        line = self._rows[row - 1]
+        if len(line) < col:
+            line.extend([""] * (col - len(line)))
+
+    def _set(self, row: int, col: int, value):
+        self._ensure(row, col)
+        self._rows[row - 1][col - 1] = "" if value is None else str(value)
+
+    def get_all_values(self):
+        self._backend.call("values.get")
+        width = max((len(r) for r in self._rows), default=0)
+        last = len(self._rows)
+        while last and not any(self._rows[last - 1]):
+            last -= 1
+        return [r + [""] * (width - len(r)) for r in self._rows[:last]]
+
+    def col_values(self, col: int):
+        self._backend.call("values.get")
+        values = [r[col - 1] if len(r) >= col else "" for r in self._rows]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def row_values(self, row: int):
+        self._backend.call("values.get")
+        if row > len(self._rows):
+            return []
+        values = list(self._rows[row - 1])
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def update_cell(self, row: int, col: int, value):
+        self._backend.call("values.put")
+        self._set(row, col, value)
+
+    def update_acell(self, label: str, value):
+        row, col = a1_to_rowcol(label)
+        self.update_cell(row, col, value)
+
+    def update(self, range_name, values=None, **kwargs):
+        self._backend.call("values.put")
+        start = range_name.split(":", 1)[0]
+        row, col = a1_to_rowcol(start)
+        for r_offset, line in enumerate(values or []):
+            for c_offset, value in enumerate(line):
+                self._set(row + r_offset, col + c_offset, value)
+
+    def append_row(self, values, **kwargs):
+        self._backend.call("values.append")
+        self._rows.append([str(v) for v in values])
+
+    def resize(self, rows=None, cols=None):
+        self._backend.call("batchUpdate")
+        if rows is not None:
+            self.row_count = rows
+        if cols is not None:
+            self.col_count = cols
+
+    def delete_rows(self, start_index: int, end_index: int = None):
+        self._backend.call("batchUpdate")
+        self._delete(start_index, end_index or start_index)
+
+    def _delete(self, start: int, end: int):
+        # start/end – номери рядків з 1, включно
+        del self._rows[start - 1:end]
+        shifted = {}
+        for row, fmt in self.formats.items():
+            if row < start:
+                shifted[row] = fmt
+            elif row > end:
+                shifted[row - (end - start + 1)] = fmt
+        self.formats = shifted
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend: FakeSheetsBackend, key: str):
+        self.backend = backend
+        self.id = key
+        self._worksheets = {}
+        self._ids = itertools.count(1)
+
+    def add_sheet(self, title: str, rows=None, cols: int = 26) -> FakeWorksheet:
+        """Наповнення даними без обліку запитів (для підготовки датасету)."""
+        ws = self._worksheets[title] = FakeWorksheet(self, next(self._ids), title, rows, cols)
+        return ws
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.backend.call("spreadsheets.get")
+        return self._worksheets[title]
+
+    def add_worksheet(self, title: str, rows, cols):
+        self.backend.call("batchUpdate")
+        return self.add_sheet(title, cols=int(cols))
+
+    def batch_update(self, body: dict):
+        self.backend.call("batchUpdate")
+        by_id = {ws.id: ws for ws in self._worksheets.values()}
+        for request in body.get("requests", []):
+            if "deleteDimension" in request:
+                rng = request["deleteDimension"]["range"]
+                by_id[rng["sheetId"]]._delete(rng["startIndex"] + 1, rng["endIndex"])
+            elif "repeatCell" in request:
+                rng = request["repeatCell"]["range"]
+                ws = by_id[rng["sheetId"]]
+                cell = request["repeatCell"].get("cell", {})
+                fmt = cell.get("userEnteredFormat", {})
+                clear_value = "userEnteredValue" in request["repeatCell"].get("fields", "") and "userEnteredValue" not in cell
+                for row in range(rng.get("startRowIndex", 0) + 1, rng.get("endRowIndex", 0) + 1):
+                    ws.formats[row] = fmt.get("backgroundColor")
+                    if clear_value:
+                        for col in range(rng.get("startColumnIndex", 0) + 1, rng.get("endColumnIndex", ws.col_count) + 1):
+                            if row <= len(ws._rows) and col <= len(ws._rows[row - 1]):
+                                ws._set(row, col, "")
+        return {"replies": []}
+
+
+class FakeClient:
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        self.backend.call("spreadsheets.get")
+        return self.backend.spreadsheets[key]
+
+
+############################################
+# Фейкові Geocoding / Routes API
+############################################
+
+class _FakeResponse:
+    def __init__(self, payload, status_code: int = 200):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeMapsAPI:
+    """
+    Замінює модуль requests у gsheet_utils: geocode повертає координати,
+    Routes – відстань, детерміновану за адресою (щоб кеш відстаней працював як у житті).
+    """
+    RequestException = requests.RequestException
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+
+    def _wait(self, api: str):
+        self.calls[api] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get(self, url, params=None, **kwargs):
+        self._wait("geocode")
+        seed = sum(map(ord, (params or {}).get("address", "")))
+        location = {"lat": 46 + (seed % 300) / 100, "lng": 28 + (seed % 700) / 100}
+        return _FakeResponse({"status": "OK", "results": [{"geometry": {"location": location}}]})
+
+    def post(self, url, json=None, **kwargs):
+        self._wait("routes")
+        destination = json["destinations"][0]["waypoint"]["location"]["latLng"]
+        meters = int((abs(destination["latitude"] - 46.4) + abs(destination["longitude"] - 30.7)) * 90_000)
+        return _FakeResponse([{"originIndex": 0, "destinationIndex": 0, "distanceMeters": meters}])
+
+
+############################################
+# Фейковий Telegram Bot API
+############################################
+
+class FakeTelegram:
+    """
+    Підміняє Bot.request: нічого не відправляє, записує виклики
+    і повертає мінімальні коректні відповіді Bot API.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.sent = []  # (method, chat_id, text)
+        self._message_ids = itertools.count(1)
+
+    def install(self, bot):
+        bot.request = self.request
+        return self
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        data = data or {}
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.startswith(("send", "edit", "copy", "forward")):
+            chat_id = data.get("chat_id", 0)
+            self.sent.append((method, chat_id, data.get("text")))
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id) if str(chat_id).lstrip("-").isdigit() else 0, "type": "private"},
+                "text": data.get("text", ""),
+            }
+        return True
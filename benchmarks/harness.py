@@ -0,0 +1,163 @@
+# benchmarks/harness.py
+import os
+import sys
+import json
+import time
+import asyncio
+import importlib
+import itertools
+
+############################################
+# Запуск бота проти фейкових Telegram / Sheets / Maps
+############################################
+# config.py читає змінні оточення під час імпорту, тож prepare_environment()
+# треба викликати ДО першого імпорту будь-якого модуля бота.
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_ID = 1
+SPREADSHEET_ID = "bench-spreadsheet-1"
+SPREADSHEET_ID2 = "bench-spreadsheet-2"
+
+
+def prepare_environment(data_dir: str, log_level: str = "WARNING"):
+    os.makedirs(data_dir, exist_ok=True)
+    os.environ.update({
+        "TELEGRAM_TOKEN": "123456:BENCHMARK",
+        "GSPREAD_CREDENTIALS_JSON": "{}",
+        "DATA_DIR": data_dir,
+        "ADMINS": str(ADMIN_ID),
+        "GOOGLE_SPREADSHEET_ID": SPREADSHEET_ID,
+        "GOOGLE_SPREADSHEET_ID2": SPREADSHEET_ID2,
+        "GOOGLE_MAPS_API_KEY": "benchmark",
+        "SEPARATE_WORKER": "0",
+        "INSTANCE_ID": "benchmark",
+        "LOG_LEVEL": log_level,
+        "LOG_FORMAT": "text",
+    })
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    importlib.import_module("config")
+
+
+class BenchmarkEnv:
+    """
+    Завантажені модулі бота з підміненими зовнішніми сервісами.
+    Доступ до фейків: env.telegram, env.sheets, env.maps.
+    """
+
+    def __init__(self, dataset, sheets_latency: float = 0.0, telegram_latency: float = 0.0, maps_latency: float = 0.0):
+        from benchmarks.fakes import FakeSheetsBackend, FakeClient, FakeTelegram, FakeMapsAPI
+
+        self.bot_module = importlib.import_module("bot")
+        self.bot_module.register_handlers()
+        self.user_handlers = importlib.import_module("user_handlers")
+        self.gsheet_utils = importlib.import_module("gsheet_utils")
+        self.db = importlib.import_module("db")
+        self.config = importlib.import_module("config")
+        loader = importlib.import_module("loader")
+        self.bot, self.dp = loader.bot, loader.dp
+
+        self.sheets = FakeSheetsBackend(sheets_latency)
+        book1 = self.sheets.add_spreadsheet(SPREADSHEET_ID)
+        book2 = self.sheets.add_spreadsheet(SPREADSHEET_ID2)
+        self.ws1 = book1.add_sheet(self.config.SHEET1_NAME, dataset.sheet_rows)
+        self.ws2 = book2.add_sheet(self.config.SHEET2_NAME, dataset.sheet_rows)
+        self.ws_prices = book2.add_sheet(self.config.SHEET2_NAME_2, dataset.price_rows)
+        client = FakeClient(self.sheets)
+        self.gsheet_utils.init_gspread = lambda: client
+        # Кеші таблиць і sheetId прив'язані до клієнта
+        self.gsheet_utils._spreadsheets.clear()
+        self.gsheet_utils._sheet_ids.clear()
+
+        self.maps = FakeMapsAPI(maps_latency)
+        self.gsheet_utils.requests = self.maps
+
+        self.telegram = FakeTelegram(telegram_latency).install(self.bot)
+        self.bot.set_current(self.bot)
+        self.dp.set_current(self.dp)
+
+        self.db.save_users(dataset.users)
+        self.db.save_applications(dataset.applications)
+        self.dataset = dataset
+        self._update_ids = itertools.count(1)
+        self._task_traces = {}
+        importlib.import_module("tracing").add_trace_listener(self._on_trace)
+
+    def _on_trace(self, trace):
+        self._task_traces[asyncio.current_task()] = trace
+
+    def message_update(self, user_id: int, text: str) -> dict:
+        update_id = next(self._update_ids)
+        user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": user,
+                "text": text,
+                **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+                   if text.startswith("/") else {}),
+            },
+        }
+
+    async def process(self, update: dict):
+        """
+        Обробляє апдейт в окремій задачі через updates_handler, як executor: StateFilter кешує стан
+        у contextvar, і без нового контексту наступний апдейт побачив би старий стан.
+        Повертає tracing.UpdateTrace апдейту (None, якщо трасу не відкрито).
+        """
+        from aiogram import types
+        task = asyncio.create_task(self.dp.updates_handler.notify(types.Update(**update)))
+        await task
+        return self._task_traces.pop(task, None)
+
+    def api_calls(self) -> dict:
+        return {
+            "sheets": dict(sorted(self.sheets.calls.items())),
+            "telegram": dict(sorted(self.telegram.calls.items())),
+            "maps": dict(sorted(self.maps.calls.items())),
+        }
+
+    def reset_api_calls(self):
+        self.sheets.calls.clear()
+        self.telegram.calls.clear()
+        self.maps.calls.clear()
+
+
+def percentiles(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+
+    def pick(q):
+        return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 5),
+        "p50": round(pick(0.5), 5),
+        "p95": round(pick(0.95), 5),
+        "p99": round(pick(0.99), 5),
+        "max": round(values[-1], 5),
+    }
+
+
+def git_revision() -> str:
+    try:
+        import subprocess
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def write_results(results: dict, output: str = None):
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
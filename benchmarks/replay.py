@@ -0,0 +1,163 @@
+# benchmarks/replay.py
+"""
+Програвання записаних апдейтів (RECORD_UPDATES_FILE) проти фейкових Telegram/Sheets.
+
+    python -m benchmarks.replay updates.jsonl --speed 10 --output replay.json
+    python -m benchmarks.replay updates.jsonl --speed 0          # без пауз, максимальне навантаження
+
+Апдейти одного користувача обробляються строго по черзі (як у Telegram),
+різні користувачі – паралельно; --speed стискає інтервали між апдейтами.
+Звіт: наскрізна затримка (від «надходження» апдейту до кінця обробки, включно
+з очікуванням у черзі користувача) і час обробки по хендлерах, виклики API,
+а також перевірка сховища: втрачені записи, застарілі та зайві save, дублікати заявок.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import platform
+from collections import defaultdict
+
+from benchmarks.harness import prepare_environment, percentiles, git_revision, write_results
+
+
+def read_recording(path: str, limit: int = None):
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entries.append(json.loads(line))
+            if limit and len(entries) >= limit:
+                break
+    entries.sort(key=lambda e: e["t"])
+    return entries
+
+
+def update_user_id(update: dict):
+    for key in ("message", "edited_message", "callback_query"):
+        if key in update and "from" in update[key]:
+            return update[key]["from"]["id"]
+    return None
+
+
+async def replay(env, entries, speed: float) -> dict:
+    queues = {}
+    results = defaultdict(lambda: {"e2e": [], "processing": []})
+    lag = []
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def user_worker(queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            arrived, update = item
+            trace = await env.process(update)
+            handler = trace.handler if trace is not None else "-"
+            results[handler]["e2e"].append(loop.time() - arrived)
+            if trace is not None:
+                results[handler]["processing"].append(trace.elapsed)
+
+    workers = []
+    base_t = entries[0]["t"] if entries else 0
+    for entry in entries:
+        if speed > 0:
+            due = started + (entry["t"] - base_t) / speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag.append(max(loop.time() - due, 0.0))
+        user_id = update_user_id(entry["update"])
+        queue = queues.get(user_id)
+        if queue is None:
+            queue = queues[user_id] = asyncio.Queue()
+            workers.append(asyncio.create_task(user_worker(queue)))
+        queue.put_nowait((loop.time(), entry["update"]))
+
+    for queue in queues.values():
+        queue.put_nowait(None)
+    await asyncio.gather(*workers)
+    elapsed = loop.time() - started
+    total = sum(len(r["e2e"]) for r in results.values())
+
+    return {
+        "updates": total,
+        "users": len(queues),
+        "seconds": round(elapsed, 4),
+        "updates_per_second": round(total / elapsed, 2) if elapsed else None,
+        "dispatch_lag": percentiles(lag),
+        "per_handler": {
+            handler: {"e2e": percentiles(r["e2e"]), "processing": percentiles(r["processing"])}
+            for handler, r in sorted(results.items())
+        },
+    }
+
+
+async def main(args) -> dict:
+    import db
+    from benchmarks.datasets import generate_dataset, remap_user_ids
+    from benchmarks.harness import BenchmarkEnv
+    from benchmarks.store_audit import StoreAudit
+
+    entries = read_recording(args.recording, args.limit)
+    user_ids = sorted({uid for uid in (update_user_id(e["update"]) for e in entries) if uid is not None})
+    # ~90% згенерованих користувачів схвалені, тож беремо із запасом
+    dataset = generate_dataset(
+        users=int(len(user_ids) / 0.85) + 10,
+        applications=max(len(user_ids) * args.applications_per_user, 1),
+        seed=args.seed,
+    )
+    remap_user_ids(dataset, user_ids)
+    env = BenchmarkEnv(
+        dataset,
+        sheets_latency=args.sheets_latency,
+        telegram_latency=args.telegram_latency,
+        maps_latency=args.maps_latency,
+    )
+
+    audit = StoreAudit()
+    audit.seed("applications", dataset.applications)
+    audit.seed("users", dataset.users)
+    db.add_store_listener(audit.on_store)
+    env.reset_api_calls()
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": vars(args),
+        },
+        "replay": await replay(env, entries, args.speed),
+        "api_calls": env.api_calls(),
+    }
+    results["store"] = audit.report(db.load_applications())
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Програвання записаних апдейтів")
+    parser.add_argument("recording", help="JSONL, записаний через RECORD_UPDATES_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="Множник швидкості; 0 – без пауз")
+    parser.add_argument("--limit", type=int, default=None, help="Програти лише перші N апдейтів")
+    parser.add_argument("--applications-per-user", type=int, default=5)
+    parser.add_argument("--sheets-latency", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--maps-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    prepare_environment(args.data_dir or tempfile.mkdtemp(prefix="bot-replay-"), args.log_level)
+    write_results(asyncio.run(main(args)), args.output)
+    sys.exit(0)
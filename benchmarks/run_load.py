@@ -0,0 +1,163 @@
+# benchmarks/run_load.py
+"""
+Синтетичне навантаження на бота без живих Telegram / Google API.
+
+    python -m benchmarks.run_load --users 200 --applications 2000 --rounds 3 \
+        --sheets-latency 0.05 --output bench.json
+
+Результат (JSON): пропускна здатність хендлерів, перцентилі часу по хендлерах,
+тривалість циклів фонових задач і кількість викликів API. Два файли
+порівнюються через benchmarks.compare.
+"""
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import platform
+from collections import defaultdict
+
+from benchmarks.harness import prepare_environment, ADMIN_ID, percentiles, git_revision, write_results
+
+USER_SCRIPT = ["/start", "/menu", "Переглянути мої заявки", "{button}", "Назад", "/menu"]
+ADMIN_SCRIPT = ["/admin", "Заявки", "Підтверджені", "/admin", "Заявки", "Видалені", "/admin", "Модерація", "База користувачів"]
+
+
+def build_scripts(env, users: int):
+    scripts = []
+    for user_id in env.dataset.approved_ids[:users]:
+        button = env.dataset.button_text(user_id)
+        steps = [s.format(button=button) for s in USER_SCRIPT if button or s != "{button}"]
+        scripts.append((user_id, steps))
+    scripts.append((ADMIN_ID, list(ADMIN_SCRIPT)))
+    return scripts
+
+
+async def run_handlers(env, scripts, rounds: int, concurrency: int) -> dict:
+    """
+    Кожен користувач проходить свій сценарій послідовно (як у Telegram),
+    різні користувачі – паралельно, не більше concurrency одночасно.
+    """
+    from tracing import add_trace_listener
+
+    latencies = defaultdict(list)
+    calls = defaultdict(lambda: defaultdict(int))
+
+    def on_trace(trace):
+        latencies[trace.handler].append(trace.elapsed)
+        for (category, op), (count, _) in trace.calls.items():
+            calls[trace.handler][f"{category}:{op}"] += count
+
+    add_trace_listener(on_trace)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_user(user_id, steps):
+        async with semaphore:
+            for text in steps:
+                await env.process(env.message_update(user_id, text))
+
+    env.reset_api_calls()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(run_user(user_id, steps) for user_id, steps in scripts))
+    elapsed = time.perf_counter() - started
+    total = sum(len(v) for v in latencies.values())
+
+    return {
+        "updates": total,
+        "seconds": round(elapsed, 4),
+        "updates_per_second": round(total / elapsed, 2) if elapsed else None,
+        "per_handler": {
+            handler: {**percentiles(values), "calls_per_update": {
+                op: round(count / len(values), 2) for op, count in sorted(calls[handler].items())
+            }}
+            for handler, values in sorted(latencies.items())
+        },
+        "api_calls": env.api_calls(),
+    }
+
+
+async def run_poll_cycles(env, poller_name: str, cycles: int) -> dict:
+    """
+    Фонові задачі – нескінченні цикли, тож запускаємо задачу, чекаємо
+    завершення одного циклу (timing.poll_cycle) і скасовуємо її.
+    """
+    from timing import percentile_report
+
+    poller = getattr(env.bot_module, poller_name)
+    timing_name = {"poll_manager_proposals": "manager_proposals", "poll_topicality_notifications": "topicality"}[poller_name]
+
+    def done_cycles():
+        return percentile_report(timing_name).get(timing_name, {}).get("total", {}).get("count", 0)
+
+    env.reset_api_calls()
+    started = time.perf_counter()
+    for _ in range(cycles):
+        before = done_cycles()
+        task = asyncio.create_task(poller())
+        while done_cycles() == before and not task.done():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    elapsed = time.perf_counter() - started
+
+    return {
+        "cycles": cycles,
+        "seconds": round(elapsed, 4),
+        "phases": percentile_report(timing_name).get(timing_name, {}),
+        "api_calls": env.api_calls(),
+    }
+
+
+async def main(args) -> dict:
+    from benchmarks.datasets import generate_dataset
+    from benchmarks.harness import BenchmarkEnv
+
+    dataset = generate_dataset(args.users, args.applications, seed=args.seed)
+    env = BenchmarkEnv(
+        dataset,
+        sheets_latency=args.sheets_latency,
+        telegram_latency=args.telegram_latency,
+        maps_latency=args.maps_latency,
+    )
+    scripts = build_scripts(env, args.users)
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": vars(args),
+        },
+        "handlers": await run_handlers(env, scripts, args.rounds, args.concurrency),
+        "poll_manager_proposals": await run_poll_cycles(env, "poll_manager_proposals", args.poll_cycles),
+        "poll_topicality_notifications": await run_poll_cycles(env, "poll_topicality_notifications", args.poll_cycles),
+    }
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетичний бенчмарк бота")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--applications", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=1, help="Скільки разів кожен користувач проходить сценарій")
+    parser.add_argument("--concurrency", type=int, default=20, help="Одночасно активних користувачів")
+    parser.add_argument("--poll-cycles", type=int, default=3)
+    parser.add_argument("--sheets-latency", type=float, default=0.0, help="Затримка одного запиту до Sheets, с")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="Затримка одного запиту до Bot API, с")
+    parser.add_argument("--maps-latency", type=float, default=0.0, help="Затримка одного запиту до Maps, с")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None, help="Каталог для файлів даних (за замовчуванням тимчасовий)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", default=None, help="Файл для JSON (за замовчуванням stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    prepare_environment(args.data_dir or tempfile.mkdtemp(prefix="bot-bench-"), args.log_level)
+    write_results(asyncio.run(main(args)), args.output)
+    sys.exit(0)
@@ -0,0 +1,136 @@
+# benchmarks/store_audit.py
+import json
+import contextvars
+from collections import deque, Counter
+
+############################################
+# Перевірка втрачених / дубльованих записів у сховище
+############################################
+# Патерн db.py – «прочитати весь файл, змінити, записати весь файл». Якщо між
+# load і save хендлер робить await, інший апдейт може встигнути зберегти свої
+# зміни, і наш save їх затре. Аудитор веде версію кожного файлу, запам'ятовує,
+# яку версію прочитав кожен апдейт (contextvar – на задачу), і на save
+# порівнює: поля, які змінив хтось інший і які наш save повернув до старого
+# значення, – втрачені записи.
+
+def _dump(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def flatten_applications(apps: dict) -> dict:
+    flat = {}
+    for uid, app_list in apps.items():
+        seen = Counter()
+        for app in app_list:
+            # Ідентичність заявки – timestamp (стабільний при видаленні сусідніх заявок)
+            identity = app.get("timestamp", "")
+            seen[identity] += 1
+            if seen[identity] > 1:
+                identity = f"{identity}#{seen[identity]}"
+            for key, value in app.items():
+                flat[(uid, identity, key)] = _dump(value)
+    return flat
+
+
+def flatten_users(users: dict) -> dict:
+    flat = {}
+    for section, content in users.items():
+        if isinstance(content, dict):
+            for uid, record in content.items():
+                flat[(section, uid)] = _dump(record)
+        else:
+            for uid in content:
+                flat[(section, uid)] = "1"
+    return flat
+
+
+FLATTENERS = {"applications": flatten_applications, "users": flatten_users}
+
+
+class StoreAudit:
+    def __init__(self, history: int = 200):
+        self.versions = {store: 0 for store in FLATTENERS}
+        self.snapshots = {store: deque(maxlen=history) for store in FLATTENERS}
+        self._reads = contextvars.ContextVar("store_audit_reads", default=None)
+        self.saves = Counter()
+        self.stale_saves = Counter()
+        self.redundant_saves = Counter()
+        self.unverifiable = Counter()  # Прочитана версія вже випала з історії
+        self.lost_writes = []
+
+    def seed(self, store: str, data):
+        self.snapshots[store].append((self.versions[store], FLATTENERS[store](data)))
+
+    def _snapshot(self, store: str, version: int):
+        for v, flat in self.snapshots[store]:
+            if v == version:
+                return flat
+        return None
+
+    def _remember_read(self, store: str, version: int):
+        reads = dict(self._reads.get() or {})
+        reads[store] = version
+        self._reads.set(reads)
+
+    def on_store(self, op: str, data):
+        """Слухач для db.add_store_listener."""
+        store = "applications" if op.endswith("applications") else "users"
+        if op.startswith("load"):
+            self._remember_read(store, self.versions[store])
+            return
+
+        flat = FLATTENERS[store](data)
+        current_version = self.versions[store]
+        current = self._snapshot(store, current_version)
+        self.saves[store] += 1
+        if current is not None and flat == current:
+            self.redundant_saves[store] += 1
+
+        read_version = (self._reads.get() or {}).get(store)
+        if read_version is not None and read_version < current_version:
+            self.stale_saves[store] += 1
+            base = self._snapshot(store, read_version)
+            if base is None or current is None:
+                self.unverifiable[store] += 1
+            else:
+                changed_by_others = {p for p in base.keys() | current.keys() if base.get(p) != current.get(p)}
+                for path in changed_by_others:
+                    if flat.get(path) == base.get(path):
+                        self.lost_writes.append({
+                            "store": store,
+                            "path": list(path),
+                            "lost_value": current.get(path),
+                            "written_value": flat.get(path),
+                            "read_version": read_version,
+                            "overwritten_version": current_version,
+                        })
+
+        self.versions[store] = current_version + 1
+        self.snapshots[store].append((current_version + 1, flat))
+        self._remember_read(store, current_version + 1)
+
+    def report(self, final_applications: dict = None, sample: int = 20) -> dict:
+        result = {
+            "saves": dict(self.saves),
+            "stale_saves": dict(self.stale_saves),
+            "redundant_saves": dict(self.redundant_saves),
+            "unverifiable_stale_saves": dict(self.unverifiable),
+            "lost_writes": len(self.lost_writes),
+            "lost_writes_sample": self.lost_writes[:sample],
+        }
+        if final_applications is not None:
+            result["duplicate_applications"] = find_duplicate_applications(final_applications)
+        return result
+
+
+def find_duplicate_applications(apps: dict) -> int:
+    """Заявки одного користувача з однаковим вмістом (без урахування timestamp)."""
+    duplicates = 0
+    for app_list in apps.values():
+        seen = set()
+        for app in app_list:
+            key = _dump({k: v for k, v in app.items() if k != "timestamp"})
+            if key in seen:
+                duplicates += 1
+            seen.add(key)
+    return duplicates
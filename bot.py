@@ -1,10 +1,17 @@
 # bot.py
+# Першим: рахує час імпорту всіх наступних модулів (звіт – startup_report)
+from startup import startup_phase, startup_report, mark_ready
+
+import json
+import hmac
 import asyncio
 import logging
+from functools import partial
 from aiohttp import web
 from aiogram import executor
 
 import os
+import sys
 PORT = int(os.environ.get("PORT", 8080))
 
 from datetime import datetime, timedelta
@@ -14,26 +21,39 @@ from keyboards import get_topicality_keyboard
 from auto_calc import load_auto_calc_setting, save_auto_calc_setting
 
 from loader import bot, dp
-from config import CHECK_INTERVAL, API_PORT, TOPICALITY_SECONDS
-from db import load_applications, save_applications
+from leader import run_as_leader, release_lease
+from locks import sheet_rows_lock
+from outbox import notify, drain_outbox
+from publisher import publish_applications
+from timing import poll_cycle, span, percentile_report
+from tracing import monitor_loop_lag
+from api_usage import usage_report, run_usage_flusher, flush_usage
+from health import health_routes, handle_metrics, start_health_server
+from config import (
+    API_PORT, API_USAGE_TOKEN, TOPICALITY_SECONDS, SEPARATE_WORKER, WORKER_HEALTH_PORT, PURGE_RETRY_SECONDS
+)
+from poll_schedule import AdaptivePollInterval
+from db import (
+    load_applications, save_applications, store_lock, load_pending_purge, application_row_span,
+    get_application_records_by_row
+)
+from models import ApplicationRecord, ApplicationStatus, parse_number
 from gsheet_utils import (
     get_worksheet1, color_cell_red, color_cell_green, color_cell_yellow,
-    parse_price_sheet, calculate_and_set_bot_price, get_worksheet2, rowcol_to_a1, color_entire_row_red
+    parse_price_sheet, calculate_and_set_bot_price, get_worksheet2, rowcol_to_a1, color_entire_row_red,
+    preload_google_clients
 )
-from admin_handlers import admin_remove_app_permanently
-# Імпортуємо хендлери (вони тепер імпортують bot/dispatcher з loader.py)
-import admin_handlers
-import user_handlers
 
-POLLING_PAUSED = False
 
-def pause_polling():
-    global POLLING_PAUSED
-    POLLING_PAUSED = True
+def register_handlers():
+    """
+    Імпорт модулів хендлерів реєструє їх у dp (loader.py).
+    Потрібно лише процесу бота – воркер їх не імпортує.
+    """
+    with startup_phase("handlers"):
+        import admin_handlers
+        import user_handlers
 
-def resume_polling():
-    global POLLING_PAUSED
-    POLLING_PAUSED = False
 
 async def poll_topicality_notifications():
     """
@@ -44,86 +64,128 @@ async def poll_topicality_notifications():
     - Якщо така заявка знайдена, вона позначається як "topicality_in_progress": True і надсилається сповіщення.
     """
     while True:
-        apps = load_applications()
-        now = datetime.now()
-        # Для кожного користувача
-        for uid, app_list in apps.items():
-            # Якщо вже є заявка з "topicality_in_progress" = True – пропускаємо
-            if any(app.get("topicality_in_progress") for app in app_list):
-                continue
-
-            # Знаходимо заявку, яка ще не була надіслана (topicality_notification_sent != True) 
-            # та старша за заданий час (TOPICALITY_SECONDS)
-            pending_app = None
-            pending_index = None
-            for idx, app in enumerate(app_list):
-                if app.get("proposal_status", "active") not in ("active", "waiting"):
-                    continue  # опрацьовуємо тільки активні/waiting заявки
-                try:
-                    submission_time = datetime.fromisoformat(app["timestamp"])
-                except Exception:
+        with poll_cycle("topicality"):
+            await _topicality_cycle()
+        await asyncio.sleep(60)  # перевіряти кожну хвилину
+
+
+async def _topicality_cycle():
+    # Рядків таблиці цикл не торкається – sheet_rows_lock не потрібен.
+    # Файл змінюємо під store_lock() (без await усередині), сповіщення – вже після запису.
+    messages = []
+    with span("scan") as scan:
+        with store_lock():
+            apps = load_applications()
+            now = datetime.now()
+            # Для кожного користувача
+            for uid, app_list in apps.items():
+                scan.add_items(len(app_list))
+                # Якщо вже є заявка з "topicality_in_progress" = True – пропускаємо
+                if any(app.get("topicality_in_progress") for app in app_list):
                     continue
-                if now - submission_time >= timedelta(seconds=TOPICALITY_SECONDS) and not app.get("topicality_notification_sent", False):
-                    pending_app = app
-                    pending_index = idx
-                    break  # беремо першу таку заявку
-
-            if pending_app is not None:
-                # Позначаємо, що для цієї заявки сповіщення зараз в процесі
-                apps[uid][pending_index]["topicality_notification_sent"] = True
-                apps[uid][pending_index]["topicality_in_progress"] = True
-                msg_text = (
-                    f"Ваша заявка {pending_index+1}. {pending_app.get('culture', 'Невідомо')} | "
-                    f"{pending_app.get('quantity', 'Невідомо')} т актуальна, чи потребує змін або видалення?"
-                )
-                try:
-                    await bot.send_message(
-                        pending_app.get("chat_id"),
-                        msg_text,
-                        reply_markup=get_topicality_keyboard()
+
+                # Знаходимо заявку, яка ще не була надіслана (topicality_notification_sent != True) 
+                # та старша за заданий час (TOPICALITY_SECONDS)
+                pending_app = None
+                pending_index = None
+                for idx, app in enumerate(app_list):
+                    if app.get("proposal_status", "active") not in ("active", "waiting"):
+                        continue  # опрацьовуємо тільки активні/waiting заявки
+                    try:
+                        submission_time = datetime.fromisoformat(app["timestamp"])
+                    except Exception:
+                        continue
+                    if now - submission_time >= timedelta(seconds=TOPICALITY_SECONDS) and not app.get("topicality_notification_sent", False):
+                        pending_app = app
+                        pending_index = idx
+                        break  # беремо першу таку заявку
+
+                if pending_app is not None:
+                    # Позначаємо, що для цієї заявки сповіщення зараз в процесі
+                    apps[uid][pending_index]["topicality_notification_sent"] = True
+                    apps[uid][pending_index]["topicality_in_progress"] = True
+                    msg_text = (
+                        f"Ваша заявка {pending_index+1}. {pending_app.get('culture', 'Невідомо')} | "
+                        f"{pending_app.get('quantity', 'Невідомо')} т актуальна, чи потребує змін або видалення?"
                     )
-                except Exception as e:
-                    logging.exception(f"Помилка надсилання topicality сповіщення для uid={uid}: {e}")
-        save_applications(apps)
-        await asyncio.sleep(60)  # перевіряти кожну хвилину
+                    messages.append((uid, pending_app.get("chat_id"), msg_text))
+            save_applications(apps)
+
+    for uid, chat_id, msg_text in messages:
+        try:
+            await notify(chat_id, msg_text, reply_markup=get_topicality_keyboard())
+        except Exception as e:
+            logging.exception(f"Помилка надсилання topicality сповіщення для uid={uid}: {e}")
 
 
 async def schedule_next_topicality(user_id: int):
     logging.info(f"[TOPICALITY] Планується перевірка наступної заявки для користувача {user_id} через 10 секунд")
     await asyncio.sleep(10)
-    apps = load_applications()
-    uid = str(user_id)
-    if uid in apps:
-        user_apps = apps[uid]
-        if not user_apps:
-            logging.info(f"[TOPICALITY] Користувач {user_id} не має жодної заявки")
-            return
-        if not any(app.get("topicality_in_progress") for app in user_apps):
-            for idx, app in enumerate(user_apps):
-                try:
-                    submission_time = datetime.fromisoformat(app["timestamp"])
-                except Exception as e:
-                    logging.exception(f"[TOPICALITY] Помилка перетворення timestamp для заявки {idx} користувача {user_id}: {e}")
-                    continue
-                if app.get("proposal_status", "active") in ("active", "waiting") and not app.get("topicality_notification_sent", False):
-                    if datetime.now() - submission_time >= timedelta(seconds=TOPICALITY_SECONDS):
-                        app["topicality_notification_sent"] = True
-                        app["topicality_in_progress"] = True
-                        msg_text = (
-                            f"Ваша заявка {idx+1}. {app.get('culture', 'Невідомо')} | "
-                            f"{app.get('quantity', 'Невідомо')} т актуальна, чи потребує змін або видалення?"
-                        )
-                        try:
-                            await bot.send_message(app.get("chat_id"), msg_text, reply_markup=get_topicality_keyboard())
-                            logging.info(f"[TOPICALITY] Надіслано сповіщення для заявки {idx+1} користувача {user_id}")
-                        except Exception as e:
-                            logging.exception(f"[TOPICALITY] Помилка надсилання сповіщення для користувача {user_id}: {e}")
-                        break
-    save_applications(apps)
+    with store_lock():
+        apps = load_applications()
+        uid = str(user_id)
+        pending = None
+        if uid in apps:
+            user_apps = apps[uid]
+            if not user_apps:
+                logging.info(f"[TOPICALITY] Користувач {user_id} не має жодної заявки")
+                return
+            if not any(app.get("topicality_in_progress") for app in user_apps):
+                for idx, app in enumerate(user_apps):
+                    try:
+                        submission_time = datetime.fromisoformat(app["timestamp"])
+                    except Exception as e:
+                        logging.exception(f"[TOPICALITY] Помилка перетворення timestamp для заявки {idx} користувача {user_id}: {e}")
+                        continue
+                    if app.get("proposal_status", "active") in ("active", "waiting") and not app.get("topicality_notification_sent", False):
+                        if datetime.now() - submission_time >= timedelta(seconds=TOPICALITY_SECONDS):
+                            app["topicality_notification_sent"] = True
+                            app["topicality_in_progress"] = True
+                            pending = (idx, app)
+                            break
+        save_applications(apps)
+
+    if pending is not None:
+        idx, app = pending
+        msg_text = (
+            f"Ваша заявка {idx+1}. {app.get('culture', 'Невідомо')} | "
+            f"{app.get('quantity', 'Невідомо')} т актуальна, чи потребує змін або видалення?"
+        )
+        try:
+            await bot.send_message(app.get("chat_id"), msg_text, reply_markup=get_topicality_keyboard())
+            logging.info(f"[TOPICALITY] Надіслано сповіщення для заявки {idx+1} користувача {user_id}")
+        except Exception as e:
+            logging.exception(f"[TOPICALITY] Помилка надсилання сповіщення для користувача {user_id}: {e}")
         
         
 ########################################################
 # Фонова перевірка manager_price + bot_price
+def _needs_bot_price(app: dict) -> bool:
+    """Заявка в таблиці без менеджерської ціни, для якої ботова ціна ще не рахувалась."""
+    if app.get("proposal_status", "active") in ("deleted", "confirmed", "Agreed"):
+        return False
+    if app.get("original_manager_price", "").strip() or "bot_price" in app:
+        return False
+    return bool(app.get("sheet_row"))
+
+
+def _proposal_outdated(record, new_price: float) -> bool:
+    """Менеджер указав у таблиці ціну, якої ще немає в пропозиції активної заявки."""
+    if record.status in (ApplicationStatus.DELETED, ApplicationStatus.CONFIRMED):
+        return False
+    previous_price = record.proposal_value if record.get("proposal") else None
+    return previous_price is None or previous_price != new_price
+
+
+async def _send_proposals(messages):
+    from aiogram.utils.exceptions import BotBlocked
+    for chat_id, msg in messages:
+        try:
+            await notify(chat_id, msg)
+        except BotBlocked:
+            pass
+
+
 ########################################################
 # Приклад:
 async def poll_manager_proposals():
@@ -131,131 +193,169 @@ async def poll_manager_proposals():
     Фонове завдання:
       1) Перевіряє зміни у manager_price та розсилку нових пропозицій.
       2) Розраховує автоматичну (ботову) ціну для заявок.
-      Дані прайс-листа (SHEET2_NAME_2) оновлюються кожні 60 секунд.
+      Дані прайс-листа (SHEET2_NAME_2) оновлюються кожного циклу.
+      Пауза між циклами адаптивна (AdaptivePollInterval): коротша, поки
+      з'являються нові ціни чи заявки, і довша, коли таблиця простоює.
     """
-    from aiogram.utils.exceptions import BotBlocked
+    interval = AdaptivePollInterval()
+    last_row_count = None
     while True:
-        if POLLING_PAUSED:
-            await asyncio.sleep(3)
-            continue
-        try:
-            # Оновлюємо конфігурацію прайс-листа з SHEET2_NAME_2 кожного циклу
-            price_config = parse_price_sheet()
-
-            # 1) Обробка змін manager_price
-            ws = get_worksheet1()
-            rows = ws.get_all_values()
-            apps = load_applications()
-            for i, row in enumerate(rows[1:], start=2):
-                if len(row) < 15:
-                    continue
-                current_manager_price_str = row[13].strip()
-                if not current_manager_price_str:
-                    continue
-
-                # Перетворюємо менеджерську ціну на число
-                try:
-                    new_price = float(current_manager_price_str)
-                except ValueError:
-                    continue
+        activity = 0
+        with poll_cycle("manager_proposals") as cycle:
+            try:
+                # Оновлюємо конфігурацію прайс-листа з SHEET2_NAME_2 кожного циклу
+                # (окремий аркуш – розкладки рядків заявок не стосується)
+                with span("price_sheet"):
+                    price_config = parse_price_sheet()
+
+                # 1) Обробка змін manager_price
+                # Лок – від читання рядків до запису змін у файл: рядки не зсунуться
+                # між читанням таблиці і зіставленням із sheet_row. Сповіщення – вже без локу.
+                messages = []
+                async with sheet_rows_lock.reader():
+                    with span("sheet_read"):
+                        ws = get_worksheet1()
+                        rows = ws.get_all_values()
+
+                    with span("reconcile") as reconcile:
+                        reconcile.add_items(max(len(rows) - 1, 0))
+                        # Нові рядки у таблиці = нові заявки
+                        if last_row_count is not None and len(rows) != last_row_count:
+                            activity += 1
+                        last_row_count = len(rows)
+                        # Записи заявок – з індексу db (розібрані один раз на зміну заявки);
+                        # під локом рядків sheet_row у них відповідають щойно прочитаним рядкам
+                        records_by_row = get_application_records_by_row()
+                        changes = []  # (user_id, індекс заявки, timestamp, нова ціна)
+                        for i, row in enumerate(rows[1:], start=2):
+                            if len(row) < 15:
+                                continue
+                            located = records_by_row.get(i)
+                            if not located:
+                                continue
+                            current_manager_price_str = row[13].strip()
+                            if not current_manager_price_str:
+                                continue
 
-                for uid, app_list in apps.items():
-                    for idx, app in enumerate(app_list):
-                        if app.get("sheet_row") == i:
-                            status = app.get("proposal_status", "active")
-                            if status in ("deleted", "confirmed"):
+                            # Перетворюємо менеджерську ціну на число
+                            new_price = parse_number(current_manager_price_str)
+                            if new_price is None:
                                 continue
 
-                            previous_proposal = app.get("proposal")
-                            try:
-                                previous_price = float(previous_proposal) if previous_proposal else None
-                            except ValueError:
-                                previous_price = None
-
-                            # Обчислюємо номер заявки для користувача (лічимо лише ті заявки, що не видалені)
-                            display_number = sum(1 for a in app_list[:idx+1] if a.get("proposal_status", "active") != "deleted")
-
-                            if previous_price is None or previous_price != new_price:
-                                app["original_manager_price"] = (str(previous_price) if previous_price is not None else "")
-                                app["proposal"] = current_manager_price_str
-                                app["proposal_status"] = "Agreed"
-                                culture = app.get("culture", "Невідомо")
-                                quantity = app.get("quantity", "Невідомо")
-                                if previous_price is None:
+                            for (uid, idx), record in located:
+                                if _proposal_outdated(record, new_price):
+                                    changes.append((uid, idx, record.get("timestamp", ""), current_manager_price_str))
+
+                        # Файл заявок читаємо й пишемо лише тоді, коли ціна справді змінилась
+                        if changes:
+                            with store_lock():
+                                apps = load_applications()
+                                for uid, idx, timestamp, current_manager_price_str in changes:
+                                    app_list = apps.get(uid, [])
+                                    if not (idx < len(app_list) and app_list[idx].get("timestamp", "") == timestamp):
+                                        continue
+                                    # Заявку могли змінити після оновлення набору – перевіряємо ще раз за файлом
+                                    record = ApplicationRecord.from_dict(app_list[idx])
+                                    if not _proposal_outdated(record, parse_number(current_manager_price_str)):
+                                        continue
+                                    status = record.status
+                                    previous_proposal = record.get("proposal")
+                                    previous_price = record.proposal_value if previous_proposal else None
+
+                                    activity += 1
+                                    # Обчислюємо номер заявки для користувача (лічимо лише ті заявки, що не видалені)
+                                    display_number = sum(1 for a in app_list[:idx+1] if a.get("proposal_status", "active") != "deleted")
+                                    record.set("original_manager_price", str(previous_price) if previous_price is not None else "")
+                                    record.set("proposal", current_manager_price_str)
+                                    record.set("proposal_status", ApplicationStatus.AGREED)
+                                    app_list[idx] = record.to_dict()
+                                    culture = record.get("culture", "Невідомо")
+                                    quantity = record.get("quantity", "Невідомо")
+                                    if previous_price is None:
+                                        msg = (
+                                            f"З'явилась пропозиція по заявці {display_number}. {culture} | {quantity} т Пропозиція ціни: {current_manager_price_str}\n\n"
+                                            "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
+                                            "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
+                                        )
+                                    elif status == ApplicationStatus.WAITING:
+                                        msg = (
+                                            f"Ціна по заявці {display_number}. {culture} | {quantity} т змінилась з {previous_proposal} на {current_manager_price_str}\n\n"
+                                            "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
+                                            "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
+                                        )
+                                    else:
+                                        msg = (
+                                            f"Для Вашої заявки {display_number}. {culture} | {quantity} т оновлено пропозицію: {current_manager_price_str}\n\n"
+                                            "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
+                                            "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
+                                        )
+                                    messages.append((record.get("chat_id"), msg))
+                                save_applications(apps)
+                await _send_proposals(messages)
+
+                # 2) Розрахунок автоматичної (ботової) ціни
+                # Зчитуємо актуальне налаштування з файлу безпосередньо перед розрахунком:
+                if load_auto_calc_setting():
+                    with span("auto_price") as auto_price:
+                        priced = []  # (uid, timestamp, ціна) – записані в таблицю
+                        for uid, app_list in load_applications().items():
+                            for app in app_list:
+                                if not _needs_bot_price(app):
+                                    continue
+                                # Лок лише на рядок цієї заявки, номер рядка звіряється після захоплення
+                                resolve = partial(application_row_span, uid, app.get("timestamp", ""))
+                                async with sheet_rows_lock.rows(resolve) as app_rows:
+                                    if app_rows is None:
+                                        continue
+                                    bot_price_value = calculate_and_set_bot_price(app, app_rows[0], price_config)
+                                if bot_price_value is not None:
+                                    priced.append((uid, app.get("timestamp", ""), bot_price_value))
+
+                        # Поки рахували, файл міг змінитись – застосовуємо ціни до свіжої копії
+                        messages = []
+                        if priced:
+                            with store_lock():
+                                updated_apps = load_applications()
+                                for uid, timestamp, bot_price_value in priced:
+                                    app_list = updated_apps.get(uid, [])
+                                    idx = next((i for i, a in enumerate(app_list) if a.get("timestamp", "") == timestamp), None)
+                                    if idx is None or not _needs_bot_price(app_list[idx]):
+                                        continue
+                                    app = app_list[idx]
+                                    app["bot_price"] = float(bot_price_value)
+                                    app["proposal"] = str(bot_price_value)
+                                    app["proposal_status"] = "Agreed"
+                                    culture = app.get("culture", "Невідомо")
+                                    quantity = app.get("quantity", "Невідомо")
                                     msg = (
-                                        f"З'явилась пропозиція по заявці {display_number}. {culture} | {quantity} т Пропозиція ціни: {current_manager_price_str}\n\n"
+                                        f"З'явилася пропозиція для Вашої заявки {idx+1}. "
+                                        f"{culture} | {quantity} т: {bot_price_value}\n\n"
                                         "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
                                         "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
                                     )
-                                elif status == "waiting":
-                                    msg = (
-                                        f"Ціна по заявці {display_number}. {culture} | {quantity} т змінилась з {previous_proposal} на {current_manager_price_str}\n\n"
-                                        "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
-                                        "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
-                                    )
-                                else:
-                                    msg = (
-                                        f"Для Вашої заявки {display_number}. {culture} | {quantity} т оновлено пропозицію: {current_manager_price_str}\n\n"
-                                        "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
-                                        "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
-                                    )
-                                try:
-                                    await bot.send_message(app.get("chat_id"), msg)
-                                except BotBlocked:
-                                    pass
-            save_applications(apps)
+                                    messages.append((app.get("chat_id"), msg))
+                                    activity += 1
+                                    auto_price.add_items()
+                                if messages:
+                                    save_applications(updated_apps)
+                    await _send_proposals(messages)
 
-            # 2) Розрахунок автоматичної (ботової) ціни
-            # Зчитуємо актуальне налаштування з файлу безпосередньо перед розрахунком:
-            if load_auto_calc_setting():
-                updated_apps = load_applications()
-                changed = False
-                for uid, app_list in updated_apps.items():
-                    for idx, app in enumerate(app_list):
-                        status = app.get("proposal_status", "active")
-                        if status in ("deleted", "confirmed", "Agreed"):
-                            continue
-                        manager_price_in_sheet = app.get("original_manager_price", "").strip()
-                        if manager_price_in_sheet:
-                            continue
-                        if "bot_price" in app:
-                            continue
-
-                        row_idx = app.get("sheet_row")
-                        if not row_idx:
-                            continue
-
-                        bot_price_value = calculate_and_set_bot_price(app, row_idx, price_config)
-                        if bot_price_value is not None:
-                            app["bot_price"] = float(bot_price_value)
-                            app["proposal"] = str(bot_price_value)
-                            app["proposal_status"] = "Agreed"
-                            culture = app.get("culture", "Невідомо")
-                            quantity = app.get("quantity", "Невідомо")
-                            msg = (
-                                f"З'явилася пропозиція для Вашої заявки {idx+1}. "
-                                f"{culture} | {quantity} т: {bot_price_value}\n\n"
-                                "Для перегляду даної пропозиції натисніть /menu -> Переглянути мої заявки -> "
-                                "Оберіть заявку -> Переглянути пропозиції та оберіть потрібну дію"
-                            )
-                            try:
-                                await bot.send_message(app.get("chat_id"), msg)
-                            except BotBlocked:
-                                pass
-                            changed = True
-                if changed:
-                    save_applications(updated_apps)
+            except Exception as e:
+                cycle.fail(e)
+                logging.exception(f"Помилка у фоні: {e}")
 
-        except Exception as e:
-            logging.exception(f"Помилка у фоні: {e}")
-
-        await asyncio.sleep(CHECK_INTERVAL)
+        delay = interval.next_interval(activity)
+        logging.debug(f"Наступна перевірка manager_price через {delay:.0f} с (змін у циклі: {activity}).")
+        await asyncio.sleep(delay)
 
 async def poll_deleted_applications():
     """
-    Щодня о 02:00 призупиняє polling, видаляє абсолютно усі заявки,
-    які мають статус "deleted" (використовуючи логіку з admin_remove_app_permanently),
-    а о 04:00 відновлює polling.
+    Щодня о 02:00 видаляє абсолютно усі заявки, які мають статус "deleted",
+    одним пакетним проходом (admin_purge_deleted_applications).
+    Polling не призупиняється: видалення коротко бере sheet_rows_lock.
+    Якщо таблиця1 не оновилась (load_pending_purge), спроба повторюється
+    через PURGE_RETRY_SECONDS, а не о 02:00 наступного дня: до того рядки
+    таблиці2 зсунуті відносно номерів у файлі.
     """
     while True:
         now = datetime.now()
@@ -264,40 +364,28 @@ async def poll_deleted_applications():
         if now >= next_2:
             next_2 += timedelta(days=1)
         wait_seconds = (next_2 - now).total_seconds()
+        if load_pending_purge() is not None:
+            wait_seconds = min(wait_seconds, PURGE_RETRY_SECONDS)
         await asyncio.sleep(wait_seconds)
 
-        # О 02:00 призупиняємо polling
-        pause_polling()
-        print("Polling призупинено о 02:00. Розпочато видалення заявок зі статусом 'deleted'.")
-
-        # Завантажуємо всі заявки
-        apps = load_applications()
-        # Проходимо по кожному користувачу
-        for uid in list(apps.keys()):
-            # Для коректності видалення – перебираємо індекси у зворотному порядку
-            user_apps = apps[uid]
-            for app_index in sorted(range(len(user_apps)), reverse=True):
-                if user_apps[app_index].get("proposal_status") == "deleted":
-                    # Викликаємо функцію видалення, яка виконує всю необхідну логіку
-                    await admin_remove_app_permanently(int(uid), app_index)
-                    # Після видалення перезавантажуємо дані (щоб індекси не зміщувались некоректно)
-                    apps = load_applications()
+        logging.info("Розпочато видалення заявок зі статусом 'deleted'.")
 
-        print("Всі заявки зі статусом 'deleted' видалено.")
+        with poll_cycle("deleted_purge") as cycle:
+            try:
+                from admin_handlers import admin_purge_deleted_applications
+                with span("purge") as purge:
+                    purged = await admin_purge_deleted_applications()
+                    purge.add_items(purged or 0)
+                if purged is None:
+                    # Деталі вже в лозі admin_purge_deleted_applications
+                    cycle.fail(RuntimeError("рядки не видалено з обох таблиць, заявки лишились у файлі"))
+                else:
+                    logging.info("Всі заявки зі статусом 'deleted' видалено.")
+            except Exception as e:
+                cycle.fail(e)
+                logging.exception(f"Помилка нічного видалення заявок: {e}")
 
-        # Обчислюємо час до наступних 04:00
-        now = datetime.now()
-        next_4 = now.replace(hour=4, minute=0, second=0, microsecond=0)
-        if now >= next_4:
-            next_4 += timedelta(days=1)
-        wait_seconds = (next_4 - now).total_seconds()
-        await asyncio.sleep(wait_seconds)
 
-        # О 04:00 відновлюємо polling
-        resume_polling()
-        print("Polling відновлено о 04:00.")
-        
-        
 ########################################################
 # HTTP-сервер (опційно)
 ########################################################
@@ -309,15 +397,41 @@ async def handle_webapp_data(request: web.Request):
             return web.json_response({"status": "error", "error": "user_id missing"})
         if not data or not any(data.values()):
             return web.json_response({"status": "error", "error": "empty data"})
-        logging.info(f"API отримав дані для user_id={user_id}: {data}")
+        # Сам payload містить персональні дані заявки – логуємо лише склад полів
+        logging.info("API отримав дані для user_id=%s, поля: %s", user_id, ", ".join(sorted(data)))
         return web.json_response({"status": "preview"})
     except Exception as e:
         logging.exception(f"API: Помилка: {e}")
         return web.json_response({"status": "error", "error": str(e)})
 
+async def handle_timings(request: web.Request):
+    # p50/p90/p99 фаз фонових циклів; ?poller=manager_proposals – лише один цикл
+    return web.json_response(percentile_report(request.query.get("poller")))
+
+def _usage_allowed(request: web.Request) -> bool:
+    # Звіт розкриває навантаження й імена функцій – не віддаємо його всім на 0.0.0.0
+    if API_USAGE_TOKEN:
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {API_USAGE_TOKEN}")
+    return request.remote in ("127.0.0.1", "::1")
+
+async def handle_api_usage(request: web.Request):
+    if not _usage_allowed(request):
+        return web.json_response({"status": "error", "error": "forbidden"}, status=403)
+    return web.json_response(usage_report())
+
+async def handle_startup(request: web.Request):
+    return web.json_response(startup_report())
+
 async def start_webserver():
     app_web = web.Application()
-    app_web.add_routes([web.post('/api/webapp_data', handle_webapp_data)])
+    app_web.add_routes([
+        web.post('/api/webapp_data', handle_webapp_data),
+        web.get('/metrics', handle_metrics),
+        web.get('/api/timings', handle_timings),
+        web.get('/api/usage', handle_api_usage),
+        web.get('/api/startup', handle_startup),
+        *health_routes(),
+    ])
     runner = web.AppRunner(app_web)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', PORT)
@@ -327,16 +441,72 @@ async def start_webserver():
 ########################################################
 # on_startup
 ########################################################
+# Фонові задачі, які має виконувати лише одна репліка (лідер)
+BACKGROUND_JOBS = (
+    publish_applications,
+    poll_manager_proposals,
+    poll_topicality_notifications,
+    poll_deleted_applications,
+)
+
+async def warm_up_google_clients():
+    """Імпорт gspread/requests і авторизацію робимо у потоці одразу після старту, а не в першому хендлері."""
+    try:
+        with startup_phase("google_clients"):
+            await asyncio.get_running_loop().run_in_executor(None, preload_google_clients)
+    except Exception as e:
+        logging.warning(f"Не вдалося заздалегідь ініціалізувати клієнт Google: {e}")
+    logging.info("[STARTUP] %s", json.dumps(startup_report(), ensure_ascii=False))
+
 async def on_startup(dp):
+    mark_ready()
     logging.info("Бот запущено. Старт фонових задач...")
-    asyncio.create_task(poll_manager_proposals())
-    asyncio.create_task(poll_topicality_notifications())
+    asyncio.create_task(warm_up_google_clients())
     asyncio.create_task(start_webserver())
-    asyncio.create_task(poll_deleted_applications())
+    asyncio.create_task(drain_outbox())
+    asyncio.create_task(monitor_loop_lag())
+    asyncio.create_task(run_usage_flusher())
+    if SEPARATE_WORKER:
+        logging.info("Фонові задачі виконує окремий воркер (SEPARATE_WORKER=1).")
+    else:
+        asyncio.create_task(run_as_leader(BACKGROUND_JOBS))
+
+async def on_shutdown(dp):
+    flush_usage()
+    release_lease()
+
+########################################################
+# Воркер: лише фонові задачі (python bot.py --worker)
+########################################################
+async def run_worker():
+    """
+    Окремий процес для фонових задач: без диспетчера Telegram.
+    Спілкується з процесом бота через спільні файли даних та чергу outbox.
+    Кілька воркерів можна запускати одночасно – працює лише лідер.
+    """
+    mark_ready()
+    logging.info("Воркер запущено. Старт фонових задач...")
+    logging.info("[STARTUP] %s", json.dumps(startup_report(), ensure_ascii=False))
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    usage_flusher = asyncio.create_task(run_usage_flusher())
+    health_runner = await start_health_server(WORKER_HEALTH_PORT) if WORKER_HEALTH_PORT else None
+    try:
+        await run_as_leader(BACKGROUND_JOBS)
+    finally:
+        lag_monitor.cancel()
+        usage_flusher.cancel()
+        if health_runner is not None:
+            await health_runner.cleanup()
+        flush_usage()
+        release_lease()
+        await bot.close()
 
 ########################################################
 # Головний старт
 ########################################################
 if __name__ == '__main__':
-    logging.basicConfig(level=logging.INFO)
-    executor.start_polling(dp, skip_updates=True, on_startup=on_startup)
+    if "--worker" in sys.argv:
+        asyncio.run(run_worker())
+        sys.exit(0)
+    register_handlers()
+    executor.start_polling(dp, skip_updates=True, on_startup=on_startup, on_shutdown=on_shutdown)
@@ -1,12 +1,18 @@
 # config.py
 import os
 import json
-import logging
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='[%(asctime)s] [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+import socket
+from functools import lru_cache
+
+from logging_setup import setup_logging
+
+# Логування: LOG_FORMAT=json|text, LOG_LEVELS="gsheet_utils=DEBUG,aiogram=WARNING",
+# LOG_SAMPLE_PER_MINUTE – скільки DEBUG-записів з одного рядка коду пропускати за хвилину (0 – всі)
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt=os.getenv("LOG_FORMAT", "json"),
+    levels=os.getenv("LOG_LEVELS", ""),
+    sample_per_minute=int(os.getenv("LOG_SAMPLE_PER_MINUTE", "20")),
 )
 
 ########################################################
@@ -26,7 +32,19 @@ SHEET2_NAME = os.getenv("SHEET2_NAME", "Лист1")
 SHEET2_NAME_2 = os.getenv("SHEET2_NAME_2", "Ціни")
 
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL_SECONDS", "60"))
+
+# Адаптивний інтервал poll_manager_proposals
+POLL_MIN_INTERVAL = int(os.getenv("POLL_MIN_INTERVAL_SECONDS", "10"))
+POLL_OFF_HOURS_MAX_INTERVAL = int(os.getenv("POLL_OFF_HOURS_MAX_INTERVAL_SECONDS", "900"))
+POLL_BACKOFF_FACTOR = float(os.getenv("POLL_BACKOFF_FACTOR", "2"))
+WORK_HOURS_START = int(os.getenv("WORK_HOURS_START", "8"))   # За київським часом
+WORK_HOURS_END = int(os.getenv("WORK_HOURS_END", "20"))
+WORK_WEEKDAYS = [int(d) for d in os.getenv("WORK_WEEKDAYS", "0,1,2,3,4,5").split(",") if d.strip()]  # 0 = понеділок
+SHEETS_READ_QUOTA_PER_MINUTE = int(os.getenv("SHEETS_READ_QUOTA_PER_MINUTE", "60"))
+POLL_QUOTA_SHARE = float(os.getenv("POLL_QUOTA_SHARE", "0.5"))  # Частка квоти читання, яку може використати poller
+
 API_PORT = int(os.getenv("API_PORT", "8080"))
+API_USAGE_TOKEN = os.getenv("API_USAGE_TOKEN", "")  # Bearer-токен для /api/usage; порожній – доступ лише з localhost
 
 TOPICALITY_SECONDS = int(os.getenv("TOPICALITY_SECONDS", "86400"))  # За замовчуванням 86400 сек (24 години)
 
@@ -38,15 +56,41 @@ ODESSA_LNG = 30.7343
 
 DATA_DIR = os.getenv("DATA_DIR", "/data")
 
+# Вибір лідера між репліками: тільки лідер запускає фонові задачі
+INSTANCE_ID = os.getenv("INSTANCE_ID", "") or f"{socket.gethostname()}-{os.getpid()}"
+LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "60"))  # Після цього часу без heartbeat лідерство можна перехопити
+LEADER_HEARTBEAT_SECONDS = int(os.getenv("LEADER_HEARTBEAT_SECONDS", "15"))
+
+# Фонові задачі в окремому процесі (python bot.py --worker).
+# Якщо увімкнено, процес бота їх не запускає, а сповіщення воркера йдуть через чергу outbox.
+SEPARATE_WORKER = os.getenv("SEPARATE_WORKER", "0") == "1"
+OUTBOX_RATE_PER_SECOND = float(os.getenv("OUTBOX_RATE_PER_SECOND", "20"))  # Ліміт Telegram ~30 повідомлень/с
+
+# Фонова публікація нових заявок у таблицю (publisher.py)
+PUBLISH_POLL_SECONDS = float(os.getenv("PUBLISH_POLL_SECONDS", "2"))  # Як часто лідер перевіряє чергу
+PUBLISH_MAX_BACKOFF_SECONDS = int(os.getenv("PUBLISH_MAX_BACKOFF_SECONDS", "600"))  # Найдовша пауза між повторами однієї заявки
+
+# Нічне видалення заявок: повтор, якщо рядки не видалились з таблиці1
+PURGE_RETRY_SECONDS = int(os.getenv("PURGE_RETRY_SECONDS", "300"))
+
+# Трасування хендлерів
+SLOW_UPDATE_SECONDS = float(os.getenv("SLOW_UPDATE_SECONDS", "1.0"))  # Апдейти, довші за це, логуються з розбивкою
+LOOP_LAG_SAMPLE_SECONDS = float(os.getenv("LOOP_LAG_SAMPLE_SECONDS", "0.5"))
+LOOP_LAG_WARN_SECONDS = float(os.getenv("LOOP_LAG_WARN_SECONDS", "0.25"))  # Затримка циклу подій, після якої пишемо попередження
+
+# /healthz і /readyz
+HEALTH_MAX_LOOP_LAG_SECONDS = float(os.getenv("HEALTH_MAX_LOOP_LAG_SECONDS", "5"))  # Блокування циклу подій, після якого інстанс не готовий
+HEALTH_POLL_STALE_SECONDS = int(os.getenv("HEALTH_POLL_STALE_SECONDS", str(2 * POLL_OFF_HOURS_MAX_INTERVAL)))  # Без успішного циклу poller'а довше – завис
+WORKER_HEALTH_PORT = int(os.getenv("WORKER_HEALTH_PORT", "8081"))  # Порт /healthz, /readyz і /metrics воркера; 0 – вимкнено
+
+# Запис вхідних апдейтів (анонімізованих) для benchmarks/replay.py; порожньо – вимкнено
+RECORD_UPDATES_FILE = os.getenv("RECORD_UPDATES_FILE", "")
+RECORD_UPDATES_SALT = os.getenv("RECORD_UPDATES_SALT", "")
+
 GSPREAD_CREDENTIALS_JSON = os.getenv("GSPREAD_CREDENTIALS_JSON", "")
 if not GSPREAD_CREDENTIALS_JSON:
     raise RuntimeError("Немає GSPREAD_CREDENTIALS_JSON у змінних оточення!")
 
-try:
-    gspread_creds_dict = json.loads(GSPREAD_CREDENTIALS_JSON)
-except Exception as e:
-    raise RuntimeError(f"Помилка парсингу GSPREAD_CREDENTIALS_JSON: {e}")
-
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -54,25 +98,36 @@ USERS_FILE = os.path.join(DATA_DIR, "users.json")
 APPLICATIONS_FILE = os.path.join(DATA_DIR, "applications_by_user.json")
 CONFIG_FILE = os.path.join(DATA_DIR, "config.py")
 
-if not os.path.exists(USERS_FILE):
-    import codecs
-    initial_users_data = {"approved_users": {}, "blocked_users": [], "pending_users": {}}
-    with codecs.open(USERS_FILE, "w", "utf-8") as f:
-        json.dump(initial_users_data, f, indent=2, ensure_ascii=False)
 
-if not os.path.exists(APPLICATIONS_FILE):
-    import codecs
-    with codecs.open(APPLICATIONS_FILE, "w", "utf-8") as f:
-        json.dump({}, f, indent=2, ensure_ascii=False)
+############################################
+# Відкладена ініціалізація
+############################################
+# Розбір облікових даних, створення файлів даних і завантаження CONFIG_FILE
+# виконуються при першому зверненні, а не при імпорті config.py, – процесам,
+# яким вони не потрібні (воркер, CLI, бенчмарки), вони нічого не коштують.
+# Старі імена gspread_creds_dict і CONFIG доступні через __getattr__ модуля.
 
-try:
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("config_module", CONFIG_FILE)
-    config_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(config_module)
-    CONFIG = config_module.CONFIG
-except (ImportError, FileNotFoundError):
-    default_config_content = '''# config.py
+@lru_cache(maxsize=None)
+def gspread_credentials() -> dict:
+    try:
+        return json.loads(GSPREAD_CREDENTIALS_JSON)
+    except Exception as e:
+        raise RuntimeError(f"Помилка парсингу GSPREAD_CREDENTIALS_JSON: {e}")
+
+
+@lru_cache(maxsize=None)
+def ensure_data_files():
+    if not os.path.exists(USERS_FILE):
+        initial_users_data = {"approved_users": {}, "blocked_users": [], "pending_users": {}}
+        with open(USERS_FILE, "w", encoding="utf-8") as f:
+            json.dump(initial_users_data, f, indent=2, ensure_ascii=False)
+
+    if not os.path.exists(APPLICATIONS_FILE):
+        with open(APPLICATIONS_FILE, "w", encoding="utf-8") as f:
+            json.dump({}, f, indent=2, ensure_ascii=False)
+
+
+DEFAULT_CONFIG_CONTENT = '''# config.py
 CONFIG = {
     "fgh_name_column": "D",
     "edrpou_column": "E",
@@ -92,12 +147,32 @@ CONFIG = {
     "phone_column": "P"
 }
 '''
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        f.write(default_config_content)
+
+
+@lru_cache(maxsize=None)
+def load_sheet_config() -> dict:
+    """CONFIG з DATA_DIR/config.py (створюється з типовими значеннями, якщо його немає)."""
+    import importlib.util
+    if not os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+            f.write(DEFAULT_CONFIG_CONTENT)
     spec = importlib.util.spec_from_file_location("config_module", CONFIG_FILE)
     config_module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(config_module)
-    CONFIG = config_module.CONFIG
+    return config_module.CONFIG
+
+
+_LAZY_ATTRIBUTES = {
+    "gspread_creds_dict": gspread_credentials,
+    "CONFIG": load_sheet_config,
+}
+
+
+def __getattr__(name):
+    loader = _LAZY_ATTRIBUTES.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return loader()
 
 
 ############################################
@@ -1,49 +1,439 @@
 # db.py
 import json
 import os
+import time
+import fcntl
 import logging
+import itertools
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
 
-from config import USERS_FILE, APPLICATIONS_FILE
+from config import DATA_DIR, USERS_FILE, APPLICATIONS_FILE, ensure_data_files
+from metrics import STORE_SECONDS
+from tracing import record_call
+from models import ApplicationRecord
 
+_store_listeners = []
+last_store_seconds = {}  # op -> тривалість останнього виклику (для /healthz)
+
+def add_store_listener(callback):
+    """callback(op, data) після кожного load_*/save_*: data – прочитані або записані дані."""
+    _store_listeners.append(callback)
+
+def _store_op(op):
+    """Декоратор: час операції зі сховищем іде в метрику та в трасу поточного апдейту."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - started
+                STORE_SECONDS.observe(seconds, op=op)
+                last_store_seconds[op] = seconds
+                record_call("store", op, seconds)
+            for callback in _store_listeners:
+                callback(op, result if op.startswith("load") else args[0])
+            return result
+        return wrapper
+    return decorator
+
+############################################
+# Спільний доступ бота і воркера до файлів
+############################################
+# Файли читають і пишуть два процеси (бот і воркер, SEPARATE_WORKER).
+# Запис атомарний: тимчасовий файл у тій самій теці + os.replace, тож
+# читач бачить або старий, або новий файл, а не обрізаний JSON.
+# Кожна послідовність load_* -> зміна -> save_* виконується під store_lock():
+# flock на STORE_LOCK_FILE, спільний для обох файлів і обох процесів.
+# Усередині store_lock() не можна await і звертатися до Telegram чи Google:
+# секція має бути короткою, бо інший процес чекає на неї, блокуючись.
+
+STORE_LOCK_FILE = os.path.join(DATA_DIR, "store.lock")
+
+_store_thread_lock = threading.RLock()
+_store_lock_depth = 0
+_store_lock_file = None
+
+@contextmanager
+def store_lock():
+    """
+    Ексклюзивний доступ до users.json і applications_by_user.json між процесами.
+    Повторний вхід у тому ж потоці (db-функція всередині секції) не блокується.
+    """
+    global _store_lock_depth, _store_lock_file
+    with _store_thread_lock:
+        if _store_lock_depth == 0:
+            f = open(STORE_LOCK_FILE, "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            except BaseException:
+                f.close()
+                raise
+            _store_lock_file = f
+        _store_lock_depth += 1
+        try:
+            yield
+        finally:
+            _store_lock_depth -= 1
+            if _store_lock_depth == 0:
+                fcntl.flock(_store_lock_file, fcntl.LOCK_UN)
+                _store_lock_file.close()
+                _store_lock_file = None
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+@_store_op("load_users")
 def load_users():
+    ensure_data_files()
     with open(USERS_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
+@_store_op("save_users")
 def save_users(data):
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    _write_json(USERS_FILE, data)
+    _user_directory.update(data, _file_stamp(USERS_FILE))
 
+@_store_op("load_applications")
 def load_applications():
+    ensure_data_files()
     with open(APPLICATIONS_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
+@_store_op("save_applications")
 def save_applications(apps):
-    with open(APPLICATIONS_FILE, "w", encoding="utf-8") as f:
-        json.dump(apps, f, indent=2, ensure_ascii=False)
+    _write_json(APPLICATIONS_FILE, apps)
+    _status_index.update(apps, _file_stamp(APPLICATIONS_FILE))
+
+############################################
+# Індекси заявок за статусом
+############################################
+# status -> user_id -> {індекс заявки: запис заявки}. Заявки в пам'яті – по одному
+# ApplicationRecord (models.py) на позицію, спільному для всіх індексів: пошуковий
+# індекс і poller тримають ті самі об'єкти, а назовні (get_applications_by_status,
+# get_user_applications) віддаються словники to_dict(). Оновлюється при кожному
+# save_applications: проходимо заявки й оновлюємо лише позиції, де заявка
+# змінилась (переносячи її в розділ нового статусу); про ці позиції дізнаються
+# слухачі add_applications_listener (наприклад, пошуковий індекс search.py).
+# Окремо – sheet_row -> позиції, щоб зіставляти рядки таблиці із заявками.
+# Якщо файл змінив інший процес (воркер), mtime/розмір
+# не збігаються з тими, що бачив індекс, і перед запитом файл перечитується.
+# Запит get_applications_by_status коштує O(кількості знайдених заявок).
+# Кожна зміна заявок користувача дає йому новий номер версії
+# (get_user_applications_version) – за ним кешуються відрендерені перегляди.
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class _StatusIndex:
+    def __init__(self):
+        self.stamp = None
+        self.entries = {}  # (user_id, app_index) -> ApplicationRecord
+        self.by_status = {}  # status -> user_id -> {app_index: запис}
+        self.by_row = {}  # sheet_row -> ((user_id, app_index), ...) – зазвичай одна позиція
+        self.counts = {}  # user_id -> кількість заявок
+        self.versions = {}  # user_id -> версія заявок користувача
+        self.lock = threading.Lock()
+
+    def _unlink(self, key):
+        uid, idx = key
+        record = self.entries[key]
+        partition = self.by_status[record.get("proposal_status")]
+        partition[uid].pop(idx, None)
+        if not partition[uid]:
+            del partition[uid]
+        row = record.get("sheet_row")
+        if row:
+            keys = tuple(k for k in self.by_row[row] if k != key)
+            if keys:
+                self.by_row[row] = keys
+            else:
+                del self.by_row[row]
+
+    def update(self, apps, stamp):
+        changed = {}  # key -> новий запис заявки або None, якщо позиції більше немає
+        with self.lock:
+            seen = set()
+            for uid, user_apps in apps.items():
+                for idx, app in enumerate(user_apps):
+                    key = (uid, idx)
+                    seen.add(key)
+                    old = self.entries.get(key)
+                    if old is not None:
+                        if old.equals(app):
+                            continue
+                        self._unlink(key)
+                    record = self.entries[key] = ApplicationRecord.from_dict(app)
+                    self.by_status.setdefault(record.get("proposal_status"), {}).setdefault(uid, {})[idx] = record
+                    if record.get("sheet_row"):
+                        self.by_row[record.sheet_row] = self.by_row.get(record.sheet_row, ()) + (key,)
+                    changed[key] = record
+            for key in [key for key in self.entries if key not in seen]:
+                self._unlink(key)
+                del self.entries[key]
+                changed[key] = None
+            self.counts = {uid: len(user_apps) for uid, user_apps in apps.items()}
+            for uid in {uid for uid, _ in changed}:
+                self.versions[uid] = next(_versions)
+            self.stamp = stamp
+            # Слухачів викликаємо під локом: збереження йдуть і з потоків (asyncio.to_thread),
+            # і без цього пачки changed могли б дійти до слухача не в тому порядку
+            if changed:
+                for callback in _applications_listeners:
+                    callback(changed)
+
+    def refresh(self):
+        stamp = _file_stamp(APPLICATIONS_FILE)
+        if stamp is None or stamp != self.stamp:
+            # Відбиток знімаємо до читання: якщо файл зміниться під час читання, наступний запит перечитає знову
+            self.update(load_applications(), stamp)
+
+    def query(self, status, user_id=None):
+        self.refresh()
+        with self.lock:
+            partition = self.by_status.get(status, {})
+            if user_id is not None:
+                uids = [str(user_id)] if str(user_id) in partition else []
+            else:
+                uids = list(partition)
+            return [
+                {"user_id": uid, "app_index": idx, "app_data": app.to_dict()}
+                for uid in uids
+                for idx, app in sorted(partition[uid].items())
+            ]
+
+    def users(self, status):
+        self.refresh()
+        with self.lock:
+            return list(self.by_status.get(status, {}))
+
+    def user_apps(self, user_id):
+        self.refresh()
+        uid = str(user_id)
+        with self.lock:
+            apps = [self.entries[(uid, idx)].to_dict() for idx in range(self.counts.get(uid, 0))]
+            return self.versions.get(uid, 0), apps
+
+    def rows(self):
+        self.refresh()
+        with self.lock:
+            return {
+                row: [(key, self.entries[key]) for key in sorted(keys)]
+                for row, keys in self.by_row.items()
+            }
+
+    def user_version(self, user_id):
+        self.refresh()
+        with self.lock:
+            return self.versions.get(str(user_id), 0)
+
+_versions = itertools.count(1)  # спільний лічильник: версія не повторюється навіть після видалення всіх заявок
+_applications_listeners = []
+_status_index = _StatusIndex()
+
+def add_applications_listener(callback):
+    """
+    callback(changed) після кожної зміни заявок: changed – {(user_id, app_index): запис або None}.
+    Записи (ApplicationRecord) – спільні з індексом, змінювати їх не можна. Одразу після
+    підписки callback отримує всі поточні заявки. Усі виклики йдуть під локом індексу
+    в порядку змін, тож callback має бути швидким і не звертатися до функцій індексу
+    (get_applications_by_status тощо) – інакше взаємне блокування.
+    """
+    _status_index.refresh()
+    with _status_index.lock:
+        # Під тим самим локом, що й update: жодне оновлення не вклиниться між знімком
+        # і підпискою й не дійде до слухача раніше за знімок
+        _applications_listeners.append(callback)
+        if _status_index.entries:
+            callback(dict(_status_index.entries))
+
+def refresh_applications_index():
+    """Перечитує файл, якщо його змінив інший процес (слухачі отримають зміни)."""
+    _status_index.refresh()
+
+def get_applications_by_status(status, user_id=None):
+    """
+    Заявки зі статусом status (за потреби – лише користувача user_id) як
+    [{"user_id", "app_index", "app_data"}]; app_data – копія, її можна змінювати.
+    """
+    return _status_index.query(status, user_id)
+
+def get_application_records_by_row():
+    """
+    {sheet_row: [((user_id, app_index), запис)]} – заявки за рядками таблиці. Записи –
+    спільні ApplicationRecord індексу: лише для читання, зміни – через файл заявок.
+    """
+    return _status_index.rows()
+
+def get_users_with_status(status):
+    """user_id (рядки) користувачів, що мають хоча б одну заявку зі статусом status."""
+    return _status_index.users(status)
+
+def get_user_applications(user_id):
+    """(версія, [копії заявок користувача]) – узгоджена пара з індексу, без читання файлу."""
+    return _status_index.user_apps(user_id)
+
+def get_user_applications_version(user_id):
+    """Версія заявок користувача: змінюється при кожній зміні будь-якої з них."""
+    return _status_index.user_version(user_id)
+
+def application_row_span(user_id, timestamp):
+    """
+    Поточний рядок заявки як діапазон (row, row) для sheet_rows_lock.rows(partial(...));
+    None – заявки немає або її ще не записано в таблицю.
+    """
+    _, user_apps = get_user_applications(user_id)
+    for app in user_apps:
+        if app.get("timestamp", "") == timestamp:
+            return (app["sheet_row"], app["sheet_row"]) if app.get("sheet_row") else None
+    return None
+
+############################################
+# Довідник користувачів
+############################################
+# Копія users.json у пам'яті: approved/pending – словники, blocked – множина,
+# плюс індекс «ПІБ -> user_id» для кнопок з іменами. Оновлюється при кожному
+# save_users і перечитується, лише якщо файл змінив інший процес (mtime/розмір).
+# Пошук – O(1) без читання файлу. Запис, як і раніше, – load_users/save_users.
+# Слухачі add_users_listener(callback) отримують множину змінених розділів
+# ({"approved", "pending", "blocked"}) – для скидання кешів, побудованих на довіднику.
+
+_users_listeners = []
+
+class _UserDirectory:
+    def __init__(self):
+        self.stamp = None
+        self.approved = {}
+        self.pending = {}
+        self.blocked = set()
+        self.by_name = {"approved": {}, "pending": {}}
+        self.lock = threading.Lock()
+
+    def update(self, data, stamp):
+        approved = {uid: dict(info) for uid, info in data.get("approved_users", {}).items()}
+        pending = {uid: dict(info) for uid, info in data.get("pending_users", {}).items()}
+        blocked = set(data.get("blocked_users", []))
+        by_name = {"approved": {}, "pending": {}}
+        for section, users in (("approved", approved), ("pending", pending)):
+            for uid, info in users.items():
+                # Як і раніше при пошуку перебором, збіг імен віддає першого користувача
+                by_name[section].setdefault(info.get("fullname", "").strip(), uid)
+        with self.lock:
+            changed = set()
+            if approved != self.approved:
+                changed.add("approved")
+            if pending != self.pending:
+                changed.add("pending")
+            if blocked != self.blocked:
+                changed.add("blocked")
+            self.approved, self.pending, self.blocked, self.by_name = approved, pending, blocked, by_name
+            self.stamp = stamp
+        if changed:
+            for callback in _users_listeners:
+                callback(changed)
+
+    def refresh(self):
+        stamp = _file_stamp(USERS_FILE)
+        if stamp is None or stamp != self.stamp:
+            self.update(load_users(), stamp)
+        return self
+
+_user_directory = _UserDirectory()
+
+def add_users_listener(callback):
+    """callback(changed) після кожної зміни довідника; changed – множина змінених розділів."""
+    _users_listeners.append(callback)
+
+def get_user_status(user_id):
+    """"blocked", "approved", "pending" або None – у тому ж пріоритеті, що й /start."""
+    directory = _user_directory.refresh()
+    uid = str(user_id)
+    if uid in directory.blocked:
+        return "blocked"
+    if uid in directory.approved:
+        return "approved"
+    if uid in directory.pending:
+        return "pending"
+    return None
+
+def is_approved(user_id):
+    return str(user_id) in _user_directory.refresh().approved
+
+def get_approved_user(user_id):
+    """Копія запису схваленого користувача або None."""
+    info = _user_directory.refresh().approved.get(str(user_id))
+    return dict(info) if info is not None else None
+
+def get_pending_user(user_id):
+    info = _user_directory.refresh().pending.get(str(user_id))
+    return dict(info) if info is not None else None
+
+def get_approved_users():
+    """{user_id: запис} – копія, її можна змінювати."""
+    return {uid: dict(info) for uid, info in _user_directory.refresh().approved.items()}
+
+def get_pending_users():
+    return {uid: dict(info) for uid, info in _user_directory.refresh().pending.items()}
+
+def find_user_by_name(fullname, section="approved"):
+    """user_id за ПІБ (як на кнопці) серед схвалених ("approved") або очікуючих ("pending")."""
+    return _user_directory.refresh().by_name[section].get(fullname.strip())
 
 def approve_user(user_id):
+    approve_users([user_id])
+
+@store_lock()
+def approve_users(user_ids):
+    """Схвалює користувачів одним записом users.json; повертає user_id, яких справді схвалено."""
     data = load_users()
-    uid = str(user_id)
-    if uid not in data.get("approved_users", {}):
-        pending = data.get("pending_users", {}).get(uid, {})
-        fullname = pending.get("fullname", "")
-        phone = pending.get("phone", "")
-        data.setdefault("approved_users", {})[uid] = {"fullname": fullname, "phone": phone}
-        data.get("pending_users", {}).pop(uid, None)
+    approved = data.setdefault("approved_users", {})
+    pending = data.get("pending_users", {})
+    done = []
+    for uid in dict.fromkeys(map(str, user_ids)):
+        if uid in approved:
+            continue
+        info = pending.pop(uid, {})
+        approved[uid] = {"fullname": info.get("fullname", ""), "phone": info.get("phone", "")}
+        done.append(uid)
+    if done:
         save_users(data)
-        logging.info(f"Користувач {uid} схвалений.")
+        logging.info(f"Схвалено користувачів ({len(done)}): {', '.join(done)}.")
+    return done
 
 def block_user(user_id):
+    block_users([user_id])
+
+@store_lock()
+def block_users(user_ids):
+    """Блокує користувачів одним записом users.json; повертає user_id, яких справді заблоковано."""
     data = load_users()
-    uid = str(user_id)
-    if uid not in data.get("blocked_users", []):
-        data.setdefault("blocked_users", []).append(uid)
+    blocked = data.setdefault("blocked_users", [])
+    already = set(blocked)
+    done = []
+    for uid in dict.fromkeys(map(str, user_ids)):
+        if uid in already:
+            continue
+        blocked.append(uid)
         data.get("pending_users", {}).pop(uid, None)
         data.get("approved_users", {}).pop(uid, None)
+        done.append(uid)
+    if done:
         save_users(data)
-        logging.info(f"Користувач {uid} заблокований.")
+        logging.info(f"Заблоковано користувачів ({len(done)}): {', '.join(done)}.")
+    return done
 
+@store_lock()
 def add_application(user_id, chat_id, application_data):
     application_data['timestamp'] = datetime.now().isoformat()
     application_data['user_id'] = user_id
@@ -57,7 +447,27 @@ def add_application(user_id, chat_id, application_data):
     save_applications(apps)
     logging.info(f"Заявка для user_id={user_id} збережена як active.")
 
+def find_application_by_submission(user_id, submission_id):
+    """(індекс, заявка) користувача з ключем ідемпотентності submission_id або None."""
+    for idx, app in enumerate(load_applications().get(str(user_id), [])):
+        if app.get("submission_id") == submission_id:
+            return idx, app
+    return None
+
+@store_lock()
+def set_application_sheet_row(user_id, submission_id, sheet_row):
+    """Записує sheet_row заявці з ключем submission_id. False – заявки вже немає."""
+    apps = load_applications()
+    for app in apps.get(str(user_id), []):
+        if app.get("submission_id") == submission_id:
+            app["sheet_row"] = sheet_row
+            save_applications(apps)
+            return True
+    return False
+
+@store_lock()
 def update_application_status(user_id, app_index, status, proposal=None):
+    """Повертає оновлену заявку (None, якщо її немає) – повторно читати файл не треба."""
     apps = load_applications()
     uid = str(user_id)
     if uid in apps and 0 <= app_index < len(apps[uid]):
@@ -65,7 +475,36 @@ def update_application_status(user_id, app_index, status, proposal=None):
         if proposal is not None:
             apps[uid][app_index]["proposal"] = proposal
         save_applications(apps)
+        return apps[uid][app_index]
+    return None
 
+@store_lock()
+def update_applications_status(entries, status):
+    """
+    Масова зміна статусу одним записом файлу. entries – [{"user_id", "app_index", "timestamp"}];
+    якщо заявка змістилась, шукаємо її за timestamp. Повертає [(заявка, попередній статус)]
+    для заявок, статус яких справді змінився.
+    """
+    apps = load_applications()
+    updated = []
+    for entry in entries:
+        user_apps = apps.get(str(entry["user_id"]), [])
+        idx = entry["app_index"]
+        if not (0 <= idx < len(user_apps) and user_apps[idx].get("timestamp", "") == entry["timestamp"]):
+            idx = next((i for i, app in enumerate(user_apps) if app.get("timestamp", "") == entry["timestamp"]), None)
+            if idx is None:
+                continue
+        app = user_apps[idx]
+        previous = app.get("proposal_status", "active")
+        if previous != status:
+            app["proposal_status"] = status
+            updated.append((app, previous))
+    if updated:
+        save_applications(apps)
+        logging.info(f"Статус {len(updated)} заявок змінено на '{status}'.")
+    return updated
+
+@store_lock()
 def delete_application_soft(user_id, app_index):
     apps = load_applications()
     uid = str(user_id)
@@ -73,6 +512,7 @@ def delete_application_soft(user_id, app_index):
         apps[uid][app_index]["proposal_status"] = "deleted"
         save_applications(apps)
 
+@store_lock()
 def delete_application_from_file_entirely(user_id, app_index):
     apps = load_applications()
     uid = str(user_id)
@@ -81,3 +521,31 @@ def delete_application_from_file_entirely(user_id, app_index):
         if not apps[uid]:
             apps.pop(uid, None)
         save_applications(apps)
+
+############################################
+# Незавершене видалення рядків таблиці1
+############################################
+# Пакетне видалення (admin_purge_deleted_applications) видаляє рядки спершу з
+# таблиці2, потім з таблиці1. Якщо таблиця1 не оновилась, номери sheet_row у
+# файлі лишаються такими, як у таблиці1, а рядки й заявки записуються сюди –
+# видалення з таблиці1 довершується перед будь-яким наступним видаленням рядків.
+
+PENDING_PURGE_FILE = os.path.join(DATA_DIR, "pending_purge.json")
+
+def load_pending_purge():
+    """{"rows": [...], "purge_keys": [[user_id, timestamp], ...]} або None."""
+    try:
+        with open(PENDING_PURGE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_pending_purge(pending):
+    """Записує незавершене видалення; None – видалення довершено."""
+    if pending is not None:
+        _write_json(PENDING_PURGE_FILE, pending)
+        return
+    try:
+        os.remove(PENDING_PURGE_FILE)
+    except FileNotFoundError:
+        pass
@@ -1,70 +1,102 @@
 #gsheet_utils.py
 import logging
+import importlib
 from datetime import datetime
-import requests
+from functools import lru_cache, partial
 import json
 
-import gspread
 from config import (
-    gspread_creds_dict, GOOGLE_SPREADSHEET_ID, SHEET1_NAME,
+    gspread_credentials, GOOGLE_SPREADSHEET_ID, SHEET1_NAME,
     GOOGLE_SPREADSHEET_ID2, SHEET2_NAME, SHEET2_NAME_2,
     friendly_names, GOOGLE_MAPS_API_KEY,
     ODESSA_LAT, ODESSA_LNG
 )
-from oauth2client.service_account import ServiceAccountCredentials
-from gspread_formatting import (
-    format_cell_range, cellFormat, Color,
-    set_column_width, CellFormat, TextFormat
-)
-from gspread.utils import rowcol_to_a1
 
-from db import load_applications, save_applications, load_users
-from loader import pause_polling, resume_polling
-import asyncio
+from db import load_applications, save_applications, get_approved_users, store_lock, application_row_span
+from locks import sheet_rows_lock
+from metrics import MAPS_CALLS, DISTANCE_CACHE
+from timing import timed
+from api_usage import record_api_call
+
+# gspread, oauth2client, gspread_formatting і requests імпортуються при першому
+# зверненні (init_gspread, format_cell_range, _http) – процеси, яким таблиці не
+# потрібні, їх не завантажують. Бот прогріває їх у фоні: preload_google_clients().
+requests = None
 
 ############################################
 # Ініціалізація gspread
 ############################################
 
+_client = None
+
 def init_gspread():
+    """Авторизований клієнт створюється один раз на процес (токен оновлюється самим клієнтом)."""
+    global _client
+    if _client is not None:
+        return _client
     logging.debug("Ініціалізація gspread...")
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
     try:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(gspread_creds_dict, scope)
-        client = gspread.authorize(creds)
+        from sheets_client import authorize
+        _client = authorize(gspread_credentials())
         logging.debug("gspread ініціалізовано успішно.")
-        return client
+        return _client
     except Exception as e:
         logging.exception(f"Помилка ініціалізації gspread: {e}")
         raise
 
+def _http():
+    global requests
+    if requests is None:
+        import requests as requests_module
+        requests = requests_module
+    return requests
+
+def preload_google_clients():
+    """Імпорт важких залежностей і авторизація заздалегідь (викликається в потоці при старті)."""
+    _http()
+    # Лише прогрів: модуль потрапляє в sys.modules, format_cell_range далі імпортує його миттєво
+    importlib.import_module("gspread_formatting")
+    init_gspread()
+    # sheetId для пакетних запитів (mark_row_confirmed) – щоб перше підтвердження не читало метадані
+    sheet_id(GOOGLE_SPREADSHEET_ID, SHEET1_NAME)
+    sheet_id(GOOGLE_SPREADSHEET_ID2, SHEET2_NAME)
+
+_spreadsheets = {}  # id таблиці -> gspread.Spreadsheet
+_sheet_ids = {}  # (id таблиці, назва аркуша) -> sheetId
+
+def open_spreadsheet(spreadsheet_id: str):
+    """Об'єкт таблиці один на процес (новіші gspread читають метадані вже в open_by_key)."""
+    if spreadsheet_id not in _spreadsheets:
+        _spreadsheets[spreadsheet_id] = init_gspread().open_by_key(spreadsheet_id)
+    return _spreadsheets[spreadsheet_id]
+
+def sheet_id(spreadsheet_id: str, title: str) -> int:
+    """sheetId аркуша для batchUpdate: метадані таблиці читаються один раз на процес."""
+    key = (spreadsheet_id, title)
+    if key not in _sheet_ids:
+        _sheet_ids[key] = open_spreadsheet(spreadsheet_id).worksheet(title).id
+    return _sheet_ids[key]
+
 def get_worksheet1():
-    client = init_gspread()
-    sheet = client.open_by_key(GOOGLE_SPREADSHEET_ID)
+    sheet = open_spreadsheet(GOOGLE_SPREADSHEET_ID)
     ws = sheet.worksheet(SHEET1_NAME)
-    logging.debug(f"Отримано worksheet1: {SHEET1_NAME}")
+    logging.debug("Отримано worksheet1: %s", SHEET1_NAME)
     return ws
 
 def get_worksheet2():
-    client = init_gspread()
-    sheet = client.open_by_key(GOOGLE_SPREADSHEET_ID2)
+    sheet = open_spreadsheet(GOOGLE_SPREADSHEET_ID2)
     ws = sheet.worksheet(SHEET2_NAME)
-    logging.debug(f"Отримано worksheet2: {SHEET2_NAME}")
+    logging.debug("Отримано worksheet2: %s", SHEET2_NAME)
     return ws
 
 def get_worksheet2_2():
-    client = init_gspread()
-    sheet = client.open_by_key(GOOGLE_SPREADSHEET_ID2)
+    sheet = open_spreadsheet(GOOGLE_SPREADSHEET_ID2)
     ws = sheet.worksheet(SHEET2_NAME_2)
-    logging.debug(f"Отримано worksheet2_2: {SHEET2_NAME_2}")
+    logging.debug("Отримано worksheet2_2: %s", SHEET2_NAME_2)
     return ws
 
 def ensure_columns(ws, required_col: int):
-    logging.debug(f"Перевірка кількості стовпців, потрібно: {required_col}, фактично: {ws.col_count}")
+    logging.debug("Перевірка кількості стовпців, потрібно: %s, фактично: %s", required_col, ws.col_count)
     if ws.col_count < required_col:
         ws.resize(rows=ws.row_count, cols=required_col)
         logging.debug("Виконано зміну розміру таблиці для забезпечення потрібної кількості стовпців.")
@@ -73,23 +105,65 @@ def ensure_columns(ws, required_col: int):
 # Форматування клітинок
 ############################################
 
-red_format = cellFormat(backgroundColor=Color(1, 0.0, 0.0))      # #ff0000
-green_format = cellFormat(backgroundColor=Color(0.8, 1, 0.8))    # близько #ccffcc
-yellow_format = cellFormat(backgroundColor=Color(1, 1, 0.6))     # #ffff99 або подібне
+BACKGROUND_COLORS = {
+    "red": (1, 0.0, 0.0),      # #ff0000
+    "green": (0.8, 1, 0.8),    # близько #ccffcc
+    "yellow": (1, 1, 0.6),     # #ffff99 або подібне
+    "white": (1, 1, 1),
+}
+
+@lru_cache(maxsize=None)
+def background_format(color: str):
+    from gspread_formatting import cellFormat, Color
+    return cellFormat(backgroundColor=Color(*BACKGROUND_COLORS[color]))
 
-def color_price_cell_in_table2(row: int, fmt: cellFormat, col: int = 12):
+def background_request(ws_id: int, row: int, color: str, col: int = None, clear_value: bool = False) -> dict:
+    """
+    Запит repeatCell для batchUpdate: фон рядка row (або лише клітинки row, col).
+    clear_value=True – заодно стирає значення (поле вказане в fields, але відсутнє в cell).
+    """
+    grid = {"sheetId": ws_id, "startRowIndex": row - 1, "endRowIndex": row}
+    if col is not None:
+        grid.update(startColumnIndex=col - 1, endColumnIndex=col)
+    red, green, blue = BACKGROUND_COLORS[color]
+    fields = "userEnteredFormat.backgroundColor"
+    if clear_value:
+        fields = "userEnteredValue," + fields
+    return {
+        "repeatCell": {
+            "range": grid,
+            "cell": {"userEnteredFormat": {"backgroundColor": {"red": red, "green": green, "blue": blue}}},
+            "fields": fields,
+        }
+    }
+
+def format_cell_range(ws, cell_range: str, cell_format):
+    from gspread_formatting import format_cell_range as apply_format
+    return apply_format(ws, cell_range, cell_format)
+
+def rowcol_to_a1(row: int, col: int) -> str:
+    """(1, 1) -> "A1" – як gspread.utils.rowcol_to_a1, але без імпорту gspread."""
+    if row < 1 or col < 1:
+        raise ValueError(f"Некоректна адреса клітинки: ({row}, {col})")
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return f"{letters}{row}"
+
+def color_price_cell_in_table2(row: int, fmt, col: int = 12):
     ws2 = get_worksheet2()
     cell_range = f"{rowcol_to_a1(row, col)}:{rowcol_to_a1(row, col)}"
     format_cell_range(ws2, cell_range, fmt)
 
 def color_cell_red(row: int, col: int = 12):
-    color_price_cell_in_table2(row, red_format, col)
+    color_price_cell_in_table2(row, background_format("red"), col)
 
 def color_cell_green(row: int, col: int = 12):
-    color_price_cell_in_table2(row, green_format, col)
+    color_price_cell_in_table2(row, background_format("green"), col)
 
 def color_cell_yellow(row: int, col: int = 12):
-    color_price_cell_in_table2(row, yellow_format, col)
+    color_price_cell_in_table2(row, background_format("yellow"), col)
 
 def delete_price_cell_in_table2(row: int, col: int = 12):
     ws2 = get_worksheet2()
@@ -97,7 +171,7 @@ def delete_price_cell_in_table2(row: int, col: int = 12):
     format_cell_range(
         ws2,
         f"{rowcol_to_a1(row, col)}:{rowcol_to_a1(row, col)}",
-        cellFormat(backgroundColor=Color(1, 1, 1))
+        background_format("white")
     )
     # Видаляємо значення у самій клітинці
     ws2.update_cell(row, col, "")
@@ -106,15 +180,97 @@ def color_entire_row_green(ws, row: int):
     total_columns = ws.col_count
     last_cell = rowcol_to_a1(row, total_columns)
     cell_range = f"A{row}:{last_cell}"
-    format_cell_range(ws, cell_range, green_format)
-    logging.debug(f"Рядок {row} зафарбовано зеленим у аркуші {ws.title}.")
+    format_cell_range(ws, cell_range, background_format("green"))
+    logging.debug("Рядок %s зафарбовано зеленим у аркуші %s.", row, ws.title)
 
 def color_entire_row_red(ws, row: int):
     total_columns = ws.col_count
     last_cell = rowcol_to_a1(row, total_columns)
     cell_range = f"A{row}:{last_cell}"
-    format_cell_range(ws, cell_range, red_format)
-    logging.debug(f"Рядок {row} зафарбовано червоним у аркуші {ws.title}.")
+    format_cell_range(ws, cell_range, background_format("red"))
+    logging.debug("Рядок %s зафарбовано червоним у аркуші %s.", row, ws.title)
+
+# Колір рядка заявки в обох таблицях для кожного статусу
+STATUS_ROW_COLORS = {"confirmed": "green", "deleted": "red", "active": "white"}
+
+def unconfirmed_price_columns(app: dict) -> tuple:
+    """Стовпці таблиці2 з ціною, яку не підтверджено: бота – 15, менеджера – 13; невідомо – обидва."""
+    try:
+        confirmed_price = float(app.get("proposal", ""))
+        bot_price = app.get("bot_price", None)
+        if bot_price is not None and abs(confirmed_price - bot_price) < 1e-9:
+            return (15,)
+        return (13,)
+    except Exception:
+        return (13, 15)
+
+@timed()
+def paint_rows(row_colors: dict, clear_price_columns: dict = None) -> bool:
+    """
+    Оформлення рядків заявок одним batchUpdate на кожну таблицю:
+    row_colors – {sheet_row: колір} для обох таблиць, clear_price_columns –
+    {sheet_row: стовпці} цін таблиці2, які стираються (значення і фон) перед фарбуванням.
+    Повертає False, якщо хоча б одна таблиця не оновилась.
+    """
+    ok = True
+    for spreadsheet_id, title, clear_columns in (
+        (GOOGLE_SPREADSHEET_ID, SHEET1_NAME, {}),
+        (GOOGLE_SPREADSHEET_ID2, SHEET2_NAME, clear_price_columns or {}),
+    ):
+        try:
+            ws_id = sheet_id(spreadsheet_id, title)
+            batch = [
+                background_request(ws_id, row, "white", col, clear_value=True)
+                for row, columns in clear_columns.items() for col in columns
+            ]
+            batch.extend(background_request(ws_id, row, color) for row, color in row_colors.items())
+            if batch:
+                open_spreadsheet(spreadsheet_id).batch_update({"requests": batch})
+        except Exception as e:
+            # Аркуш могли видалити й створити заново – наступного разу перечитаємо sheetId
+            _sheet_ids.pop((spreadsheet_id, title), None)
+            logging.exception(f"Помилка оформлення рядків {sorted(row_colors)} у аркуші {title}: {e}")
+            ok = False
+    return ok
+
+def mark_row_confirmed(sheet_row: int, clear_price_columns=()) -> bool:
+    """
+    Оформлення підтвердженої пропозиції: у таблиці2 стираються клітинки цін
+    clear_price_columns, рядок sheet_row в обох таблицях фарбується в зелений.
+    Раніше це було до десяти окремих запитів (по два на кожну клітинку і рядок
+    плюс отримання аркушів), тепер – по одному batchUpdate на таблицю.
+    """
+    return paint_rows({sheet_row: "green"}, {sheet_row: clear_price_columns})
+
+def delete_rows_batch(ws, rows):
+    """
+    Видаляє рядки rows (нумерація з 1) одним batchUpdate.
+    Суміжні рядки об'єднуються в діапазони, а діапазони йдуть у спадному порядку,
+    щоб видалення одного не зсувало індекси наступних.
+    """
+    ranges = []
+    for row in sorted(set(rows), reverse=True):
+        if ranges and ranges[-1][0] == row + 1:
+            ranges[-1][0] = row
+        else:
+            ranges.append([row, row + 1])
+    if not ranges:
+        return
+    requests = [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": ws.id,
+                    "dimension": "ROWS",
+                    "startIndex": start - 1,
+                    "endIndex": end - 1
+                }
+            }
+        }
+        for start, end in ranges
+    ]
+    ws.spreadsheet.batch_update({"requests": requests})
+    logging.debug(f"Видалено {len(set(rows))} рядків ({len(ranges)} діапазонів) у аркуші {ws.title}.")
 
 ############################################
 # Експорт бази користувачів (адмін-розділ) — без змін
@@ -122,12 +278,10 @@ def color_entire_row_red(ws, row: int):
 
 def export_database():
     logging.info("Початок експорту бази даних у Google Sheets.")
-    users_data = load_users()
-    approved = users_data.get("approved_users", {})
+    approved = get_approved_users()
     apps = load_applications()
 
-    client = init_gspread()
-    sheet = client.open_by_key(GOOGLE_SPREADSHEET_ID)
+    sheet = open_spreadsheet(GOOGLE_SPREADSHEET_ID)
 
     today = datetime.now().strftime("%d.%m")
     new_title = f"База {today}"
@@ -158,6 +312,7 @@ def export_database():
     new_ws.update(cell_range, data_matrix, value_input_option="USER_ENTERED")
     logging.debug("Дані експорту записані у лист.")
 
+    from gspread_formatting import CellFormat, TextFormat, set_column_width
     cell_format = CellFormat(
         horizontalAlignment='CENTER',
         verticalAlignment='MIDDLE',
@@ -175,69 +330,27 @@ def export_database():
     logging.info("Експорт бази даних завершено.")
 
 ############################################
-# Видалення заявки адміністратором (не змінюємо логіку)
+# Оновлення Google Sheets з даними заявки (додавання)
 ############################################
 
-async def admin_remove_app_permanently(user_id: int, app_index: int):
-    from db import load_applications, delete_application_from_file_entirely, save_applications
-    logging.info(f"Адміністратор видаляє заявку: user_id={user_id}, app_index={app_index}")
+SUBMISSION_ID_COLUMN = 53  # Ключ ідемпотентності заявки (див. publisher.py)
 
-    pause_polling()
-    logging.info("Polling призупинено перед видаленням заявки.")
-
-    apps = load_applications()
-    uid = str(user_id)
-    if uid not in apps or app_index < 0 or app_index >= len(apps[uid]):
-        logging.error("Не знайдено заявку для видалення.")
-        resume_polling()
-        return False
-
-    app = apps[uid][app_index]
-    sheet_row = app.get("sheet_row")
-    logging.debug(f"Заявка знаходиться у рядку: {sheet_row}")
-
-    delete_application_from_file_entirely(user_id, app_index)
-    logging.debug("Заявка видалена з локального файлу.")
-
-    if sheet_row:
-        try:
-            ws2 = get_worksheet2()
-            ws2.delete_rows(sheet_row)
-            logging.debug(f"Видалено рядок {sheet_row} у таблиці2.")
-            await asyncio.sleep(3)
-
-            ws1 = get_worksheet1()
-            ws1.delete_rows(sheet_row)
-            logging.debug(f"Видалено рядок {sheet_row} у таблиці1.")
-
-            updated_apps = load_applications()
-            for u_str, user_apps in updated_apps.items():
-                for a in user_apps:
-                    old_row = a.get("sheet_row", 0)
-                    if old_row and old_row > sheet_row:
-                        a["sheet_row"] = old_row - 1
-            save_applications(updated_apps)
-            logging.debug("Оновлено номери рядків для заявок після видалення.")
-
-        except Exception as e:
-            logging.exception(f"Помилка видалення рядка в Google Sheets: {e}")
-
-    logging.info("Чекаємо 20 секунд перед відновленням polling'у.")
-    await asyncio.sleep(20)
-    resume_polling()
-    logging.info("Polling відновлено після видалення заявки.")
-    return True
-
-############################################
-# Оновлення Google Sheets з даними заявки (додавання)
-############################################
 
+@timed()
 def update_google_sheet(data: dict) -> int:
+    """
+    Записує заявку в новий рядок таблиці1 і повертає номер рядка.
+    Якщо в заявці є submission_id, він пишеться першим у SUBMISSION_ID_COLUMN;
+    повторний виклик з тим самим ключем (після таймауту чи збою посеред запису)
+    знаходить цей рядок і дописує його замість створення дубля.
+    """
     logging.info("Оновлення даних заявки в Google Sheets.")
     ws = get_worksheet1()
-    ensure_columns(ws, 52)
+    ensure_columns(ws, SUBMISSION_ID_COLUMN)
 
     col_a = ws.col_values(1)
+    submission_id = data.get("submission_id", "")
+    keys = ws.col_values(SUBMISSION_ID_COLUMN) if submission_id else []
     numeric_values = []
     for value in col_a[1:]:
         try:
@@ -245,8 +358,18 @@ def update_google_sheet(data: dict) -> int:
         except ValueError:
             continue
     last_number = numeric_values[-1] if numeric_values else 0
-    new_request_number = last_number + 1
-    new_row = len(col_a) + 1
+
+    if submission_id and submission_id in keys:
+        new_row = keys.index(submission_id) + 1
+        existing_number = col_a[new_row - 1] if new_row <= len(col_a) else ""
+        new_request_number = int(existing_number) if existing_number.isdigit() else last_number + 1
+        logging.info(f"Заявку {submission_id} вже почато записувати в рядок {new_row}, дописуємо.")
+    else:
+        new_request_number = last_number + 1
+        # Рядок, де встиг записатися лише ключ, теж зайнятий
+        new_row = max(len(col_a), len(keys)) + 1
+        if submission_id:
+            ws.update_cell(new_row, SUBMISSION_ID_COLUMN, submission_id)
     logging.debug(f"Новий номер заявки: {new_request_number}, рядок: {new_row}")
     ws.update_cell(new_row, 1, new_request_number)
 
@@ -302,11 +425,12 @@ def update_google_sheet(data: dict) -> int:
 # Авто-розрахунок ціни після редагування
 ############################################
 
+@timed()
 def parse_price_sheet():
     logging.info("Парсинг прайс-листа з Google Sheets.")
     ws = get_worksheet2_2()
     all_values = ws.get_all_values()
-    logging.debug(f"Отримано {len(all_values)} рядків з прайс-листа.")
+    logging.debug("Отримано %d рядків з прайс-листа.", len(all_values))
 
     distance_data = []
     row_idx = 2
@@ -328,7 +452,7 @@ def parse_price_sheet():
         try:
             dist_min = float(splitted[0])
             dist_max = float(splitted[1])
-            logging.debug(f"Рядок {row_idx}: від {dist_min} до {dist_max}")
+            logging.debug("Рядок %d: від %s до %s", row_idx, dist_min, dist_max)
         except Exception as e:
             logging.error(f"Помилка перетворення відстані в рядку {row_idx}: {e}")
             row_idx += 1
@@ -350,7 +474,7 @@ def parse_price_sheet():
         distance_data.append((dist_min, dist_max, tarif_grn, tarif_usd, tarif_eur))
         row_idx += 1
 
-    logging.info(f"Знайдено {len(distance_data)} діапазонів відстаней.")
+    logging.info("Знайдено %d діапазонів відстаней.", len(distance_data))
 
     blocks = {
         "грн": {},
@@ -423,24 +547,38 @@ def geocode_address(address: str) -> dict:
         "key": GOOGLE_MAPS_API_KEY
     }
     try:
-        response = requests.get(geocode_url, params=params, timeout=10)
+        response = _http().get(geocode_url, params=params, timeout=10)
         response.raise_for_status()
         result = response.json()
+        MAPS_CALLS.inc(api="geocode", status=result.get("status", "UNKNOWN"))
+        record_api_call("maps", "geocode", result.get("status", "UNKNOWN"))
         if result.get("status") == "OK" and result.get("results"):
             loc = result["results"][0]["geometry"]["location"]
             return loc
         else:
             logging.error(f"Не вдалося геокодувати адресу: {address}, статус: {result.get('status')}")
     except Exception as e:
+        MAPS_CALLS.inc(api="geocode", status="error")
+        record_api_call("maps", "geocode", "error")
         logging.exception(f"Помилка геокодування адреси: {address} - {e}")
     return None
 
+# Відстань до населеного пункту не змінюється, тож кешуємо успішні результати
+_distance_cache = {}
+DISTANCE_CACHE_MAX_SIZE = 5000
+
 def get_distance_km(region: str, district: str, city: str) -> float:
     if not GOOGLE_MAPS_API_KEY:
         logging.error("Відсутній GOOGLE_MAPS_API_KEY")
         return None
 
     address = f"{city}, {district} район, {region} область, Ukraine"
+    cached = _distance_cache.get(address)
+    if cached is not None:
+        DISTANCE_CACHE.inc(result="hit")
+        return cached
+    DISTANCE_CACHE.inc(result="miss")
+
     destination_location = geocode_address(address)
     if not destination_location:
         return None
@@ -482,8 +620,11 @@ def get_distance_km(region: str, district: str, city: str) -> float:
         "X-Goog-FieldMask": "duration,distanceMeters,originIndex,destinationIndex"
     }
 
+    http = _http()
     try:
-        r = requests.post(url, headers=headers, json=body, timeout=15)
+        r = http.post(url, headers=headers, json=body, timeout=15)
+        MAPS_CALLS.inc(api="routes", status=r.status_code)
+        record_api_call("maps", "computeRouteMatrix", r.status_code)
         r.raise_for_status()
         response_text = r.text.strip()
 
@@ -513,7 +654,16 @@ def get_distance_km(region: str, district: str, city: str) -> float:
 
         dist_meters = parsed.get("distanceMeters", 0)
         dist_km = dist_meters / 1000.0
+        if len(_distance_cache) >= DISTANCE_CACHE_MAX_SIZE:
+            _distance_cache.pop(next(iter(_distance_cache)))
+        _distance_cache[address] = dist_km
         return dist_km
+    except http.RequestException as e:
+        if e.response is None:
+            MAPS_CALLS.inc(api="routes", status="error")
+            record_api_call("maps", "computeRouteMatrix", "error")
+        logging.exception(f"Помилка Routes API: {e}")
+        return None
     except Exception as e:
         logging.exception(f"Помилка Routes API: {e}")
         return None
@@ -567,6 +717,7 @@ def set_bot_price_in_table2(row: int, price):
     ws2 = get_worksheet2()
     ws2.update_cell(row, 13, price)
 
+@timed()
 def calculate_and_set_bot_price(app, row, price_config):
     """
     Спроба розрахувати ціну від бота (якщо в таблиці не вказано manager_price).
@@ -650,7 +801,7 @@ def update_worksheet1_cells_for_edit(row: int, changed_fields: dict):
             ws.update_cell(row, col_index, val)
 
         cell_range = f"{rowcol_to_a1(row, col_index)}:{rowcol_to_a1(row, col_index)}"
-        format_cell_range(ws, cell_range, yellow_format)
+        format_cell_range(ws, cell_range, background_format("yellow"))
 
 def update_worksheet2_cells_for_edit_color(sheet_row: int, changed_fields: dict):
     ws = get_worksheet2()
@@ -666,48 +817,61 @@ def update_worksheet2_cells_for_edit_color(sheet_row: int, changed_fields: dict)
             continue
         col_index = field_map[key]
         cell_range = f"{rowcol_to_a1(sheet_row, col_index)}:{rowcol_to_a1(sheet_row, col_index)}"
-        format_cell_range(ws, cell_range, yellow_format)
+        format_cell_range(ws, cell_range, background_format("yellow"))
 
 async def re_run_autocalc_for_app(uid: str, index: int):
     """
     Після редагування заявки замість негайного автоперерахунку
     просто видаляємо поточну bot_price і очищаємо клітинку в Google Sheets.
     Наступного разу (у poll_manager_proposals) бот уже сам перераховує ціну.
+    Клітинку очищаємо до запису файлу: поки bot_price у файлі, опитування
+    цю заявку не перераховує і не запише ціну, яку ми потім зітремо.
     """
-    apps = load_applications()
-    user_apps = apps.get(uid, [])
-    if index < 0 or index >= len(user_apps):
-        return
+    def eligible_app(apps):
+        user_apps = apps.get(uid, [])
+        if index < 0 or index >= len(user_apps):
+            return None
+        app = user_apps[index]
+        status = app.get("proposal_status", "active")
+        if status in ("deleted", "confirmed"):
+            # Якщо заявка видалена або підтверджена – нічого не робимо
+            return None
+        manager_price_in_sheet = app.get("original_manager_price", "").strip()
+        if manager_price_in_sheet:
+            # Якщо менеджерська ціна вже встановлена – не ліземо
+            return None
+        if not app.get("sheet_row"):
+            # Якщо немає рядка у таблиці – нічого не робимо
+            return None
+        return app
 
-    app = user_apps[index]
-    status = app.get("proposal_status", "active")
-    if status in ("deleted", "confirmed"):
-        # Якщо заявка видалена або підтверджена – нічого не робимо
+    app = eligible_app(load_applications())
+    if app is None:
         return
 
-    manager_price_in_sheet = app.get("original_manager_price", "").strip()
-    if manager_price_in_sheet:
-        # Якщо менеджерська ціна вже встановлена – не ліземо
-        return
+    # Видаляємо ціну бота з Google Sheets (колонка 13 у вашому прикладі) – поза store_lock(),
+    # під локом рядка: номер рядка береться вже після захоплення
+    async with sheet_rows_lock.rows(partial(application_row_span, uid, app.get("timestamp", ""))) as rows:
+        if rows is None:
+            return
+        delete_price_cell_in_table2(rows[0], col=13)
 
-    row_idx = app.get("sheet_row")
-    if not row_idx:
-        # Якщо немає рядка у таблиці – нічого не робимо
-        return
+    with store_lock():
+        apps = load_applications()
+        app = eligible_app(apps)
+        if app is None:
+            return
 
-    # Якщо у нас вже була ботова ціна – видаляємо
-    if "bot_price" in app:
-        del app["bot_price"]
+        # Якщо у нас вже була ботова ціна – видаляємо
+        if "bot_price" in app:
+            del app["bot_price"]
 
-    # Обнулюємо пропозицію: щоб у файлі не залишався запис
-    app["proposal"] = ""
-    app["proposal_status"] = "active"  # або "waiting", залежить від вашої логіки
+        # Обнулюємо пропозицію: щоб у файлі не залишався запис
+        app["proposal"] = ""
+        app["proposal_status"] = "active"  # або "waiting", залежить від вашої логіки
 
-    # Видаляємо ціну бота з Google Sheets (колонка 13 у вашому прикладі)
-    from gsheet_utils import delete_price_cell_in_table2
-    delete_price_cell_in_table2(row_idx, col=13)
+        save_applications(apps)
 
-    save_applications(apps)
     # Після цього poll_manager_proposals() при наступному циклі помітить,
     # що manager_price і bot_price відсутні – і спробує заново розрахувати.
 
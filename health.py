@@ -0,0 +1,116 @@
+# health.py
+import logging
+
+from aiohttp import web
+
+from config import (
+    HEALTH_MAX_LOOP_LAG_SECONDS, HEALTH_POLL_STALE_SECONDS, LOOP_LAG_SAMPLE_SECONDS
+)
+from metrics import render_metrics
+from tracing import loop_lag_status
+from timing import poller_status
+from leader import leading_for
+from api_usage import last_call_status
+from outbox import outbox_depth
+from publisher import publish_queue_depth
+import db
+
+############################################
+# /healthz та /readyz
+############################################
+# /healthz – завжди 200, поки процес відповідає; у тілі – повний звіт.
+# /readyz – 503, якщо інстанс завис і його треба перезапустити:
+# - цикл подій блокувався довше за HEALTH_MAX_LOOP_LAG_SECONDS (або монітор затримки не працює);
+# - цей процес – лідер, а poller не мав успішного циклу HEALTH_POLL_STALE_SECONDS
+#   (або поточний цикл триває довше).
+# Недоступність Google і глибина outbox / черги публікації лише показуються: перезапуск їх не виправить.
+
+# Цикли, які мають регулярно завершуватись успішно; deleted_purge – раз на добу, перевіряється лише на зависання
+WATCHED_POLLERS = ("manager_proposals", "topicality")
+
+
+def _reachable(status: str) -> bool:
+    return status != "error" and not status.startswith("5")
+
+
+def health_report() -> dict:
+    failures = []
+
+    loop = loop_lag_status()
+    if loop["since_sample"] is None or loop["since_sample"] > max(HEALTH_MAX_LOOP_LAG_SECONDS, 4 * LOOP_LAG_SAMPLE_SECONDS):
+        failures.append("loop_lag_monitor_stalled")
+    elif loop["max"] is not None and loop["max"] > HEALTH_MAX_LOOP_LAG_SECONDS:
+        failures.append("loop_blocked")
+
+    pollers = poller_status()
+    leading = leading_for()
+    if leading is not None:
+        for name, state in pollers.items():
+            if state["running_for"] is not None and state["running_for"] > HEALTH_POLL_STALE_SECONDS:
+                failures.append(f"poller_stuck:{name}")
+        for name in WATCHED_POLLERS:
+            since_success = (pollers.get(name) or {}).get("since_success")
+            # Після отримання лідерства даємо поллеру той самий запас часу
+            silence = min(since_success, leading) if since_success is not None else leading
+            if silence > HEALTH_POLL_STALE_SECONDS:
+                failures.append(f"poller_stale:{name}")
+
+    apis = last_call_status()
+    for state in apis.values():
+        state["reachable"] = _reachable(state["status"])
+
+    try:
+        outbox = outbox_depth()
+    except Exception as e:
+        logging.warning(f"[HEALTH] Не вдалося прочитати глибину outbox: {e}")
+        outbox = None
+    try:
+        publish_queue = publish_queue_depth()
+    except Exception as e:
+        logging.warning(f"[HEALTH] Не вдалося прочитати глибину черги публікації: {e}")
+        publish_queue = None
+
+    return {
+        "status": "fail" if failures else "ok",
+        "failures": failures,
+        "loop_lag": loop,
+        "leader_for": round(leading, 3) if leading is not None else None,
+        "pollers": pollers,
+        "google_apis": apis,
+        "outbox_depth": outbox,
+        "publish_queue_depth": publish_queue,
+        "store_seconds": {op: round(seconds, 4) for op, seconds in db.last_store_seconds.items()},
+    }
+
+
+async def handle_healthz(request: web.Request):
+    return web.json_response(health_report())
+
+
+async def handle_readyz(request: web.Request):
+    report = health_report()
+    return web.json_response(report, status=503 if report["failures"] else 200)
+
+
+async def handle_metrics(request: web.Request):
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Prometheus-Format": "0.0.4"})
+
+
+def health_routes():
+    return [
+        web.get('/healthz', handle_healthz),
+        web.get('/readyz', handle_readyz),
+    ]
+
+
+async def start_health_server(port: int):
+    """Окремий HTTP-сервер з /healthz, /readyz і /metrics (для воркера: його поллери, публікація, outbox)."""
+    app_web = web.Application()
+    app_web.add_routes([web.get('/metrics', handle_metrics), *health_routes()])
+    runner = web.AppRunner(app_web)
+    await runner.setup()
+    site = web.TCPSite(runner, '0.0.0.0', port)
+    await site.start()
+    logging.info(f"Health-сервер запущено на порті {port}.")
+    return runner
@@ -18,7 +18,7 @@ def get_admin_root_menu():
 def get_admin_moderation_menu():
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
     kb.row("Користувачі на модерацію", "База користувачів")
-    kb.add("Очистити заблокованих")
+    kb.row("Масова модерація", "Очистити заблокованих")
     kb.add("Назад")
     return kb
 
@@ -27,7 +27,7 @@ def get_admin_requests_menu():
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
     kb.row("Підтверджені", "Видалені")
     kb.add("Видалення заявок", "Редагування заявок")
-    kb.add("Ціна бота")
+    kb.add("Масова зміна статусу", "Ціна бота")
     kb.add("Назад")
     return kb
     
@@ -0,0 +1,130 @@
+# leader.py
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+
+from config import DATA_DIR, INSTANCE_ID, LEADER_LEASE_SECONDS, LEADER_HEARTBEAT_SECONDS
+
+LEASE_DB_FILE = os.path.join(DATA_DIR, "leader.sqlite3")
+LEASE_NAME = "background_pollers"
+
+_leading_since = None  # time.monotonic(), коли ця репліка запустила фонові задачі
+
+############################################
+# Оренда (lease) лідерства у SQLite
+############################################
+
+def _connect():
+    conn = sqlite3.connect(LEASE_DB_FILE, timeout=10, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS leases ("
+        "name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+    )
+    return conn
+
+def try_acquire_lease(name: str = LEASE_NAME, holder: str = INSTANCE_ID, ttl: int = LEADER_LEASE_SECONDS) -> bool:
+    """
+    Захоплює або продовжує оренду `name` для `holder`.
+    Оренду можна перехопити лише тоді, коли попередній власник
+    не продовжував її довше за ttl секунд.
+    """
+    now = time.time()
+    try:
+        conn = _connect()
+    except sqlite3.Error as e:
+        logging.error(f"[LEADER] Не вдалося відкрити {LEASE_DB_FILE}: {e}")
+        return False
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        if row is None or row[0] == holder or row[1] < now:
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                (name, holder, now + ttl)
+            )
+            conn.execute("COMMIT")
+            return True
+        conn.execute("COMMIT")
+        return False
+    except sqlite3.Error as e:
+        logging.error(f"[LEADER] Помилка роботи з орендою {name}: {e}")
+        try:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+        return False
+    finally:
+        conn.close()
+
+def release_lease(name: str = LEASE_NAME, holder: str = INSTANCE_ID):
+    try:
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logging.error(f"[LEADER] Не вдалося звільнити оренду {name}: {e}")
+
+############################################
+# Запуск фонових задач лише на лідері
+############################################
+
+def _report_job_exit(task: asyncio.Task):
+    if task.cancelled():
+        logging.error(f"[LEADER] Фонову задачу {task.get_name()} несподівано скасовано, перезапускаємо.")
+        return
+    error = task.exception()
+    if error is not None:
+        logging.error(f"[LEADER] Фонова задача {task.get_name()} впала: {error!r}, перезапускаємо.", exc_info=error)
+    else:
+        logging.error(f"[LEADER] Фонова задача {task.get_name()} завершилась, перезапускаємо.")
+
+
+async def run_as_leader(job_factories, name: str = LEASE_NAME):
+    """
+    Фонове завдання:
+    - Кожні LEADER_HEARTBEAT_SECONDS секунд продовжує (або намагається захопити) оренду.
+    - Щойно репліка стає лідером, запускає всі задачі з job_factories.
+    - Задачу, що впала чи завершилась, на наступному heartbeat запускає знову (виняток – у лог).
+    - Якщо оренду втрачено (наприклад, цикл подій був заблокований довше за ttl),
+      задачі скасовуються, і репліка знову чекає на своє лідерство.
+    Запити до SQLite (timeout=10) виконуються в потоці, щоб не блокувати цикл подій.
+    """
+    global _leading_since
+    job_factories = list(job_factories)
+    tasks = []
+    try:
+        while True:
+            is_leader = await asyncio.to_thread(try_acquire_lease, name)
+            if is_leader and not tasks:
+                logging.info(f"[LEADER] {INSTANCE_ID} став лідером, запускаємо фонові задачі.")
+                tasks = [asyncio.create_task(factory(), name=factory.__name__) for factory in job_factories]
+                _leading_since = time.monotonic()
+            elif is_leader:
+                for i, task in enumerate(tasks):
+                    if task.done():
+                        _report_job_exit(task)
+                        tasks[i] = asyncio.create_task(job_factories[i](), name=job_factories[i].__name__)
+            elif tasks:
+                logging.warning(f"[LEADER] {INSTANCE_ID} втратив лідерство, зупиняємо фонові задачі.")
+                for task in tasks:
+                    task.cancel()
+                tasks = []
+                _leading_since = None
+            await asyncio.sleep(LEADER_HEARTBEAT_SECONDS)
+    finally:
+        _leading_since = None
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            release_lease(name)
+
+
+def leading_for():
+    """Скільки секунд ця репліка виконує фонові задачі як лідер (None – не лідер)."""
+    if _leading_since is None:
+        return None
+    return time.monotonic() - _leading_since
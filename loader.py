@@ -1,17 +1,13 @@
 # loader.py
 from aiogram import Bot, Dispatcher
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
-from config import TELEGRAM_TOKEN
+from config import TELEGRAM_TOKEN, RECORD_UPDATES_FILE, RECORD_UPDATES_SALT
+from middlewares import MetricsMiddleware, TracingMiddleware, UpdateRecorderMiddleware
 
 bot = Bot(token=TELEGRAM_TOKEN, parse_mode="HTML")
 dp = Dispatcher(bot, storage=MemoryStorage())
-
-POLLING_PAUSED = False
-
-def pause_polling():
-    global POLLING_PAUSED
-    POLLING_PAUSED = True
-
-def resume_polling():
-    global POLLING_PAUSED
-    POLLING_PAUSED = False
+dp.middleware.setup(MetricsMiddleware())
+dp.middleware.setup(TracingMiddleware())
+if RECORD_UPDATES_FILE:
+    from recorder import UpdateRecorder
+    dp.middleware.setup(UpdateRecorderMiddleware(UpdateRecorder(RECORD_UPDATES_FILE, RECORD_UPDATES_SALT)))
@@ -0,0 +1,190 @@
+# locks.py
+import os
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+
+from config import DATA_DIR, INSTANCE_ID
+
+ROW_LOCKS_DB_FILE = os.path.join(DATA_DIR, "row_locks.sqlite3")
+ROW_LOCK_POLL_SECONDS = 0.05  # як часто той, хто чекає, перевіряє лок
+ROW_LOCK_TTL_SECONDS = 30  # запис без продовження довше за цей час – від процесу, що впав
+
+############################################
+# Лок діапазонів рядків таблиці (спільний для процесів)
+############################################
+# Бот і воркер (SEPARATE_WORKER) працюють з тими самими таблицями, тож лок
+# живе не в пам'яті, а в SQLite у DATA_DIR: кожен тримач або письменник,
+# що чекає, – рядок таблиці row_locks. Захоплення – транзакція BEGIN IMMEDIATE
+# у потоці (asyncio.to_thread): перевіряємо конфлікти і вставляємо свій запис.
+# Процес продовжує свої записи окремим потоком (не циклом подій – його можуть
+# блокувати синхронні запити до Google); записи процесу, що впав, перестають
+# продовжуватись і через ROW_LOCK_TTL_SECONDS видаляються.
+
+_OWNER = f"{INSTANCE_ID}-{uuid.uuid4().hex[:8]}"
+FIRST_DATA_ROW = 2  # рядок 1 – заголовки
+
+
+def _overlaps(first, last, other_first, other_last) -> bool:
+    """Діапазони [first, last] включно; last=None – до кінця таблиці."""
+    return (last is None or other_first <= last) and (other_last is None or first <= other_last)
+
+
+def _connect():
+    conn = sqlite3.connect(ROW_LOCKS_DB_FILE, timeout=10, isolation_level=None)
+    # Після збою машини локів не лишається – надійний запис на диск не потрібен
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS row_locks ("
+        "token TEXT PRIMARY KEY, owner TEXT NOT NULL, exclusive INTEGER NOT NULL, "
+        "first_row INTEGER NOT NULL, last_row INTEGER, granted INTEGER NOT NULL, touched_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def _try_acquire(token, exclusive, first, last) -> bool:
+    """
+    Одна спроба захопити [first, last]. Письменник, якому довелося чекати,
+    лишає запис granted=0 – нові читачі його діапазону чекають разом з ним.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM row_locks WHERE touched_at < ?", (now - ROW_LOCK_TTL_SECONDS,))
+        blocked = False
+        for held_exclusive, held_first, held_last, granted in conn.execute(
+            "SELECT exclusive, first_row, last_row, granted FROM row_locks WHERE token != ?", (token,)
+        ):
+            if not _overlaps(first, last, held_first, held_last):
+                continue
+            if granted and (exclusive or held_exclusive):
+                blocked = True
+                break
+            if not granted and held_exclusive and not exclusive:
+                blocked = True
+                break
+        if not blocked or exclusive:
+            conn.execute(
+                "INSERT OR REPLACE INTO row_locks (token, owner, exclusive, first_row, last_row, granted, touched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (token, _OWNER, int(exclusive), first, last, int(not blocked), now)
+            )
+        conn.execute("COMMIT")
+        return not blocked
+    except BaseException:
+        try:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+        raise
+    finally:
+        conn.close()
+
+
+def _release(token):
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM row_locks WHERE token = ?", (token,))
+    finally:
+        conn.close()
+
+
+_keepalive_thread = None
+_keepalive_start = threading.Lock()
+
+
+def _keepalive():
+    while True:
+        time.sleep(ROW_LOCK_TTL_SECONDS / 3)
+        try:
+            conn = _connect()
+            try:
+                conn.execute("UPDATE row_locks SET touched_at = ? WHERE owner = ?", (time.time(), _OWNER))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"[ROW LOCK] Не вдалося продовжити локи рядків: {e}")
+
+
+def _ensure_keepalive():
+    global _keepalive_thread
+    with _keepalive_start:
+        if _keepalive_thread is None:
+            _keepalive_thread = threading.Thread(target=_keepalive, name="row-locks-keepalive", daemon=True)
+            _keepalive_thread.start()
+
+
+async def _in_thread(func, *args):
+    # Крок у потоці доводимо до кінця навіть при скасуванні задачі –
+    # інакше запис у row_locks міг би з'явитись уже після нашого _release
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+class RowRangeLock:
+    """
+    Лок «багато читачів / один письменник» на діапазони рядків, спільний
+    для всіх процесів з тим самим DATA_DIR.
+    Читач бере рядки, які читає або фарбує: [first, last]. Видалення рядка
+    зсуває всі рядки під ним, тож письменник бере [first, кінець таблиці].
+    Конфліктують лише діапазони, що перетинаються: фарбування рядка 5
+    не чекає на видалення рядка 40.
+    Письменник має пріоритет: поки він чекає, нові читачі його діапазону
+    не заходять, тож видалення не «голодує» за постійно працюючих фонових задач.
+    Вкладені захоплення діапазонів, що перетинаються, заборонені (взаємне очікування).
+    """
+
+    @asynccontextmanager
+    async def _hold(self, exclusive, first, last):
+        _ensure_keepalive()
+        token = uuid.uuid4().hex
+        try:
+            while not await _in_thread(_try_acquire, token, exclusive, first, last):
+                await asyncio.sleep(ROW_LOCK_POLL_SECONDS)
+            yield
+        finally:
+            await _in_thread(_release, token)
+
+    def reader(self, first: int = FIRST_DATA_ROW, last: int = None):
+        """Рядки [first, last]; без аргументів – уся таблиця (повне читання, дописування в кінець)."""
+        return self._hold(False, first, last)
+
+    def writer(self, first: int = FIRST_DATA_ROW):
+        """Видалення рядків, починаючи з first: рядки нижче зсуваються."""
+        return self._hold(True, first, None)
+
+    @asynccontextmanager
+    async def rows(self, resolve, exclusive: bool = False):
+        """
+        Лок для рядків, номер яких відомий лише з файлу заявок і може змінитися,
+        поки ми чекаємо на лок (видалення вище зсуває рядки).
+        resolve() -> поточний (first, last) або None, якщо рядків немає.
+        Після захоплення діапазон рахується знову; якщо він змінився – лок
+        перезахоплюється. Повертає актуальний (first, last) або None.
+        """
+        while True:
+            span = resolve()
+            if span is None:
+                yield None
+                return
+            first, last = span
+            async with self._hold(exclusive, first, None if exclusive else last):
+                if resolve() == span:
+                    yield span
+                    return
+
+
+# Розкладка рядків у таблицях (sheet_row заявок).
+# Читачі: фонові задачі, які зіставляють рядки таблиці із заявками або
+# фарбують/заповнюють рядок конкретної заявки, публікація нових заявок.
+# Письменники: видалення рядків і перенумерація sheet_row.
+sheet_rows_lock = RowRangeLock()
@@ -0,0 +1,183 @@
+# logging_setup.py
+import sys
+import json
+import queue
+import atexit
+import logging
+import traceback
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+############################################
+# Неблокуюче логування
+############################################
+# Хендлери бота лише кладуть LogRecord у чергу (QueueHandler); форматування
+# і запис у stdout/stderr робить окремий потік QueueListener. До черги запис
+# проходить два фільтри:
+# - рівні по модулях (LOG_LEVELS="gsheet_utils=INFO,aiogram=WARNING"): модулі
+#   бота логують через кореневий логер, тож для них ключ – ім'я файлу (record.module),
+#   для бібліотек – ім'я логера;
+# - семплінг DEBUG: з одного рядка коду пропускаємо не більше N записів за хвилину,
+#   кількість пропущених дописується до наступного запису з цього рядка.
+
+_TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] %(message)s"
+_TEXT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+def parse_levels(spec: str) -> dict:
+    """'gsheet_utils=INFO,aiogram=WARNING' -> {'gsheet_utils': 20, 'aiogram': 30}"""
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if not name or not level:
+            continue
+        value = logging.getLevelName(level)
+        if not isinstance(value, int):
+            raise RuntimeError(f"Невідомий рівень логування {level!r} для {name!r} у LOG_LEVELS")
+        levels[name] = value
+    return levels
+
+
+class ModuleLevelFilter(logging.Filter):
+    def __init__(self, default_level: int, levels: dict):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+        self._cache = {}
+
+    def _level_for(self, key: str) -> int:
+        level = self._cache.get(key)
+        if level is None:
+            level = self.default_level
+            # Найдовший збіг префікса: "aiogram" покриває "aiogram.dispatcher"
+            parts = key.split(".")
+            for i in range(len(parts), 0, -1):
+                candidate = ".".join(parts[:i])
+                if candidate in self.levels:
+                    level = self.levels[candidate]
+                    break
+            self._cache[key] = level
+        return level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = record.module if record.name == "root" else record.name
+        return record.levelno >= self._level_for(key)
+
+
+class SamplingFilter(logging.Filter):
+    """Не більше per_minute записів рівня <= max_level з одного місця в коді за хвилину."""
+
+    def __init__(self, per_minute: int, max_level: int = logging.DEBUG):
+        super().__init__()
+        self.per_minute = per_minute
+        self.max_level = max_level
+        self._sites = {}  # (pathname, lineno) -> [хвилина, пропущено, прийнято]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_minute <= 0 or record.levelno > self.max_level:
+            return True
+        minute = int(record.created // 60)
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or state[0] != minute:
+                suppressed = state[1] if state else 0
+                state = self._sites[site] = [minute, 0, 0]
+            else:
+                suppressed = 0
+            if state[2] >= self.per_minute:
+                state[1] += 1
+                return False
+            state[2] += 1
+        if suppressed:
+            record.sampled_out = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = "".join(traceback.format_exception(*record.exc_info))
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        sampled_out = getattr(record, "sampled_out", 0)
+        if sampled_out:
+            text += f" (+{sampled_out} схожих записів пропущено)"
+        return text
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Стандартний QueueHandler.prepare форматує запис (включно з traceback) у
+    потоці, що логує. Тут у потоці хендлера лише підставляються аргументи
+    (щоб змінювані об'єкти не встигли змінитися), решта – у потоці слухача.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", levels: str = "", sample_per_minute: int = 20):
+    global _listener
+    if _listener is not None:
+        return
+
+    default_level = logging.getLevelName(level.upper())
+    if not isinstance(default_level, int):
+        raise RuntimeError(f"Невідомий LOG_LEVEL: {level!r}")
+    module_levels = parse_levels(levels)
+
+    stream = logging.StreamHandler(sys.stderr)
+    if fmt == "text":
+        stream.setFormatter(TextFormatter(_TEXT_FORMAT, _TEXT_DATEFMT))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = BackgroundQueueHandler(log_queue)
+    handler.addFilter(ModuleLevelFilter(default_level, module_levels))
+    handler.addFilter(SamplingFilter(sample_per_minute))
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    # Логер пропускає все, що може знадобитися хоча б одному модулю; точний відбір – у фільтрі
+    root.setLevel(min([default_level, *module_levels.values()]))
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Дописує чергу і зупиняє потік слухача."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
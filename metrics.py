@@ -0,0 +1,197 @@
+# metrics.py
+import time
+from functools import wraps
+
+############################################
+# Мінімальні метрики у форматі Prometheus (text exposition 0.0.4)
+############################################
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """
+    Gauge задається або напряму (set), або функцією, яку викликаємо під час збору метрик.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def _samples(self):
+        if self._callback is not None:
+            try:
+                self._values[()] = self._callback()
+            except Exception:
+                self._values.pop((), None)
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        counts = state[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        state[1] += value
+        state[2] += 1
+
+    def time(self, **labels):
+        """Декоратор: вимірює тривалість виклику функції."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def _samples(self):
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+############################################
+# Метрики бота
+############################################
+
+HANDLER_SECONDS = Histogram(
+    "bot_handler_seconds", "Час обробки апдейту хендлером, за станом FSM", ("kind", "state")
+)
+SHEETS_CALLS = Counter(
+    "bot_sheets_api_calls_total", "Запити до Google Sheets/Drive API", ("method",)
+)
+SHEETS_ERRORS = Counter(
+    "bot_sheets_api_errors_total", "Запити до Google Sheets/Drive API, що завершились помилкою", ("method",)
+)
+SHEETS_SECONDS = Histogram(
+    "bot_sheets_api_seconds", "Тривалість запиту до Google Sheets/Drive API", ("method",)
+)
+MAPS_CALLS = Counter(
+    "bot_maps_api_calls_total", "Запити до Geocoding/Routes API", ("api", "status")
+)
+DISTANCE_CACHE = Counter(
+    "bot_distance_cache_total", "Звернення до кешу відстаней (hit/miss)", ("result",)
+)
+POLL_CYCLE_SECONDS = Histogram(
+    "bot_poll_cycle_seconds", "Тривалість фази циклу фонової задачі", ("poller", "phase")
+)
+SLOW_UPDATES = Counter(
+    "bot_slow_updates_total", "Апдейти, оброблені довше за SLOW_UPDATE_SECONDS", ("handler",)
+)
+LOOP_LAG_SECONDS = Histogram(
+    "bot_event_loop_lag_seconds", "Запізнення циклу подій відносно запланованого пробудження",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+STORE_SECONDS = Histogram(
+    "bot_store_seconds", "Час читання/запису файлів даних", ("op",)
+)
+
+
+def _outbox_depth():
+    from outbox import outbox_depth
+    return outbox_depth()
+
+
+OUTBOX_DEPTH = Gauge(
+    "bot_outbox_depth", "Кількість повідомлень у черзі outbox", callback=_outbox_depth
+)
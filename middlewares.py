@@ -0,0 +1,104 @@
+# middlewares.py
+import json
+import time
+import logging
+
+from aiogram import types
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from metrics import HANDLER_SECONDS
+from tracing import start_trace, finish_trace, set_current_handler
+
+############################################
+# Метрики часу обробки апдейтів
+############################################
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Записує у HANDLER_SECONDS час обробки кожного повідомлення та callback-запиту
+    з міткою стану FSM, у якому був користувач на момент апдейту.
+    """
+
+    async def _start(self, data: dict):
+        data["_metrics_started"] = time.perf_counter()
+        state = await self.manager.dispatcher.current_state().get_state()
+        data["_metrics_state"] = state or "none"
+
+    def _finish(self, kind: str, data: dict):
+        started = data.get("_metrics_started")
+        if started is not None:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, kind=kind, state=data.get("_metrics_state", "none"))
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        await self._start(data)
+
+    async def on_post_process_message(self, message: types.Message, results, data: dict):
+        self._finish("message", data)
+
+    async def on_pre_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        await self._start(data)
+
+    async def on_post_process_callback_query(self, query: types.CallbackQuery, results, data: dict):
+        self._finish("callback_query", data)
+
+
+############################################
+# Трасування апдейтів
+############################################
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Відкриває UpdateTrace на кожне повідомлення та callback-запит:
+    прив'язує до нього хендлер (current_handler aiogram), стан FSM,
+    а також усі виклики сховища та Google Sheets усередині апдейту.
+    Повільні апдейти логуються з розбивкою часу (tracing.finish_trace).
+    """
+
+    async def _start(self, kind: str, user_id, data: dict):
+        state = await self.manager.dispatcher.current_state().get_state()
+        data["_trace"] = start_trace(kind, user_id, state or "none")
+
+    def _process(self):
+        set_current_handler(current_handler.get(None))
+
+    def _finish(self, data: dict):
+        trace = data.pop("_trace", None)
+        if trace is not None:
+            finish_trace(*trace)
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        await self._start("message", message.from_user.id if message.from_user else None, data)
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        self._process()
+
+    async def on_post_process_message(self, message: types.Message, results, data: dict):
+        self._finish(data)
+
+    async def on_pre_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        await self._start("callback_query", query.from_user.id, data)
+
+    async def on_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        self._process()
+
+    async def on_post_process_callback_query(self, query: types.CallbackQuery, results, data: dict):
+        self._finish(data)
+
+
+############################################
+# Запис апдейтів для replay
+############################################
+
+class UpdateRecorderMiddleware(BaseMiddleware):
+    """Пише кожен вхідний апдейт (анонімізований) у JSONL через recorder.UpdateRecorder."""
+
+    def __init__(self, recorder):
+        super().__init__()
+        self.recorder = recorder
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        try:
+            self.recorder.record(json.loads(update.as_json()))
+        except Exception as e:
+            logging.exception(f"[RECORDER] Не вдалося записати апдейт {update.update_id}: {e}")
@@ -0,0 +1,198 @@
+# models.py
+import sys
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+
+############################################
+# Запис заявки
+############################################
+# У applications.json заявка – вільний словник, числа в ньому – рядки.
+# ApplicationRecord – компактне подання одного запису для гарячих циклів:
+# відомі поля лежать у __slots__ (без словника на кожен екземпляр), рядки з
+# невеликою кількістю різних значень (область, культура, валюта, дані ФГ,
+# кількість/ціна, ...) інтерновані, статус – ApplicationStatus, числові поля
+# розібрані один раз (<поле>_value; однакові рядки дають спільний float).
+# Невідомі ключі зберігаються в extra, а порядок ключів – у кортежі layout,
+# спільному для записів з однаковим набором ключів, тож to_dict() повертає
+# рівно той словник, з якого запис створено.
+
+class ApplicationStatus(str, Enum):
+    ACTIVE = "active"
+    WAITING = "waiting"
+    AGREED = "Agreed"
+    CONFIRMED = "confirmed"
+    DELETED = "deleted"
+
+    def __str__(self):
+        # Як рядок у файлі: "deleted", а не "ApplicationStatus.DELETED" (мітки, пошук, f-рядки)
+        return self.value
+
+
+_STATUS_VALUES = {status: status.value for status in ApplicationStatus}  # без повільного дескриптора .value
+
+FIELDS = (
+    "user_id", "chat_id", "timestamp", "submission_id", "sheet_row",
+    "fgh_name", "edrpou", "phone", "region", "district", "city",
+    "group", "culture", "quantity", "payment_form", "currency", "price", "extra_fields",
+    "proposal_status", "proposal", "original_manager_price", "bot_price",
+    "topicality_in_progress", "topicality_notification_sent",
+)
+# Значення, що повторюються між заявками (довідники та дані того самого ФГ)
+INTERNED_FIELDS = frozenset((
+    "region", "district", "city", "group", "culture", "payment_form", "currency",
+    "fgh_name", "edrpou", "phone", "quantity", "price", "proposal", "original_manager_price",
+))
+NUMERIC_FIELDS = ("quantity", "price", "proposal", "original_manager_price")
+
+_FIELD_SET = frozenset(FIELDS)
+_NUMERIC_SLOTS = {name: f"{name}_value" for name in NUMERIC_FIELDS}
+_layouts = {}  # кортеж ключів -> той самий кортеж (один екземпляр на кожен набір ключів)
+_slot_getters = {}  # id(layout) -> attrgetter полів layout або None
+
+
+@lru_cache(maxsize=4096)
+def _parse_number_str(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_number(value):
+    """"9350" -> 9350.0; відсутнє, порожнє або нечислове значення -> None."""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if type(value) is str:
+        return _parse_number_str(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_status(value):
+    """ApplicationStatus або, для невідомого значення, сам рядок – щоб не втратити його при записі."""
+    try:
+        return ApplicationStatus(value)
+    except ValueError:
+        return value
+
+
+def _slot_getter(layout):
+    """Значення полів layout одним кортежем – або None, якщо серед ключів є невідомі (extra)."""
+    # layout – спільний кортеж із _layouts (живе до кінця процесу), тож ключ – id: без хешування кортежу
+    try:
+        return _slot_getters[id(layout)]
+    except KeyError:
+        pass
+    getter = None
+    if layout and _FIELD_SET.issuperset(layout):
+        getter = attrgetter(*layout)
+        if len(layout) == 1:
+            getter = (lambda get: lambda record: (get(record),))(getter)
+    _slot_getters[id(layout)] = getter
+    return getter
+
+
+def _shared_layout(keys) -> tuple:
+    keys = tuple(keys)
+    return _layouts.setdefault(keys, keys)
+
+
+def _prepare(key, value):
+    if key in INTERNED_FIELDS and type(value) is str:
+        return sys.intern(value)
+    if key == "proposal_status":
+        return parse_status(value)
+    if key == "extra_fields" and isinstance(value, dict):
+        return {
+            sys.intern(k) if type(k) is str else k: sys.intern(v) if type(v) is str else v
+            for k, v in value.items()
+        }
+    return value
+
+
+class ApplicationRecord:
+    __slots__ = FIELDS + tuple(_NUMERIC_SLOTS.values()) + ("layout", "extra")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ApplicationRecord":
+        record = cls.__new__(cls)
+        record.extra = None
+        for key, value in data.items():
+            if key in _FIELD_SET:
+                setattr(record, key, _prepare(key, value))
+            else:
+                if record.extra is None:
+                    record.extra = {}
+                record.extra[key] = value
+        record.layout = _shared_layout(data)
+        user_id, chat_id = data.get("user_id"), data.get("chat_id")
+        if chat_id is not None and type(chat_id) is type(user_id) and chat_id == user_id:
+            # У приватному чаті chat_id == user_id – тримаємо один об'єкт
+            record.chat_id = record.user_id
+        for name, slot in _NUMERIC_SLOTS.items():
+            setattr(record, slot, parse_number(getattr(record, name, None)))
+        return record
+
+    def to_dict(self) -> dict:
+        getter = _slot_getter(self.layout)
+        if getter is not None:
+            data = dict(zip(self.layout, getter(self)))
+            status = data.get("proposal_status")
+            if type(status) is ApplicationStatus:
+                data["proposal_status"] = _STATUS_VALUES[status]
+            if isinstance(data.get("extra_fields"), dict):
+                data["extra_fields"] = dict(data["extra_fields"])
+            return data
+        data = {}
+        for key in self.layout:
+            if key not in _FIELD_SET:
+                data[key] = self.extra[key]
+                continue
+            value = getattr(self, key)
+            if isinstance(value, ApplicationStatus):
+                value = value.value
+            elif key == "extra_fields" and isinstance(value, dict):
+                value = dict(value)
+            data[key] = value
+        return data
+
+    def equals(self, data: dict) -> bool:
+        """self.to_dict() == data, але без побудови словника."""
+        if tuple(data) != self.layout:
+            return False
+        getter = _slot_getter(self.layout)
+        if getter is not None:
+            return getter(self) == tuple(data.values())
+        return all(self.get(key) == value for key, value in data.items())
+
+    def get(self, key: str, default=None):
+        if key not in self.layout:
+            return default
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def set(self, key: str, value):
+        """Як app[key] = value у словнику: новий ключ стає останнім, числове поле розбирається заново."""
+        if key not in self.layout:
+            self.layout = _shared_layout(self.layout + (key,))
+        if key in _FIELD_SET:
+            setattr(self, key, _prepare(key, value))
+            if key in _NUMERIC_SLOTS:
+                setattr(self, _NUMERIC_SLOTS[key], parse_number(value))
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    @property
+    def status(self):
+        """Статус із тим самим значенням за замовчуванням, що й app.get("proposal_status", "active")."""
+        return self.get("proposal_status", ApplicationStatus.ACTIVE)
+
+    def __repr__(self):
+        return f"ApplicationRecord({self.to_dict()!r})"
+
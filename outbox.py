@@ -0,0 +1,166 @@
+# outbox.py
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+
+from config import DATA_DIR, INSTANCE_ID, SEPARATE_WORKER, OUTBOX_RATE_PER_SECOND
+
+OUTBOX_DB_FILE = os.path.join(DATA_DIR, "outbox.sqlite3")
+CLAIM_TIMEOUT_SECONDS = 120  # Незавершені claim інших реплік після цього часу забираємо собі
+MAX_ATTEMPTS = 5
+
+############################################
+# Черга вихідних повідомлень у SQLite
+############################################
+
+def _connect():
+    conn = sqlite3.connect(OUTBOX_DB_FILE, timeout=10, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS outbox ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "chat_id TEXT NOT NULL, text TEXT NOT NULL, reply_markup TEXT, "
+        "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+        "claimed_by TEXT, claimed_at REAL)"
+    )
+    return conn
+
+def _markup_json(reply_markup):
+    if reply_markup is not None and not isinstance(reply_markup, str):
+        reply_markup = json.dumps(
+            reply_markup.to_python() if hasattr(reply_markup, "to_python") else reply_markup,
+            ensure_ascii=False
+        )
+    return reply_markup
+
+def enqueue_message(chat_id, text: str, reply_markup=None):
+    enqueue_messages([(chat_id, text, reply_markup)])
+
+def enqueue_messages(messages):
+    """messages – [(chat_id, text, reply_markup)]; усі потрапляють у чергу однією транзакцією."""
+    now = time.time()
+    rows = [(str(chat_id), text, _markup_json(reply_markup), now) for chat_id, text, reply_markup in messages]
+    if not rows:
+        return
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT INTO outbox (chat_id, text, reply_markup, created_at) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def outbox_depth() -> int:
+    conn = _connect()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+    finally:
+        conn.close()
+
+def _claim_batch(limit: int):
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "UPDATE outbox SET claimed_by = ?, claimed_at = ? WHERE id IN ("
+            "SELECT id FROM outbox WHERE claimed_by IS NULL OR claimed_at < ? ORDER BY id LIMIT ?)",
+            (INSTANCE_ID, now, now - CLAIM_TIMEOUT_SECONDS, limit)
+        )
+        rows = conn.execute(
+            "SELECT id, chat_id, text, reply_markup, attempts FROM outbox "
+            "WHERE claimed_by = ? AND claimed_at = ? ORDER BY id",
+            (INSTANCE_ID, now)
+        ).fetchall()
+        conn.execute("COMMIT")
+        return rows
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def _finish(msg_id: int):
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM outbox WHERE id = ?", (msg_id,))
+    finally:
+        conn.close()
+
+def _release(msg_id: int, attempts: int):
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE outbox SET claimed_by = NULL, claimed_at = NULL, attempts = ? WHERE id = ?",
+            (attempts, msg_id)
+        )
+    finally:
+        conn.close()
+
+############################################
+# Надсилання
+############################################
+
+async def notify(chat_id, text: str, reply_markup=None):
+    """
+    Надсилає повідомлення користувачу з фонових задач.
+    Якщо фонові задачі винесено у воркер (SEPARATE_WORKER), повідомлення
+    кладеться в outbox, і його надсилає процес бота через drain_outbox().
+    Інакше надсилаємо одразу – винятки (BotBlocked тощо) летять до викликача.
+    """
+    if SEPARATE_WORKER:
+        # SQLite із BEGIN IMMEDIATE може чекати на блокування до 10 с – не тримаємо event loop
+        await asyncio.to_thread(enqueue_message, chat_id, text, reply_markup)
+        return
+    from loader import bot
+    await bot.send_message(chat_id, text, reply_markup=reply_markup)
+
+async def drain_outbox(batch_size: int = 50):
+    """
+    Фонове завдання процесу бота: забирає повідомлення з outbox і надсилає їх
+    не швидше за OUTBOX_RATE_PER_SECOND. BotBlocked/ChatNotFound – повідомлення відкидається,
+    RetryAfter – чекаємо скільки просить Telegram, інші помилки – повтор до MAX_ATTEMPTS разів.
+    """
+    from aiogram.utils.exceptions import RetryAfter, BotBlocked, ChatNotFound, UserDeactivated
+    from loader import bot
+    # Усі звернення до SQLite – через asyncio.to_thread: BEGIN IMMEDIATE з timeout=10
+    # інакше блокував би event loop, поки воркер тримає запис у черзі
+    min_gap = 1.0 / OUTBOX_RATE_PER_SECOND if OUTBOX_RATE_PER_SECOND > 0 else 0
+    while True:
+        try:
+            batch = await asyncio.to_thread(_claim_batch, batch_size)
+        except sqlite3.Error as e:
+            logging.error(f"[OUTBOX] Помилка читання черги: {e}")
+            batch = []
+        if not batch:
+            await asyncio.sleep(1)
+            continue
+        for msg_id, chat_id, text, reply_markup, attempts in batch:
+            started = time.monotonic()
+            try:
+                await bot.send_message(chat_id, text, reply_markup=reply_markup)
+                await asyncio.to_thread(_finish, msg_id)
+            except RetryAfter as e:
+                logging.warning(f"[OUTBOX] Telegram просить зачекати {e.timeout} с.")
+                await asyncio.to_thread(_release, msg_id, attempts)
+                await asyncio.sleep(e.timeout)
+            except (BotBlocked, ChatNotFound, UserDeactivated):
+                await asyncio.to_thread(_finish, msg_id)
+            except Exception as e:
+                attempts += 1
+                logging.exception(f"[OUTBOX] Не вдалося надіслати повідомлення {msg_id} (спроба {attempts}): {e}")
+                if attempts >= MAX_ATTEMPTS:
+                    await asyncio.to_thread(_finish, msg_id)
+                else:
+                    await asyncio.to_thread(_release, msg_id, attempts)
+            elapsed = time.monotonic() - started
+            if elapsed < min_gap:
+                await asyncio.sleep(min_gap - elapsed)
@@ -0,0 +1,155 @@
+# pagination.py
+import itertools
+
+from aiogram import types
+from aiogram.utils.callback_data import CallbackData
+
+############################################
+# Посторінкові списки з inline-кнопками
+############################################
+# Список будується один раз при відкритті (відсортовані пари «мітка – payload»)
+# і зберігається як знімок для пари (чат, назва списку). Сторінка k – це
+# зріз items[k*size:(k+1)*size], тож гортання не перечитує сховище і коштує
+# O(розміру сторінки). У callback data – лише назва списку, номер знімка і
+# номер сторінки/позиції (ліміт Telegram – 64 байти); payload лишається на сервері.
+# Якщо знімок замінено новим (список відкрили знову) або бот перезапущено,
+# старі кнопки відповідають «Список застарів».
+# Список з selectable=True – це мультивибір: натискання елемента перемикає
+# позначку (множина позицій у знімку), а кнопки actions під сторінкою
+# (action_cb) застосовують дію до всіх обраних позицій.
+
+PAGE_SIZE = 10
+
+page_cb = CallbackData("pg", "list", "snap", "page")
+item_cb = CallbackData("it", "list", "snap", "pos")
+action_cb = CallbackData("ac", "list", "snap", "action")
+
+_snapshot_ids = itertools.count(1)
+_snapshots = {}  # (chat_id, list_name) -> ListSnapshot
+
+
+class ListSnapshot:
+    __slots__ = ("list_name", "snap_id", "title", "labels", "payloads", "columns", "page_size", "page",
+                 "selected", "actions")
+
+    def __init__(self, list_name: str, title: str, items, columns: int = 2, page_size: int = PAGE_SIZE,
+                 selectable: bool = False, actions=()):
+        self.list_name = list_name
+        self.snap_id = next(_snapshot_ids)
+        self.title = title
+        self.labels = [label for label, _ in items]
+        self.payloads = [payload for _, payload in items]
+        self.columns = columns
+        self.page_size = page_size
+        self.page = 0  # остання показана сторінка – щоб повертатись на неї з картки елемента
+        self.selected = set() if selectable else None  # обрані позиції для мультивибору
+        self.actions = list(actions)  # [(action, текст кнопки)]
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.labels) // self.page_size))
+
+    def clamp(self, page: int) -> int:
+        return min(max(page, 0), self.page_count - 1)
+
+    def payload(self, pos: int):
+        if 0 <= pos < len(self.payloads):
+            return self.payloads[pos]
+        return None
+
+    def toggle(self, pos: int):
+        if 0 <= pos < len(self.payloads):
+            self.selected ^= {pos}
+
+    def toggle_all(self):
+        """Обрати всі позиції; якщо всі вже обрані – зняти позначки."""
+        self.selected = set() if len(self.selected) == len(self.payloads) else set(range(len(self.payloads)))
+
+    def selected_payloads(self) -> list:
+        return [self.payloads[pos] for pos in sorted(self.selected)]
+
+    def text(self, page: int) -> str:
+        # Кількість обраних – у тексті: тоді перемикання змінює текст, і show_page не вважає сторінку незмінною
+        chosen = f", обрано {len(self.selected)}" if self.selected is not None else ""
+        if self.page_count == 1:
+            return f"{self.title} ({len(self)}{chosen}):"
+        return f"{self.title} ({len(self)}{chosen}), сторінка {page + 1} з {self.page_count}:"
+
+    def label(self, pos: int) -> str:
+        if self.selected is None:
+            return self.labels[pos]
+        return f"{'☑' if pos in self.selected else '☐'} {self.labels[pos]}"
+
+    def keyboard(self, page: int) -> types.InlineKeyboardMarkup:
+        kb = types.InlineKeyboardMarkup(row_width=self.columns)
+        start = page * self.page_size
+        kb.add(*(
+            types.InlineKeyboardButton(
+                self.label(pos),
+                callback_data=item_cb.new(list=self.list_name, snap=self.snap_id, pos=pos)
+            )
+            for pos in range(start, min(start + self.page_size, len(self.labels)))
+        ))
+        if self.page_count > 1:
+            nav = []
+            if page > 0:
+                nav.append(types.InlineKeyboardButton(
+                    "« Назад", callback_data=page_cb.new(list=self.list_name, snap=self.snap_id, page=page - 1)))
+            nav.append(types.InlineKeyboardButton(
+                f"{page + 1}/{self.page_count}", callback_data=page_cb.new(list=self.list_name, snap=self.snap_id, page=page)))
+            if page < self.page_count - 1:
+                nav.append(types.InlineKeyboardButton(
+                    "Далі »", callback_data=page_cb.new(list=self.list_name, snap=self.snap_id, page=page + 1)))
+            kb.row(*nav)
+        for action, text in self.actions:
+            kb.row(types.InlineKeyboardButton(
+                text, callback_data=action_cb.new(list=self.list_name, snap=self.snap_id, action=action)))
+        return kb
+
+
+def open_list(chat_id: int, list_name: str, title: str, items, columns: int = 2,
+              selectable: bool = False, actions=()) -> ListSnapshot:
+    """items – уже відсортовані пари (мітка кнопки, payload). Замінює попередній знімок цього списку."""
+    snapshot = ListSnapshot(list_name, title, items, columns, selectable=selectable, actions=actions)
+    _snapshots[(chat_id, list_name)] = snapshot
+    return snapshot
+
+
+def get_list(chat_id: int, list_name: str, snap_id=None):
+    """Поточний знімок списку; None, якщо його немає або кнопка від старішого знімка."""
+    snapshot = _snapshots.get((chat_id, list_name))
+    if snapshot is None or (snap_id is not None and str(snapshot.snap_id) != str(snap_id)):
+        return None
+    return snapshot
+
+
+def drop_list(chat_id: int, list_name: str):
+    """Дані списку змінились – наступне відкриття побудує знімок заново."""
+    _snapshots.pop((chat_id, list_name), None)
+
+
+def drop_lists(list_name: str):
+    """Те саме для всіх чатів (дані змінились не через цей чат)."""
+    for key in [key for key in _snapshots if key[1] == list_name]:
+        del _snapshots[key]
+
+
+async def send_page(message: types.Message, snapshot: ListSnapshot, page: int = None):
+    page = snapshot.clamp(snapshot.page if page is None else page)
+    snapshot.page = page
+    await message.answer(snapshot.text(page), reply_markup=snapshot.keyboard(page))
+
+
+async def show_page(query: types.CallbackQuery, snapshot: ListSnapshot, page: int):
+    """Гортання: редагуємо те саме повідомлення замість нового."""
+    page = snapshot.clamp(page)
+    if query.message.text == snapshot.text(page):
+        # Та сама сторінка (кнопка «1/N») – Telegram відхилив би редагування без змін
+        await query.answer()
+        return
+    snapshot.page = page
+    await query.message.edit_text(snapshot.text(page), reply_markup=snapshot.keyboard(page))
+    await query.answer()
@@ -0,0 +1,53 @@
+# poll_schedule.py
+import math
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from config import (
+    CHECK_INTERVAL, POLL_MIN_INTERVAL, POLL_OFF_HOURS_MAX_INTERVAL, POLL_BACKOFF_FACTOR,
+    WORK_HOURS_START, WORK_HOURS_END, WORK_WEEKDAYS,
+    SHEETS_READ_QUOTA_PER_MINUTE, POLL_QUOTA_SHARE
+)
+
+# Скільки запитів читання робить один цикл poll_manager_proposals:
+# open_by_key + worksheet + get_all_values для прайс-листа та для таблиці1
+SHEETS_READS_PER_POLL_CYCLE = 6
+
+def quota_floor_seconds(reads_per_cycle: int = SHEETS_READS_PER_POLL_CYCLE) -> float:
+    """
+    Мінімальний інтервал, за якого poller не з'їдає більше POLL_QUOTA_SHARE
+    від хвилинної квоти читання Sheets API (решта лишається хендлерам).
+    """
+    allowed_reads = max(SHEETS_READ_QUOTA_PER_MINUTE * POLL_QUOTA_SHARE, 1)
+    return math.ceil(60 * reads_per_cycle / allowed_reads)
+
+def is_working_hours(now: datetime = None) -> bool:
+    now = now or datetime.now(ZoneInfo("Europe/Kiev"))
+    return now.weekday() in WORK_WEEKDAYS and WORK_HOURS_START <= now.hour < WORK_HOURS_END
+
+
+class AdaptivePollInterval:
+    """
+    Інтервал між циклами опитування таблиці:
+    - якщо цикл виявив зміни (нові ціни менеджера, нові заявки, ціни бота) –
+      одразу повертаємось до мінімального інтервалу;
+    - якщо змін немає – інтервал зростає в POLL_BACKOFF_FACTOR разів до стелі.
+    Стеля залежить від профілю: у робочі години – CHECK_INTERVAL,
+    поза ними – POLL_OFF_HOURS_MAX_INTERVAL. Нижня межа не менша за квотну.
+    """
+
+    def __init__(self):
+        self.floor = max(POLL_MIN_INTERVAL, quota_floor_seconds())
+        self.current = max(self.floor, CHECK_INTERVAL)
+
+    def ceiling(self, now: datetime = None) -> float:
+        limit = CHECK_INTERVAL if is_working_hours(now) else POLL_OFF_HOURS_MAX_INTERVAL
+        return max(self.floor, limit)
+
+    def next_interval(self, activity: int, now: datetime = None) -> float:
+        if activity > 0:
+            self.current = self.floor
+        else:
+            self.current = self.current * POLL_BACKOFF_FACTOR
+        self.current = min(self.current, self.ceiling(now))
+        return self.current
@@ -0,0 +1,185 @@
+# publisher.py
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+
+from config import DATA_DIR, PUBLISH_POLL_SECONDS, PUBLISH_MAX_BACKOFF_SECONDS
+from locks import sheet_rows_lock
+from timing import poll_cycle, span
+
+PUBLISH_DB_FILE = os.path.join(DATA_DIR, "publish_queue.sqlite3")
+
+############################################
+# Черга публікації заявок у таблицю
+############################################
+# Підтвердження заявки лише зберігає її локально (з ключем submission_id, що
+# створюється разом із попереднім переглядом) і ставить задачу в цю чергу – користувач
+# отримує відповідь одразу. Лідер (BACKGROUND_JOBS) забирає задачі по одній і пише
+# рядок через update_google_sheet: ключ лежить у таблиці в окремому стовпці, тож
+# повтор після таймауту чи падіння дописує той самий рядок, а не створює новий.
+# Після запису sheet_row заявки заповнюється. Невдалі задачі повторюються з
+# експоненційною паузою (до PUBLISH_MAX_BACKOFF_SECONDS).
+
+_wakeup = None  # asyncio.Event процесу, де працює publisher; будить його одразу після enqueue
+
+
+def _connect():
+    conn = sqlite3.connect(PUBLISH_DB_FILE, timeout=10, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS publish_jobs ("
+        "submission_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, "
+        "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, "
+        "created_at REAL NOT NULL, last_error TEXT)"
+    )
+    return conn
+
+
+def _insert_job(submission_id: str, user_id):
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO publish_jobs (submission_id, user_id, next_attempt_at, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (submission_id, str(user_id), now, now)
+        )
+    finally:
+        conn.close()
+
+
+def enqueue_publication(submission_id: str, user_id):
+    """Ставить заявку в чергу публікації; повторна постановка того ж ключа нічого не змінює."""
+    _insert_job(submission_id, user_id)
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def publish_queue_depth() -> int:
+    conn = _connect()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM publish_jobs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _due_jobs(limit: int):
+    conn = _connect()
+    try:
+        return conn.execute(
+            "SELECT submission_id, user_id, attempts FROM publish_jobs "
+            "WHERE next_attempt_at <= ? ORDER BY created_at LIMIT ?",
+            (time.time(), limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _finish(submission_id: str):
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM publish_jobs WHERE submission_id = ?", (submission_id,))
+    finally:
+        conn.close()
+
+
+def _retry_later(submission_id: str, attempts: int, error: str):
+    delay = min(PUBLISH_MAX_BACKOFF_SECONDS, 5 * 2 ** min(attempts, 16))
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE publish_jobs SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE submission_id = ?",
+            (attempts, time.time() + delay, error, submission_id)
+        )
+    finally:
+        conn.close()
+
+
+def enqueue_unpublished():
+    """
+    Заявки з submission_id, що так і не отримали sheet_row (наприклад, процес упав
+    між збереженням і постановкою в чергу), – знову в чергу. Викликається при старті publisher
+    у потоці, тож _wakeup не чіпає.
+    """
+    from db import load_applications
+    count = 0
+    for uid, user_apps in load_applications().items():
+        for app in user_apps:
+            if app.get("submission_id") and not app.get("sheet_row") and app.get("proposal_status") != "deleted":
+                _insert_job(app["submission_id"], uid)
+                count += 1
+    return count
+
+############################################
+# Публікація
+############################################
+
+def _publish_sync(submission_id: str, user_id: str):
+    from db import find_application_by_submission, set_application_sheet_row
+    from gsheet_utils import update_google_sheet
+
+    found = find_application_by_submission(user_id, submission_id)
+    if found is None:
+        logging.info(f"[PUBLISH] Заявки {submission_id} вже немає, публікацію скасовано.")
+        return
+    _, app = found
+    if app.get("sheet_row"):
+        return
+    if app.get("proposal_status") == "deleted":
+        logging.info(f"[PUBLISH] Заявку {submission_id} видалено до публікації, пропускаємо.")
+        return
+    sheet_row = update_google_sheet(app)
+    if set_application_sheet_row(user_id, submission_id, sheet_row):
+        logging.info(f"[PUBLISH] Заявку {submission_id} користувача {user_id} записано в рядок {sheet_row}.")
+    else:
+        logging.warning(f"[PUBLISH] Заявку {submission_id} видалено під час запису в рядок {sheet_row}.")
+
+
+async def _publish(submission_id: str, user_id: str):
+    """Записує заявку в таблицю; виняток – задачу буде повторено."""
+    # Лок тримаємо від вибору рядка до запису sheet_row: видалення рядків не зсуне їх посередині.
+    # Запити до Google і файлів – у потоці, щоб не блокувати цикл подій.
+    async with sheet_rows_lock.reader():
+        await asyncio.to_thread(_publish_sync, submission_id, user_id)
+
+
+async def publish_applications(batch_size: int = 20):
+    """
+    Фонове завдання лідера: публікує заявки з черги в таблицю.
+    Чекає PUBLISH_POLL_SECONDS або сигналу від enqueue_publication у цьому ж процесі.
+    """
+    global _wakeup
+    _wakeup = asyncio.Event()
+    try:
+        requeued = await asyncio.to_thread(enqueue_unpublished)
+        if requeued:
+            logging.info(f"[PUBLISH] Знову в черзі {requeued} неопублікованих заявок.")
+    except Exception as e:
+        logging.exception(f"[PUBLISH] Не вдалося перевірити неопубліковані заявки: {e}")
+
+    while True:
+        # Скидаємо до читання черги: enqueue після цього моменту розбудить наступне очікування
+        _wakeup.clear()
+        try:
+            jobs = await asyncio.to_thread(_due_jobs, batch_size)
+        except sqlite3.Error as e:
+            logging.error(f"[PUBLISH] Помилка читання черги: {e}")
+            jobs = []
+        if jobs:
+            with poll_cycle("sheet_publisher"):
+                for submission_id, user_id, attempts in jobs:
+                    with span("publish") as publish:
+                        try:
+                            await _publish(submission_id, user_id)
+                            await asyncio.to_thread(_finish, submission_id)
+                            publish.add_items()
+                        except Exception as e:
+                            attempts += 1
+                            logging.exception(f"[PUBLISH] Помилка публікації заявки {submission_id} (спроба {attempts}): {e}")
+                            await asyncio.to_thread(_retry_later, submission_id, attempts, f"{type(e).__name__}: {e}")
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), PUBLISH_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
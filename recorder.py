@@ -0,0 +1,157 @@
+# recorder.py
+import os
+import re
+import ast
+import json
+import time
+import hmac
+import hashlib
+import logging
+from functools import lru_cache
+
+############################################
+# Запис вхідних апдейтів для replay (benchmarks/replay.py)
+############################################
+# Кожен рядок JSONL: {"t": секунди від початку запису, "update": анонімізований апдейт}.
+# Анонімізація:
+# - id користувачів/чатів замінюються стабільними псевдонімами (HMAC із сіллю;
+#   без солі запис не стартує – інакше id відновлюються перебором);
+# - імена, username, телефони з контактів прибираються;
+# - з тексту лишаються лише команди (без аргументів) і відомі тексти кнопок –
+#   рядкові літерали клавіатур і фільтрів у модулях хендлерів; решта (ПІБ, телефон,
+#   ПІБ на кнопках зі списку користувачів, пошукові запити) замінюється на TEXT_PLACEHOLDER;
+# - у web_app_data маскуються персональні поля заявки (ЄДРПОУ – по цифрах), а якщо
+#   дані не JSON – усі послідовності з 5+ цифр; цифри рахуються без пробілів
+#   і розділових знаків між ними ("+38 067 123-45-67" маскується повністю).
+
+PERSONAL_WEBAPP_FIELDS = ("fullname", "fgh_name", "edrpou", "phone", "name")
+TEXT_PLACEHOLDER = "<text>"
+BUTTON_SOURCES = ("keyboards.py", "user_handlers.py", "admin_handlers.py", "pagination.py")
+_digits_re = re.compile(r"\d(?:[ \t\-–./()+]*\d){4,}")
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _mask_digits(text: str) -> str:
+    return _digits_re.sub(lambda m: re.sub(r"\d", "0", m.group()), text)
+
+
+def _string_constants(node) -> list:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [value for element in node.elts for value in _string_constants(element)]
+    return []
+
+
+def _is_text(node) -> bool:
+    return (isinstance(node, ast.Attribute) and node.attr == "text") or (isinstance(node, ast.Name) and node.id == "text")
+
+
+@lru_cache(maxsize=None)
+def known_button_texts() -> frozenset:
+    """
+    Тексти кнопок із коду: аргументи kb.add/row/insert, KeyboardButton(...), Text(equals=...)
+    і рядки, з якими порівнюється message.text. Кнопки, зібрані з даних (ПІБ, заявки), сюди не потрапляють.
+    """
+    texts = set()
+    for filename in BUTTON_SOURCES:
+        with open(os.path.join(_PROJECT_DIR, filename), "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                func = node.func
+                name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+                if name in ("add", "row", "insert", "KeyboardButton"):
+                    for arg in node.args:
+                        texts.update(_string_constants(arg))
+                for keyword in node.keywords:
+                    if keyword.arg in ("equals", "text") and name in ("Text", "KeyboardButton"):
+                        texts.update(_string_constants(keyword.value))
+            elif isinstance(node, ast.Compare) and _is_text(node.left):
+                for comparator in node.comparators:
+                    texts.update(_string_constants(comparator))
+    return frozenset(text for text in texts if text.strip())
+
+
+def _anonymize_text(text: str) -> str:
+    if text.startswith("/"):
+        command, _, args = text.partition(" ")
+        return f"{command} {TEXT_PLACEHOLDER}" if args.strip() else command
+    if text in known_button_texts():
+        return text
+    return TEXT_PLACEHOLDER
+
+
+class UpdateRecorder:
+    def __init__(self, path: str, salt: str):
+        if not salt:
+            raise RuntimeError("RECORD_UPDATES_SALT не задано: без солі псевдоніми id можна обернути перебором.")
+        self.path = path
+        self._salt = salt.encode("utf-8")
+        self._started = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+        logging.info(f"[RECORDER] Апдейти записуються у {path}")
+
+    def pseudonym(self, value: int) -> int:
+        digest = hmac.new(self._salt, str(value).encode("utf-8"), hashlib.sha256).digest()
+        # Позитивний id у межах, які приймає Telegram/aiogram
+        return int.from_bytes(digest[:5], "big") + 1_000_000
+
+    def _anonymize_user(self, user: dict):
+        user["id"] = self.pseudonym(user["id"])
+        user["first_name"] = "User"
+        for key in ("last_name", "username"):
+            user.pop(key, None)
+
+    def _anonymize_chat(self, chat: dict):
+        chat["id"] = self.pseudonym(chat["id"]) if chat.get("id", 0) > 0 else chat.get("id")
+        for key in ("first_name", "last_name", "username", "title"):
+            chat.pop(key, None)
+
+    def _anonymize_message(self, message: dict):
+        if "from" in message:
+            self._anonymize_user(message["from"])
+        if "chat" in message:
+            self._anonymize_chat(message["chat"])
+        if "text" in message:
+            message["text"] = _anonymize_text(message["text"])
+        if "contact" in message:
+            contact = message["contact"]
+            contact["phone_number"] = "+380000000000"
+            contact["first_name"] = "User"
+            contact.pop("last_name", None)
+            if "user_id" in contact:
+                contact["user_id"] = self.pseudonym(contact["user_id"])
+        web_app_data = message.get("web_app_data")
+        if web_app_data and "data" in web_app_data:
+            try:
+                payload = json.loads(web_app_data["data"])
+            except ValueError:
+                web_app_data["data"] = _mask_digits(web_app_data["data"])
+            else:
+                if isinstance(payload, dict):
+                    for key in PERSONAL_WEBAPP_FIELDS:
+                        if isinstance(payload.get(key), str):
+                            payload[key] = _mask_digits(payload[key]) if key == "edrpou" else f"<{key}>"
+                web_app_data["data"] = json.dumps(payload, ensure_ascii=False)
+        if "reply_to_message" in message:
+            self._anonymize_message(message["reply_to_message"])
+
+    def anonymize(self, update: dict) -> dict:
+        for key in ("message", "edited_message"):
+            if key in update:
+                self._anonymize_message(update[key])
+        if "callback_query" in update:
+            query = update["callback_query"]
+            self._anonymize_user(query["from"])
+            if "message" in query:
+                self._anonymize_message(query["message"])
+        return update
+
+    def record(self, update: dict):
+        line = {"t": round(time.monotonic() - self._started, 3), "update": self.anonymize(update)}
+        self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,167 @@
+# search.py
+import re
+import threading
+from bisect import bisect_left, insort
+
+from db import add_applications_listener, refresh_applications_index
+
+############################################
+# Пошук заявок (інвертований індекс у пам'яті)
+############################################
+# Токени полів TEXT_FIELDS -> множина позицій (user_id, app_index); окремо – значення
+# фасетів (статус, валюта, культура). Індекс оновлюється слухачем db: при кожному
+# save_applications переіндексуються лише змінені позиції. Запит – пересічення
+# множин для кожного слова, де слово – префікс токена (пошук діапазону у
+# відсортованому списку токенів), плюс пересічення з фасетами. Заявки в індексі –
+# спільні з db записи ApplicationRecord; результат пошуку – словники to_dict().
+
+TEXT_FIELDS = ("fgh_name", "edrpou", "region", "district", "city", "culture", "group", "phone")
+FACETS = ("status", "currency", "culture")
+MIN_PREFIX = 2  # Коротші слова запиту ігноруються – інакше майже кожен запит збігався б з усім
+
+_TOKEN_RE = re.compile(r"\w+")
+_APOSTROPHES = str.maketrans("", "", "'’ʼ`")
+
+
+def tokenize(text) -> list:
+    """'Кам'янка-Дніпровська' -> ['камянка', 'дніпровська']"""
+    return _TOKEN_RE.findall(str(text).casefold().translate(_APOSTROPHES))
+
+
+def _phone_tokens(phone) -> list:
+    digits = re.sub(r"\D", "", str(phone))
+    if not digits:
+        return []
+    # +380671234567 шукається і як 380671234567, і як 0671234567
+    tokens = [digits]
+    if digits.startswith("38") and len(digits) > 2:
+        tokens.append(digits[2:])
+    return tokens
+
+
+def facet_value(facet: str, app: dict) -> str:
+    if facet == "status":
+        value = app.get("proposal_status", "")
+    else:
+        value = app.get(facet, "")
+    return str(value or "").strip().casefold()
+
+
+def _document(app: dict):
+    tokens = set()
+    for field in TEXT_FIELDS:
+        value = app.get(field)
+        if not value:
+            continue
+        tokens.update(_phone_tokens(value) if field == "phone" else tokenize(value))
+    facets = {facet: facet_value(facet, app) for facet in FACETS}
+    return tokens, facets
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}  # токен -> {(user_id, app_index)}
+        self.sorted_tokens = []
+        self.facets = {facet: {} for facet in FACETS}  # фасет -> значення -> {(user_id, app_index)}
+        self.docs = {}  # (user_id, app_index) -> (токени, фасети, запис заявки)
+        self.lock = threading.Lock()
+
+    def _remove(self, key):
+        tokens, facets, _ = self.docs.pop(key)
+        for token in tokens:
+            keys = self.postings[token]
+            keys.discard(key)
+            if not keys:
+                del self.postings[token]
+                del self.sorted_tokens[bisect_left(self.sorted_tokens, token)]
+        for facet, value in facets.items():
+            keys = self.facets[facet][value]
+            keys.discard(key)
+            if not keys:
+                del self.facets[facet][value]
+
+    def _add(self, key, app):
+        tokens, facets = _document(app)
+        self.docs[key] = (tokens, facets, app)
+        for token in tokens:
+            keys = self.postings.get(token)
+            if keys is None:
+                keys = self.postings[token] = set()
+                insort(self.sorted_tokens, token)
+            keys.add(key)
+        for facet, value in facets.items():
+            self.facets[facet].setdefault(value, set()).add(key)
+
+    def apply(self, changed: dict):
+        with self.lock:
+            for key, app in changed.items():
+                if key in self.docs:
+                    self._remove(key)
+                if app is not None:
+                    self._add(key, app)
+
+    def _prefix_keys(self, prefix: str) -> set:
+        start = bisect_left(self.sorted_tokens, prefix)
+        found = set()
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            found |= self.postings[token]
+        return found
+
+    def search(self, text: str = "", filters: dict = None):
+        """
+        Позиції заявок, у яких кожне слово text є префіксом якогось токена
+        і які відповідають усім filters ({фасет: значення}). Порожній запит без
+        фільтрів нічого не повертає. Результат – [(key, заявка)], новіші спершу.
+        """
+        words = [word for word in tokenize(text) if len(word) >= MIN_PREFIX]
+        with self.lock:
+            candidates = [self._prefix_keys(word) for word in words]
+            for facet, value in (filters or {}).items():
+                candidates.append(self.facets[facet].get(value.strip().casefold(), set()))
+            if not candidates:
+                return []
+            candidates.sort(key=len)
+            keys = set(candidates[0])
+            for other in candidates[1:]:
+                keys &= other
+                if not keys:
+                    break
+            results = [(key, self.docs[key][2]) for key in keys]
+        results.sort(key=lambda item: item[1].get("timestamp", ""), reverse=True)
+        return [(key, record.to_dict()) for key, record in results]
+
+    def facet_counts(self, keys) -> dict:
+        """{фасет: {значення: кількість}} серед знайдених позицій – для уточнення запиту."""
+        counts = {facet: {} for facet in FACETS}
+        with self.lock:
+            for key in keys:
+                doc = self.docs.get(key)
+                if doc is None:
+                    continue
+                for facet, value in doc[1].items():
+                    if value:
+                        counts[facet][value] = counts[facet].get(value, 0) + 1
+        return counts
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Індекс будується при першому пошуку, далі оновлюється слухачем db."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SearchIndex()
+                add_applications_listener(index.apply)
+                _index = index
+    refresh_applications_index()
+    return _index
+
+
+def search_applications(text: str = "", filters: dict = None):
+    return get_search_index().search(text, filters)
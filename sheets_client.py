@@ -0,0 +1,71 @@
+# sheets_client.py
+import time
+
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+from metrics import SHEETS_CALLS, SHEETS_ERRORS, SHEETS_SECONDS
+from tracing import record_call
+from api_usage import record_api_call
+
+############################################
+# Клієнт Google Sheets
+############################################
+# Окремий модуль, щоб gspread/oauth2client (і google-auth під ними)
+# імпортувались лише при першому зверненні до таблиць – див. gsheet_utils.init_gspread.
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+
+def sheets_operation(method: str, endpoint: str) -> str:
+    """
+    Коротка назва операції Sheets/Drive API для метрик:
+    ".../spreadsheets/ID:batchUpdate" -> "batchUpdate",
+    ".../values/RANGE" (GET) -> "values.get", ".../spreadsheets/ID" (GET) -> "spreadsheets.get".
+    """
+    path = endpoint.split("?", 1)[0]
+    last_segment = path.rsplit("/", 1)[-1]
+    if ":" in last_segment:
+        return last_segment.rsplit(":", 1)[-1]
+    if "/values/" in path:
+        return f"values.{method.lower()}"
+    if "/spreadsheets/" in path:
+        return f"spreadsheets.{method.lower()}"
+    return f"drive.{method.lower()}"
+
+
+class InstrumentedClient(gspread.Client):
+    """
+    gspread.Client, що рахує кожен HTTP-запит до Google API
+    (включно з запитами gspread_formatting) у метриках.
+    """
+
+    def request(self, method, endpoint, *args, **kwargs):
+        operation = sheets_operation(method, endpoint)
+        status = "error"
+        started = time.perf_counter()
+        try:
+            response = super().request(method, endpoint, *args, **kwargs)
+            status = response.status_code
+            return response
+        except Exception as e:
+            SHEETS_ERRORS.inc(method=operation)
+            response = getattr(e, "response", None)
+            if response is not None:
+                status = response.status_code
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            SHEETS_CALLS.inc(method=operation)
+            SHEETS_SECONDS.observe(seconds, method=operation)
+            record_call("sheets", operation, seconds)
+            record_api_call("drive" if operation.startswith("drive.") else "sheets", operation, status)
+
+
+def authorize(credentials: dict) -> InstrumentedClient:
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials, SCOPE)
+    return gspread.authorize(creds, client_class=InstrumentedClient)
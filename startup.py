@@ -0,0 +1,85 @@
+# startup.py
+import sys
+import time
+from importlib.machinery import SourceFileLoader, SourcelessFileLoader, ExtensionFileLoader
+from contextlib import contextmanager
+
+############################################
+# Звіт про час старту
+############################################
+# Імпортується першим у bot.py: з цього моменту рахується час імпорту кожного
+# модуля (власний, без вкладених імпортів, зведений до пакета верхнього рівня)
+# і тривалість явно позначених фаз ініціалізації (with startup_phase("...")).
+# Підсумок – startup_report(), логується після старту бота/воркера і віддається на /api/startup.
+
+STARTED = time.perf_counter()
+
+_import_seconds = {}  # пакет верхнього рівня -> сумарний власний час імпорту
+_stack = []           # [час вкладених імпортів] для поточного ланцюжка імпортів
+_phases = {}
+_ready_at = None
+_FILE_LOADERS = (SourceFileLoader, SourcelessFileLoader, ExtensionFileLoader)
+
+
+def _timed_exec(exec_module, name):
+    package = name.partition(".")[0]
+
+    def exec_with_timing(module):
+        _stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return exec_module(module)
+        finally:
+            total = time.perf_counter() - started
+            children = _stack.pop()
+            _import_seconds[package] = _import_seconds.get(package, 0.0) + total - children
+            if _stack:
+                _stack[-1] += total
+    return exec_with_timing
+
+
+class _ImportTimer:
+    """Meta path finder: знаходить модуль звичайними finder'ами і загортає loader.exec_module."""
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            # Лише файлові loader'и: у них окремий екземпляр на кожен модуль
+            if isinstance(spec.loader, _FILE_LOADERS):
+                spec.loader.exec_module = _timed_exec(spec.loader.exec_module, name)
+            return spec
+        return None
+
+
+if not any(isinstance(finder, _ImportTimer) for finder in sys.meta_path):
+    sys.meta_path.insert(0, _ImportTimer())
+
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases[name] = _phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def mark_ready():
+    """Процес готовий обробляти роботу: фіксуємо повний час старту."""
+    global _ready_at
+    if _ready_at is None:
+        _ready_at = time.perf_counter()
+
+
+def startup_report(top: int = 15) -> dict:
+    imports = sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "ready_seconds": round(_ready_at - STARTED, 4) if _ready_at is not None else None,
+        "imports_seconds": round(sum(_import_seconds.values()), 4),
+        "imports": {package: round(seconds, 4) for package, seconds in imports[:top]},
+        "phases": {name: round(seconds, 4) for name, seconds in _phases.items()},
+    }
@@ -45,6 +45,7 @@ class AdminReview(StatesGroup):
     editing_applications_list = State()
     editing_single_application = State()
     select_new_status = State()
+    bulk_status_filter = State()
     sending_mass_message = State()
     sending_private_message = State()
     auto_price_section = State()
@@ -0,0 +1,201 @@
+# timing.py
+import json
+import time
+import logging
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from metrics import SHEETS_CALLS, MAPS_CALLS, POLL_CYCLE_SECONDS
+
+############################################
+# Вимірювання фаз фонових циклів
+############################################
+# Використання:
+#   with poll_cycle("manager_proposals"):
+#       with span("price_sheet") as s:
+#           ...
+#           s.add_items(len(rows))
+# Функції, позначені @timed, всередині циклу стають вкладеними фазами
+# ("auto_price.calculate_and_set_bot_price"), поза циклом – просто потрапляють
+# у ковзне вікно під poller="-".
+
+TIMING_WINDOW = 200  # Скільки останніх вимірів тримаємо для перцентилів
+
+_current_cycle = contextvars.ContextVar("current_cycle", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_windows = {}
+_pollers = {}  # poller -> стан останнього циклу для /readyz (час – time.monotonic)
+
+
+def _api_calls_total() -> float:
+    # Лічильники глобальні для процесу: паралельні хендлери теж потрапляють у різницю,
+    # тому для циклу це оцінка зверху.
+    return SHEETS_CALLS.total() + MAPS_CALLS.total()
+
+
+def _remember(poller: str, phase: str, seconds: float):
+    window = _windows.get((poller, phase))
+    if window is None:
+        window = _windows[(poller, phase)] = deque(maxlen=TIMING_WINDOW)
+    window.append(seconds)
+
+
+class Span:
+    __slots__ = ("name", "seconds", "items", "api_calls")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.items = 0
+        self.api_calls = 0
+
+    def add_items(self, count: int = 1):
+        self.items += count
+
+
+class _Cycle:
+    def __init__(self, poller: str):
+        self.poller = poller
+        self.phases = {}  # name -> [seconds, items, api_calls, count]
+        self.error = None
+
+    def fail(self, error: Exception):
+        """Цикл перехопив помилку сам і завершився – для health він не вважається успішним."""
+        self.error = f"{type(error).__name__}: {error}"
+
+    def add(self, span: Span):
+        stats = self.phases.setdefault(span.name, [0.0, 0, 0, 0])
+        stats[0] += span.seconds
+        stats[1] += span.items
+        stats[2] += span.api_calls
+        stats[3] += 1
+
+
+@contextmanager
+def span(name: str):
+    parent = _current_span.get()
+    full_name = f"{parent}.{name}" if parent else name
+    current = Span(full_name)
+    token = _current_span.set(full_name)
+    api_before = _api_calls_total()
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - started
+        current.api_calls = int(_api_calls_total() - api_before)
+        _current_span.reset(token)
+        cycle = _current_cycle.get()
+        if cycle is not None:
+            cycle.add(current)
+        else:
+            _remember("-", full_name, current.seconds)
+
+
+def timed(name: str = None):
+    """Декоратор: огортає виклик функції (звичайної чи async) у span."""
+    def decorator(func):
+        span_name = name or func.__name__
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def poll_cycle(poller: str):
+    """
+    Один цикл фонової задачі. Після завершення:
+    - фази верхнього рівня та total йдуть у метрику POLL_CYCLE_SECONDS;
+    - усі фази – у ковзне вікно для перцентилів;
+    - у лог пишеться один рядок JSON з підсумком циклу.
+    """
+    cycle = _Cycle(poller)
+    cycle_token = _current_cycle.set(cycle)
+    span_token = _current_span.set(None)
+    api_before = _api_calls_total()
+    state = _pollers.setdefault(poller, {"running_since": None, "finished": None, "succeeded": None, "error": None})
+    state["running_since"] = time.monotonic()
+    started = time.perf_counter()
+    try:
+        yield cycle
+    except Exception as e:
+        cycle.fail(e)
+        raise
+    finally:
+        total = time.perf_counter() - started
+        _current_span.reset(span_token)
+        _current_cycle.reset(cycle_token)
+        state["running_since"] = None
+        state["finished"] = time.monotonic()
+        if cycle.error is None:
+            state["succeeded"] = state["finished"]
+        state["error"] = cycle.error
+
+        summary = {
+            "poller": poller,
+            "total_s": round(total, 3),
+            "api_calls": int(_api_calls_total() - api_before),
+            "phases": {}
+        }
+        for phase, (seconds, items, api_calls, count) in cycle.phases.items():
+            if "." not in phase:
+                POLL_CYCLE_SECONDS.observe(seconds, poller=poller, phase=phase)
+            _remember(poller, phase, seconds)
+            summary["phases"][phase] = {"s": round(seconds, 3), "items": items, "api": api_calls, "n": count}
+        POLL_CYCLE_SECONDS.observe(total, poller=poller, phase="total")
+        _remember(poller, "total", total)
+        logging.info("[CYCLE] %s", json.dumps(summary, ensure_ascii=False))
+
+
+def poller_status() -> dict:
+    """Для кожного циклу: скільки секунд триває поточний запуск, минуло від останнього завершення та успіху."""
+    now = time.monotonic()
+
+    def age(moment):
+        return round(now - moment, 3) if moment is not None else None
+
+    return {
+        poller: {
+            "running_for": age(state["running_since"]),
+            "since_finished": age(state["finished"]),
+            "since_success": age(state["succeeded"]),
+            "last_error": state["error"],
+        }
+        for poller, state in _pollers.items()
+    }
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def percentile_report(poller: str = None) -> dict:
+    """p50/p90/p99 (у секундах) по ковзному вікну для кожної фази."""
+    report = {}
+    for (name, phase), window in _windows.items():
+        if poller is not None and name != poller:
+            continue
+        values = sorted(window)
+        report.setdefault(name, {})[phase] = {
+            "count": len(values),
+            "p50": round(_percentile(values, 0.5), 4),
+            "p90": round(_percentile(values, 0.9), 4),
+            "p99": round(_percentile(values, 0.99), 4),
+        }
+    return report
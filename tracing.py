@@ -0,0 +1,155 @@
+# tracing.py
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+
+from config import SLOW_UPDATE_SECONDS, LOOP_LAG_SAMPLE_SECONDS, LOOP_LAG_WARN_SECONDS
+from metrics import SLOW_UPDATES, LOOP_LAG_SECONDS
+
+############################################
+# Трасування обробки апдейтів
+############################################
+# TracingMiddleware відкриває UpdateTrace на кожен апдейт; db.py та
+# InstrumentedClient викликають record_call(), і виклик зараховується
+# апдейту, в контексті якого він стався. Поза апдейтом (фонові задачі)
+# record_call() нічого не робить.
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_in_flight = set()
+_recently_finished = deque(maxlen=50)
+_listeners = []
+_lag_samples = deque(maxlen=600)  # (time.monotonic(), lag) – для loop_lag_status
+
+
+def handler_name(handler) -> str:
+    if handler is None:
+        return "-"
+    module = getattr(handler, "__module__", "") or ""
+    name = getattr(handler, "__qualname__", None) or getattr(handler, "__name__", repr(handler))
+    return f"{module}.{name}" if module else name
+
+
+class UpdateTrace:
+    __slots__ = ("kind", "user_id", "state", "handler", "started", "finished", "calls")
+
+    def __init__(self, kind: str, user_id=None, state: str = "none"):
+        self.kind = kind
+        self.user_id = user_id
+        self.state = state
+        self.handler = "-"
+        self.started = time.perf_counter()
+        self.finished = None
+        self.calls = {}  # (category, op) -> [count, seconds]
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def add_call(self, category: str, op: str, seconds: float):
+        stats = self.calls.get((category, op))
+        if stats is None:
+            stats = self.calls[(category, op)] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+
+    def breakdown(self) -> str:
+        parts = []
+        accounted = 0.0
+        for (category, op), (count, seconds) in sorted(self.calls.items(), key=lambda kv: -kv[1][1]):
+            parts.append(f"{category}:{op} x{count} {seconds:.3f}s")
+            accounted += seconds
+        parts.append(f"інше {max(self.elapsed - accounted, 0.0):.3f}s")
+        return "; ".join(parts)
+
+
+def add_trace_listener(callback):
+    """callback(trace) викликається для кожного завершеного апдейту (бенчмарки, replay)."""
+    _listeners.append(callback)
+
+
+def start_trace(kind: str, user_id=None, state: str = "none"):
+    trace = UpdateTrace(kind, user_id, state)
+    token = _current_trace.set(trace)
+    _in_flight.add(trace)
+    return trace, token
+
+
+def finish_trace(trace: UpdateTrace, token):
+    trace.finished = time.perf_counter()
+    _in_flight.discard(trace)
+    _recently_finished.append(trace)
+    try:
+        _current_trace.reset(token)
+    except ValueError:
+        # post_process прийшов в іншому контексті – просто не відновлюємо змінну
+        pass
+
+    for callback in _listeners:
+        callback(trace)
+
+    elapsed = trace.elapsed
+    if elapsed >= SLOW_UPDATE_SECONDS:
+        SLOW_UPDATES.inc(handler=trace.handler)
+        logging.warning(
+            "[SLOW] %s %s (user=%s, state=%s) %.3fs: %s",
+            trace.kind, trace.handler, trace.user_id, trace.state, elapsed, trace.breakdown()
+        )
+
+
+def set_current_handler(handler):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.handler = handler_name(handler)
+
+
+def record_call(category: str, op: str, seconds: float):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_call(category, op, seconds)
+
+
+############################################
+# Вимірювання блокування циклу подій
+############################################
+
+def _suspects(since: float) -> str:
+    """Хендлери, які виконувались у вікні [since, зараз] – кандидати на блокування."""
+    suspects = list(_in_flight)
+    suspects.extend(t for t in _recently_finished if t.finished is not None and t.finished >= since)
+    if not suspects:
+        return "жодного хендлера (ймовірно, фонова задача)"
+    suspects.sort(key=lambda t: -t.elapsed)
+    return ", ".join(f"{t.handler} ({t.kind}, {t.elapsed:.3f}s)" for t in suspects[:5])
+
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_SAMPLE_SECONDS):
+    """
+    Фонове завдання: засинає на interval і міряє, наскільки пізніше прокинулось.
+    Запізнення = час, коли цикл подій був зайнятий синхронним кодом.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        window_start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - expected, 0.0)
+        LOOP_LAG_SECONDS.observe(lag)
+        _lag_samples.append((time.monotonic(), lag))
+        if lag >= LOOP_LAG_WARN_SECONDS:
+            logging.warning("[LOOP LAG] Цикл подій заблоковано на %.3fs; виконувались: %s", lag, _suspects(window_start))
+
+
+def loop_lag_status(window: float = 60.0) -> dict:
+    """Останнє та максимальне за window секунд запізнення циклу подій і вік останнього виміру."""
+    if not _lag_samples:
+        return {"last": None, "max": None, "since_sample": None}
+    now = time.monotonic()
+    recent = [lag for at, lag in _lag_samples if now - at <= window]
+    at, last = _lag_samples[-1]
+    return {
+        "last": round(last, 4),
+        "max": round(max(recent), 4) if recent else None,
+        "since_sample": round(now - at, 3),
+    }
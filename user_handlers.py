@@ -3,7 +3,9 @@ import json
 import re
 import logging
 import asyncio
+import uuid
 from datetime import datetime
+from functools import partial
 from urllib.parse import quote
 
 from zoneinfo import ZoneInfo
@@ -14,34 +16,45 @@ from aiogram.dispatcher.filters import Text, Regexp
 from bot import schedule_next_topicality
 
 from loader import dp, bot
+from locks import sheet_rows_lock
 from config import ADMINS, friendly_names
 from states import (
     RegistrationStates, ApplicationStates
 )
 from keyboards import remove_keyboard, get_main_menu_keyboard, get_topicality_keyboard
 from db import (
-    load_users, save_users,
+    load_users, save_users, get_user_status, is_approved, get_approved_user,
     load_applications, save_applications,
-    add_application, delete_application_soft, update_application_status
+    add_application, delete_application_soft, update_application_status,
+    find_application_by_submission, get_user_applications, get_user_applications_version,
+    store_lock, application_row_span
 )
+from publisher import enqueue_publication
 from gsheet_utils import (
-    update_google_sheet, color_cell_red, color_cell_green,
-    color_cell_yellow, delete_price_cell_in_table2,
+    color_cell_red, color_cell_green,
+    color_cell_yellow,
     get_worksheet1, get_worksheet2,
-    color_entire_row_green, color_entire_row_red, format_cell_range, 
+    color_entire_row_red, format_cell_range, 
     update_worksheet1_cells_for_edit, re_run_autocalc_for_app, rowcol_to_a1, update_worksheet2_cells_for_edit_color,
-    yellow_format
+    background_format, mark_row_confirmed, unconfirmed_price_columns
 )
 
+def lock_application_row(user_id, timestamp):
+    """
+    sheet_rows_lock на рядок заявки: номер рядка береться вже після захоплення
+    (видалення рядків вище могло його зсунути). as-значення – (row, row) або None.
+    """
+    return sheet_rows_lock.rows(partial(application_row_span, str(user_id), timestamp))
+
 def color_cell_yellow_sheet1(row: int, col: int):
     ws = get_worksheet1()
     cell_range = f"{rowcol_to_a1(row, col)}:{rowcol_to_a1(row, col)}"
-    format_cell_range(ws, cell_range, yellow_format)
+    format_cell_range(ws, cell_range, background_format("yellow"))
 
 def color_cell_yellow_sheet2(row: int, col: int):
     ws2 = get_worksheet2()
     cell_range = f"{rowcol_to_a1(row, col)}:{rowcol_to_a1(row, col)}"
-    format_cell_range(ws2, cell_range, yellow_format)
+    format_cell_range(ws2, cell_range, background_format("yellow"))
 
 # Допоміжна функція для формування деталей заявки при уточненні актуальності
 def build_topicality_details(app: dict) -> str:
@@ -98,16 +111,16 @@ async def cmd_start(message: types.Message, state: FSMContext):
                 return
 
     await state.finish()
-    users = load_users()
-    if uid in users.get("blocked_users", []):
+    user_status = get_user_status(uid)
+    if user_status == "blocked":
         await message.answer("На жаль, у Вас немає доступу.", reply_markup=remove_keyboard())
         return
 
-    if uid in users.get("approved_users", {}):
+    if user_status == "approved":
         await message.answer("Вітаємо! Оберіть дію:", reply_markup=get_main_menu_keyboard())
         return
 
-    if uid in users.get("pending_users", {}):
+    if user_status == "pending":
         await message.answer("Ваша заявка на модерацію вже відправлена. Очікуйте.", reply_markup=remove_keyboard())
         return
 
@@ -172,13 +185,14 @@ async def confirm_registration_preview(message: types.Message, state: FSMContext
     user_id = message.from_user.id
     uid = str(user_id)
 
-    users = load_users()
-    users.setdefault("pending_users", {})[uid] = {
-        "fullname": fullname,
-        "phone": phone,
-        "timestamp": datetime.now().isoformat()
-    }
-    save_users(users)
+    with store_lock():
+        users = load_users()
+        users.setdefault("pending_users", {})[uid] = {
+            "fullname": fullname,
+            "phone": phone,
+            "timestamp": datetime.now().isoformat()
+        }
+        save_users(users)
 
     await state.finish()
     await message.answer("Ваша заявка на модерацію відправлена.", reply_markup=remove_keyboard())
@@ -278,8 +292,7 @@ async def show_menu(message: types.Message, state: FSMContext):
                 return
 
     await state.finish()
-    users = load_users()
-    if uid not in users.get("approved_users", {}):
+    if not is_approved(uid):
         await message.answer("Немає доступу. Очікуйте схвалення.", reply_markup=remove_keyboard())
         return
     await message.answer("Головне меню:", reply_markup=get_main_menu_keyboard())
@@ -313,28 +326,36 @@ async def topicality_actual(message: types.Message, state: FSMContext):
     logging.info(f"[TOPICALITY] Користувач {message.from_user.id} натиснув 'Актуальна'")
     from gsheet_utils import get_worksheet2, rowcol_to_a1
     uid = str(message.from_user.id)
-    apps = load_applications()
-    updated = False
-    # Знайдемо заявку, що зараз в процесі уточнення
-    for app in apps.get(uid, []):
-        if app.get("topicality_in_progress"):
-            sheet_row = app.get("sheet_row")
-            if sheet_row:
-                now_str = datetime.now(ZoneInfo("Europe/Kiev")).strftime("%d.%m.%Y\n%H:%M:%S")
-                try:
-                    ws2 = get_worksheet2()
-                    cell_address = rowcol_to_a1(sheet_row, 15)
-                    ws2.update_acell(cell_address, now_str)
-                    logging.debug(f"[TOPICALITY] Записано дату/час {now_str} у клітинку {cell_address}")
-                except Exception as e:
-                    logging.exception(f"[TOPICALITY] Помилка при оновленні клітинки {cell_address}: {e}")
-            app["topicality_in_progress"] = False
-            updated = True
+    timestamps = []
+    with store_lock():
+        apps = load_applications()
+        updated = False
+        # Знайдемо заявку, що зараз в процесі уточнення
+        for app in apps.get(uid, []):
+            if app.get("topicality_in_progress"):
+                if app.get("sheet_row"):
+                    timestamps.append(app.get("timestamp", ""))
+                app["topicality_in_progress"] = False
+                updated = True
+        if updated:
+            save_applications(apps)
     if updated:
-        save_applications(apps)
         logging.info(f"[TOPICALITY] Статус заявки для користувача {uid} оновлено (знято topicality_in_progress)")
     else:
         logging.info(f"[TOPICALITY] Нічого не оновлено для користувача {uid}")
+    # Таблицю оновлюємо вже після запису файлу, поза store_lock()
+    for timestamp in timestamps:
+        async with lock_application_row(uid, timestamp) as rows:
+            if rows is None:
+                continue
+            now_str = datetime.now(ZoneInfo("Europe/Kiev")).strftime("%d.%m.%Y\n%H:%M:%S")
+            cell_address = rowcol_to_a1(rows[0], 15)
+            try:
+                ws2 = get_worksheet2()
+                ws2.update_acell(cell_address, now_str)
+                logging.debug(f"[TOPICALITY] Записано дату/час {now_str} у клітинку {cell_address}")
+            except Exception as e:
+                logging.exception(f"[TOPICALITY] Помилка при оновленні клітинки {cell_address}: {e}")
     await state.finish()
     await message.answer("Заявка підтверджена як актуальна.", reply_markup=get_main_menu_keyboard())
     # Запланувати наступну перевірку через 10 секунд
@@ -404,24 +425,31 @@ async def topicality_delete(message: types.Message, state: FSMContext):
 async def topicality_delete_confirm(message: types.Message, state: FSMContext):
     logging.info(f"[TOPICALITY] Користувач {message.from_user.id} підтвердив видалення заявки")
     uid = str(message.from_user.id)
-    apps = load_applications()
-    if uid in apps:
-        for app in apps[uid]:
-            if app.get("topicality_in_progress"):
-                app["proposal_status"] = "deleted"
-                sheet_row = app.get("sheet_row")
-                if sheet_row:
-                    try:
-                        from gsheet_utils import get_worksheet1, get_worksheet2, color_entire_row_red
-                        ws1 = get_worksheet1()
-                        ws2 = get_worksheet2()
-                        color_entire_row_red(ws1, sheet_row)
-                        color_entire_row_red(ws2, sheet_row)
-                        logging.debug(f"[TOPICALITY] Рядок {sheet_row} зафарбовано у червоний")
-                    except Exception as e:
-                        logging.exception(f"[TOPICALITY] Помилка фарбування рядка {sheet_row}: {e}")
-                app["topicality_in_progress"] = False
-    save_applications(apps)
+    timestamps = []
+    with store_lock():
+        apps = load_applications()
+        if uid in apps:
+            for app in apps[uid]:
+                if app.get("topicality_in_progress"):
+                    app["proposal_status"] = "deleted"
+                    if app.get("sheet_row"):
+                        timestamps.append(app.get("timestamp", ""))
+                    app["topicality_in_progress"] = False
+        save_applications(apps)
+    # Фарбуємо вже після запису файлу, поза store_lock()
+    for timestamp in timestamps:
+        async with lock_application_row(uid, timestamp) as rows:
+            if rows is None:
+                continue
+            sheet_row = rows[0]
+            try:
+                ws1 = get_worksheet1()
+                ws2 = get_worksheet2()
+                color_entire_row_red(ws1, sheet_row)
+                color_entire_row_red(ws2, sheet_row)
+                logging.debug(f"[TOPICALITY] Рядок {sheet_row} зафарбовано у червоний")
+            except Exception as e:
+                logging.exception(f"[TOPICALITY] Помилка фарбування рядка {sheet_row}: {e}")
     await state.finish()
     await message.answer("Ваша заявка видалена.", reply_markup=get_main_menu_keyboard())
     asyncio.create_task(schedule_next_topicality(message.from_user.id))
@@ -470,31 +498,46 @@ async def start_application(message: types.Message, state: FSMContext):
     await ApplicationStates.waiting_for_webapp_data.set()
 
 
-@dp.message_handler(Text(equals="Переглянути мої заявки"), state="*")
-async def show_user_applications(message: types.Message, state: FSMContext):
-    user_id = message.from_user.id
+############################################
+# Кеш переглядів "Переглянути мої заявки"
+############################################
+# Список заявок (клавіатура + mapping показаних номерів на індекси) і тексти
+# карток рендеряться один раз для версії заявок користувача й береться з кешу,
+# поки версія та сама. Будь-яка зміна заявок користувача (зокрема іншим
+# процесом) дає нову версію, і перегляд рендериться заново з індексу db.
+
+class UserAppsView:
+    __slots__ = ("version", "apps", "mapping", "list_kb", "details")
+
+    def __init__(self, version: int, apps: list):
+        self.version = version
+        self.apps = apps
+        # mapping – реальні індекси заявок, що не мають статусу "deleted", у порядку показу
+        self.mapping = [idx for idx, app in enumerate(apps) if app.get("proposal_status", "") != "deleted"]
+        self.list_kb = build_user_apps_keyboard([apps[idx] for idx in self.mapping]) if self.mapping else None
+        self.details = {}  # реальний індекс -> (текст, клавіатура), рендериться при першому перегляді
+
+    def detail(self, real_idx: int):
+        if real_idx not in self.details:
+            self.details[real_idx] = render_application_detail(self.apps[real_idx])
+        return self.details[real_idx]
+
+
+_user_views = {}  # user_id -> UserAppsView
+
+
+def get_user_apps_view(user_id) -> UserAppsView:
     uid = str(user_id)
-    apps = load_applications()
-    all_apps = apps.get(uid, [])
-    
-    # Створюємо mapping: filtered_apps – список заявок, які не мають статусу "deleted",
-    # а mapping – список їхніх реальних індексів у all_apps.
-    filtered_apps = []
-    mapping = []
-    for idx, app in enumerate(all_apps):
-        if app.get("proposal_status", "") != "deleted":
-            mapping.append(idx)
-            filtered_apps.append(app)
-    
-    if not filtered_apps:
-        await message.answer("Ви не маєте заявок.", reply_markup=get_main_menu_keyboard())
-        return
+    view = _user_views.get(uid)
+    if view is not None and view.version == get_user_applications_version(uid):
+        return view
+    view = _user_views[uid] = UserAppsView(*get_user_applications(uid))
+    return view
 
-    # Зберігаємо mapping у стані
-    await state.update_data(apps_mapping=mapping)
-    
+
+def build_user_apps_keyboard(apps: list) -> types.ReplyKeyboardMarkup:
     buttons = []
-    for i, app in enumerate(filtered_apps, start=1):
+    for i, app in enumerate(apps, start=1):
         culture = app.get('culture', 'Невідомо')
         quantity = app.get('quantity', 'Невідомо')
         status = app.get("proposal_status", "")
@@ -503,7 +546,7 @@ async def show_user_applications(message: types.Message, state: FSMContext):
         else:
             btn_text = f"{i}. {culture} | {quantity} т"
         buttons.append(btn_text)
-    
+
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     row = []
     for text in buttons:
@@ -513,84 +556,11 @@ async def show_user_applications(message: types.Message, state: FSMContext):
             row = []
     if row:
         kb.row(*row)
-    
     kb.row("Назад")
-    msg = await message.answer("Ваші заявки:", reply_markup=kb)
-    await state.update_data(viewing_msg_id=msg.message_id)
-    await ApplicationStates.viewing_applications.set()
+    return kb
 
 
-@dp.message_handler(Text(equals="Назад"), state=ApplicationStates.viewing_applications)
-async def back_from_viewing_applications(message: types.Message, state: FSMContext):
-    await state.finish()
-    await message.answer("Головне меню:", reply_markup=get_main_menu_keyboard())
-
-
-############################################
-# Детальний перегляд заявки (натискає рядок)
-############################################
-
-@dp.message_handler(Regexp(r"^(\d+)\.\s(.+)\s\|\s(.+)\sт(?:\s✅)?$"), state="*")
-async def view_application_detail(message: types.Message, state: FSMContext):
-    text_str = message.text.strip()
-    # Якщо користувач натискає "Назад", відновлюємо список заявок (залишаємо поточну логіку)
-    if text_str == "Назад":
-        user_id = message.from_user.id
-        uid = str(user_id)
-        apps = load_applications()
-        all_apps = apps.get(uid, [])
-        if not all_apps:
-            await message.answer("Ви не маєте заявок.", reply_markup=get_main_menu_keyboard())
-        else:
-            buttons = []
-            for i, app in enumerate(all_apps, start=1):
-                culture = app.get('culture', 'Невідомо')
-                quantity = app.get('quantity', 'Невідомо')
-                status = app.get("proposal_status", "")
-                if status == "confirmed":
-                    btn_text = f"{i}. {culture} | {quantity} т ✅"
-                else:
-                    btn_text = f"{i}. {culture} | {quantity} т"
-                buttons.append(btn_text)
-    
-            kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-            row = []
-            for t in buttons:
-                row.append(t)
-                if len(row) == 2:
-                    kb.row(*row)
-                    row = []
-            if row:
-                kb.row(*row)
-            kb.row("Назад")
-            await message.answer("Ваші заявки:", reply_markup=kb)
-    
-        await ApplicationStates.viewing_applications.set()
-        return
-
-    user_id = message.from_user.id
-    uid = str(user_id)
-    apps = load_applications()
-    all_apps = apps.get(uid, [])
-    
-    # Отримуємо mapping із стану
-    state_data = await state.get_data()
-    mapping = state_data.get("apps_mapping", [])
-    
-    match = re.match(r"^(\d+)\.\s(.+)\s\|\s(.+)\sт(?:\s✅)?$", text_str)
-    if not match:
-        await message.answer("Невірна заявка.", reply_markup=remove_keyboard())
-        return
-
-    displayed_idx = int(match.group(1)) - 1
-    if displayed_idx < 0 or displayed_idx >= len(mapping):
-        await message.answer("Невірна заявка.", reply_markup=remove_keyboard())
-        return
-
-    # Отримуємо реальний індекс із збереженого mapping
-    real_idx = mapping[displayed_idx]
-    app = all_apps[real_idx]
-
+def render_application_detail(app: dict):
     timestamp = app.get("timestamp", "")
     try:
         dt = datetime.fromisoformat(timestamp)
@@ -634,56 +604,66 @@ async def view_application_detail(message: types.Message, state: FSMContext):
     if status != "confirmed":
         kb.add("Редагувати заявку", "Видалити заявку")
     kb.row("Назад")
+    return "\n".join(details), kb
+
+
+async def send_user_applications_list(message: types.Message, state: FSMContext):
+    view = get_user_apps_view(message.from_user.id)
+    # Зберігаємо mapping у стані: номер у кнопці -> реальний індекс заявки
+    await state.update_data(apps_mapping=view.mapping)
+    if not view.mapping:
+        await message.answer("Ви не маєте заявок.", reply_markup=get_main_menu_keyboard())
+        return None
+    return await message.answer("Ваші заявки:", reply_markup=view.list_kb)
+
+
+@dp.message_handler(Text(equals="Переглянути мої заявки"), state="*")
+async def show_user_applications(message: types.Message, state: FSMContext):
+    msg = await send_user_applications_list(message, state)
+    if msg is None:
+        return
+    await state.update_data(viewing_msg_id=msg.message_id)
+    await ApplicationStates.viewing_applications.set()
+
+
+@dp.message_handler(Text(equals="Назад"), state=ApplicationStates.viewing_applications)
+async def back_from_viewing_applications(message: types.Message, state: FSMContext):
+    await state.finish()
+    await message.answer("Головне меню:", reply_markup=get_main_menu_keyboard())
+
+
+############################################
+# Детальний перегляд заявки (натискає рядок)
+############################################
+
+@dp.message_handler(Regexp(r"^(\d+)\.\s(.+)\s\|\s(.+)\sт(?:\s✅)?$"), state="*")
+async def view_application_detail(message: types.Message, state: FSMContext):
+    # Отримуємо mapping із стану
+    state_data = await state.get_data()
+    mapping = state_data.get("apps_mapping", [])
+
+    displayed_idx = int(message.text.strip().split(".", 1)[0]) - 1
+    if displayed_idx < 0 or displayed_idx >= len(mapping):
+        await message.answer("Невірна заявка.", reply_markup=remove_keyboard())
+        return
+
+    # Отримуємо реальний індекс із збереженого mapping
+    real_idx = mapping[displayed_idx]
+    view = get_user_apps_view(message.from_user.id)
+    if real_idx >= len(view.apps):
+        await message.answer("Невірна заявка.", reply_markup=remove_keyboard())
+        return
+    text, kb = view.detail(real_idx)
 
     # Зберігаємо реальний індекс обраної заявки у стані
     await state.update_data(selected_app_index=real_idx)
-    await message.answer("\n".join(details), reply_markup=kb, parse_mode="HTML")
+    await message.answer(text, reply_markup=kb, parse_mode="HTML")
     await ApplicationStates.viewing_application.set()
 
 
 @dp.message_handler(Text(equals="Назад"), state=ApplicationStates.viewing_application)
 async def user_view_application_detail_back(message: types.Message, state: FSMContext):
-    user_id = message.from_user.id
-    uid = str(user_id)
-    apps = load_applications()
-    all_apps = apps.get(uid, [])
-
-    # Фільтруємо заявки, що НЕ мають статус "deleted", і створюємо mapping
-    filtered_apps = []
-    mapping = []
-    for idx, app in enumerate(all_apps):
-        if app.get("proposal_status", "") != "deleted":
-            filtered_apps.append(app)
-            mapping.append(idx)
-
-    if not filtered_apps:
-        await message.answer("Ви не маєте заявок.", reply_markup=get_main_menu_keyboard())
-    else:
-        buttons = []
-        for i, app in enumerate(filtered_apps, start=1):
-            culture = app.get('culture', 'Невідомо')
-            quantity = app.get('quantity', 'Невідомо')
-            status = app.get("proposal_status", "")
-            if status == "confirmed":
-                btn_text = f"{i}. {culture} | {quantity} т ✅"
-            else:
-                btn_text = f"{i}. {culture} | {quantity} т"
-            buttons.append(btn_text)
-
-        kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        row = []
-        for text in buttons:
-            row.append(text)
-            if len(row) == 2:
-                kb.row(*row)
-                row = []
-        if row:
-            kb.row(*row)
-        kb.row("Назад")
-        await message.answer("Ваші заявки:", reply_markup=kb)
-
-    # Зберігаємо mapping у стані для подальшого використання
-    await state.update_data(apps_mapping=mapping)
+    await send_user_applications_list(message, state)
     await ApplicationStates.viewing_applications.set()
 
 
@@ -739,59 +719,14 @@ async def back_from_proposal_to_detail(message: types.Message, state: FSMContext
         await state.finish()
         return
 
-    user_id = message.from_user.id
-    uid = str(user_id)
-    apps = load_applications()
-    user_apps = apps.get(uid, [])
-
-    if not user_apps or idx >= len(user_apps):
+    view = get_user_apps_view(message.from_user.id)
+    if idx >= len(view.apps):
         await message.answer("Заявку не знайдено.", reply_markup=get_main_menu_keyboard())
         await state.finish()
         return
 
-    app = user_apps[idx]
-    try:
-        dt = datetime.fromisoformat(app.get("timestamp", ""))
-        formatted_date = dt.strftime("%d.%m.%Y")
-    except Exception:
-        formatted_date = app.get("timestamp", "") or "—"
-
-    status = app.get("proposal_status", "")
-    details = [
-        "<b>Детальна інформація по заявці:</b>",
-        f"Дата створення: {formatted_date}",
-        f"ФГ: {app.get('fgh_name', '')}",
-        f"ЄДРПОУ: {app.get('edrpou', '')}",
-        f"Область: {app.get('region', '')}",
-        f"Номер ФГ: {app.get('phone', '')}",
-        f"Район: {app.get('district', '')}",
-        f"Місто: {app.get('city', '')}",
-        f"Група: {app.get('group', '')}",
-        f"Культура: {app.get('culture', '')}",
-        f"Кількість: {app.get('quantity', '')}",
-        f"Форма оплати: {app.get('payment_form', '')}",
-        f"Валюта: {app.get('currency', '')}",
-        f"Бажана ціна: {app.get('price', '')}"
-    ]
-
-    extra = app.get("extra_fields", {})
-    if extra:
-        details.append("Додаткові параметри:")
-        for key, value in extra.items():
-            details.append(f"{friendly_names.get(key, key.capitalize())}: {value}")
-
-    if status == "confirmed":
-        details.append(f"Пропозиція ціни: {app.get('proposal', '—')}")
-        details.append("Ціна була ухвалена, очікуйте, скоро з вами зв'яжуться")
-    elif status == "Agreed":
-        details.append(f"Пропозиція ціни: {app.get('proposal', '')}")
-
-    kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.row("Переглянути пропозицію")
-    kb.row("Редагувати заявку", "Видалити заявку")
-    kb.row("Назад")
-
-    await message.answer("\n".join(details), reply_markup=kb, parse_mode="HTML")
+    text, kb = view.detail(idx)
+    await message.answer(text, reply_markup=kb, parse_mode="HTML")
     await ApplicationStates.viewing_application.set()
 
 
@@ -831,25 +766,27 @@ async def wait_after_rejection(message: types.Message, state):
     # Оновлюємо статус заявки на "waiting"
     update_application_status(message.from_user.id, index, "waiting")
 
-    apps = load_applications()
     uid = str(message.from_user.id)
-    app = apps[uid][index]
-    app["onceWaited"] = True
-    save_applications(apps)
+    with store_lock():
+        apps = load_applications()
+        app = apps[uid][index]
+        app["onceWaited"] = True
+        save_applications(apps)
 
     # Фарбування клітинок залежно від типу пропозиції
-    sheet_row = app.get("sheet_row")
-    if sheet_row:
-        if "bot_price" in app:
-            # Якщо це ціна бота, фарбування:
-            # SHEET1: стовпець O (15), SHEET2: стовпець M (13)
-            color_cell_yellow_sheet1(sheet_row, 15)
-            color_cell_yellow_sheet2(sheet_row, 13)
-        else:
-            # Якщо це менеджерська ціна, фарбування:
-            # SHEET1: стовпець N (14), SHEET2: стовпець L (12)
-            color_cell_yellow_sheet1(sheet_row, 14)
-            color_cell_yellow_sheet2(sheet_row, 12)
+    async with lock_application_row(uid, app.get("timestamp", "")) as rows:
+        if rows is not None:
+            sheet_row = rows[0]
+            if "bot_price" in app:
+                # Якщо це ціна бота, фарбування:
+                # SHEET1: стовпець O (15), SHEET2: стовпець M (13)
+                color_cell_yellow_sheet1(sheet_row, 15)
+                color_cell_yellow_sheet2(sheet_row, 13)
+            else:
+                # Якщо це менеджерська ціна, фарбування:
+                # SHEET1: стовпець N (14), SHEET2: стовпець L (12)
+                color_cell_yellow_sheet1(sheet_row, 14)
+                color_cell_yellow_sheet2(sheet_row, 12)
 
     await message.answer(
         "Заявка оновлена. Ви будете повідомлені при появі кращої пропозиції.",
@@ -867,26 +804,28 @@ async def delete_after_rejection(message: types.Message, state: FSMContext):
         return
 
     uid = str(message.from_user.id)
-    apps = load_applications()
-    user_apps = apps.get(uid, [])
-    if index < 0 or index >= len(user_apps):
+    with store_lock():
+        apps = load_applications()
+        user_apps = apps.get(uid, [])
+        app = user_apps[index] if 0 <= index < len(user_apps) else None
+        if app is not None:
+            app["proposal_status"] = "deleted"
+            save_applications(apps)
+    if app is None:
         await message.answer("Невірна заявка.", reply_markup=get_main_menu_keyboard())
         await state.finish()
         return
 
-    app = user_apps[index]
-    app["proposal_status"] = "deleted"
-    save_applications(apps)
-
-    sheet_row = app.get("sheet_row")
-    if sheet_row:
-        try:
-            ws1 = get_worksheet1()
-            ws2 = get_worksheet2()
-            color_entire_row_red(ws1, sheet_row)
-            color_entire_row_red(ws2, sheet_row)
-        except Exception as e:
-            logging.exception(f"Помилка фарбування рядка {sheet_row} в червоний: {e}")
+    async with lock_application_row(uid, app.get("timestamp", "")) as rows:
+        if rows is not None:
+            sheet_row = rows[0]
+            try:
+                ws1 = get_worksheet1()
+                ws2 = get_worksheet2()
+                color_entire_row_red(ws1, sheet_row)
+                color_entire_row_red(ws2, sheet_row)
+            except Exception as e:
+                logging.exception(f"Помилка фарбування рядка {sheet_row} в червоний: {e}")
 
     await message.answer("Ваша заявка видалена.", reply_markup=get_main_menu_keyboard())
     await state.finish()
@@ -897,34 +836,16 @@ async def confirm_proposal(message: types.Message, state: FSMContext):
     data = await state.get_data()
     index = data.get("selected_app_index")
 
-    update_application_status(message.from_user.id, index, "confirmed")
-
-    apps = load_applications()
+    app = update_application_status(message.from_user.id, index, "confirmed")
+    if app is None:
+        await message.answer("Заявку не знайдено.", reply_markup=get_main_menu_keyboard())
+        await state.finish()
+        return
     uid = str(message.from_user.id)
-    app = apps[uid][index]
-    sheet_row = app.get("sheet_row")
-
-    if sheet_row:
-        try:
-            confirmed_price = float(app.get("proposal", ""))
-            bot_price = app.get("bot_price", None)
-            if bot_price is not None and abs(confirmed_price - bot_price) < 1e-9:
-                delete_price_cell_in_table2(sheet_row, col=15)
-            else:
-                delete_price_cell_in_table2(sheet_row, col=13)
-        except Exception:
-            delete_price_cell_in_table2(sheet_row, col=13)
-            delete_price_cell_in_table2(sheet_row, col=15)
-
-        try:
-            ws1 = get_worksheet1()
-            ws2 = get_worksheet2()
-            color_entire_row_green(ws1, sheet_row)
-            color_entire_row_green(ws2, sheet_row)
-        except Exception as e:
-            logging.exception(f"Помилка фарбування рядка {sheet_row}: {e}")
-
-    save_applications(apps)
+    async with lock_application_row(uid, app.get("timestamp", "")) as rows:
+        if rows is not None:
+            # Стираємо ціну, яку не підтверджено, і фарбуємо рядок
+            mark_row_confirmed(rows[0], unconfirmed_price_columns(app))
 
     timestamp = app.get("timestamp", "")
     try:
@@ -942,10 +863,10 @@ async def confirm_proposal(message: types.Message, state: FSMContext):
 
     user_fullname = app.get("fullname", "")
     phone_from_app = app.get("phone", "")
-    if not phone_from_app:
-        phone_from_app = load_users().get("approved_users", {}).get(uid, {}).get("phone", "")
-    if not user_fullname:
-        user_fullname = load_users().get("approved_users", {}).get(uid, {}).get("fullname", "")
+    if not phone_from_app or not user_fullname:
+        approved_info = get_approved_user(uid) or {}
+        phone_from_app = phone_from_app or approved_info.get("phone", "")
+        user_fullname = user_fullname or approved_info.get("fullname", "")
 
     if not phone_from_app:
         phone_from_app = "—"
@@ -1027,13 +948,12 @@ async def edit_application_direct(message: types.Message, state: FSMContext):
         "payment_form": app.get("payment_form", "")
     }
 
-    # Додаткове логування даних для редагування
-    logging.debug(f"Дані для редагування заявки, що передаються у WebApp2: {webapp2_data}")
+    logging.debug("Дані для редагування заявки передаються у WebApp2, поля: %s", ", ".join(webapp2_data))
 
     webapp_url2 = "https://danza13.github.io/agro-webapp/webapp2.html"
     prefill = quote(json.dumps(webapp2_data))
     url_with_data = f"{webapp_url2}?data={prefill}"
-    logging.debug(f"URL для WebApp2: {url_with_data}")
+    logging.debug("URL для WebApp2: %d символів", len(url_with_data))
 
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     kb.add(
@@ -1169,66 +1089,77 @@ async def process_webapp2_data(user_id: int, data_dict: dict, state: FSMContext)
     fsm_data = await state.get_data()
     index = fsm_data.get("editing_app_index", None)
 
-    apps = load_applications()
     uid = str(user_id)
-    user_apps = apps.get(uid, [])
-
-    if index is None or index < 0 or index >= len(user_apps):
-        await bot.send_message(user_id, "Немає заявки для редагування.", reply_markup=get_main_menu_keyboard())
-        await state.finish()
-        return
-
-    app = user_apps[index]
-    sheet_row = app.get("sheet_row", None)
-    if not sheet_row:
-        await bot.send_message(user_id, "Немає рядка в таблиці для цієї заявки. Не можна редагувати.", reply_markup=get_main_menu_keyboard())
-        await state.finish()
-        return
-
-    # Порівнюємо старі та нові значення
-    old_data = {
-        "quantity": app.get("quantity", ""),
-        "price": app.get("price", ""),
-        "currency": app.get("currency", ""),
-        "payment_form": app.get("payment_form", "")
-    }
-
     new_quantity = str(data_dict.get("quantity", "")).strip()
     new_price = data_dict.get("price", "").strip()
     new_currency = data_dict.get("currency", "").strip()
     new_payment_form = data_dict.get("payment_form", "").strip()
 
+    app = None
     changed_fields = {}
-    if new_quantity != old_data["quantity"]:
-        changed_fields["quantity"] = new_quantity
-        app["quantity"] = new_quantity
-
-    if new_price != old_data["price"]:
-        changed_fields["price"] = new_price
-        app["price"] = new_price
-
-    if new_currency != old_data["currency"]:
-        changed_fields["currency"] = new_currency
-        app["currency"] = new_currency
+    was_in_topicality = False
+    with store_lock():
+        apps = load_applications()
+        user_apps = apps.get(uid, [])
+        if index is not None and 0 <= index < len(user_apps):
+            app = user_apps[index]
+        sheet_row = app.get("sheet_row", None) if app is not None else None
+        if sheet_row:
+            # Порівнюємо старі та нові значення
+            old_data = {
+                "quantity": app.get("quantity", ""),
+                "price": app.get("price", ""),
+                "currency": app.get("currency", ""),
+                "payment_form": app.get("payment_form", "")
+            }
+
+            if new_quantity != old_data["quantity"]:
+                changed_fields["quantity"] = new_quantity
+                app["quantity"] = new_quantity
+
+            if new_price != old_data["price"]:
+                changed_fields["price"] = new_price
+                app["price"] = new_price
+
+            if new_currency != old_data["currency"]:
+                changed_fields["currency"] = new_currency
+                app["currency"] = new_currency
+
+            if new_payment_form != old_data["payment_form"]:
+                changed_fields["payment_form"] = new_payment_form
+                app["payment_form"] = new_payment_form
+
+            # Якщо користувач успішно надіслав форму, скидаємо прапорець topicality_in_progress
+            # (тут же, а не після перерахунку автопрайсу – інакше затерли б його результат)
+            was_in_topicality = bool(app.get("topicality_in_progress"))
+            if was_in_topicality:
+                app["topicality_in_progress"] = False
 
-    if new_payment_form != old_data["payment_form"]:
-        changed_fields["payment_form"] = new_payment_form
-        app["payment_form"] = new_payment_form
+            save_applications(apps)
 
-    save_applications(apps)
+    if app is None:
+        await bot.send_message(user_id, "Немає заявки для редагування.", reply_markup=get_main_menu_keyboard())
+        await state.finish()
+        return
+    if not sheet_row:
+        await bot.send_message(user_id, "Немає рядка в таблиці для цієї заявки. Не можна редагувати.", reply_markup=get_main_menu_keyboard())
+        await state.finish()
+        return
 
     if changed_fields:
-        # Оновлюємо форматування у таблицях
-        update_worksheet1_cells_for_edit(sheet_row, changed_fields)
-        update_worksheet2_cells_for_edit_color(sheet_row, changed_fields)
+        async with lock_application_row(uid, app.get("timestamp", "")) as rows:
+            if rows is not None:
+                # Оновлюємо форматування у таблицях
+                update_worksheet1_cells_for_edit(rows[0], changed_fields)
+                update_worksheet2_cells_for_edit_color(rows[0], changed_fields)
 
-        # Записуємо дату/час змін у колонку N (14) таблиці2
-        now_str = datetime.now(ZoneInfo("Europe/Kiev")).strftime("%d.%m.%Y\n%H:%M:%S")
-        ws2 = get_worksheet2()
-        cell_address = rowcol_to_a1(sheet_row, 14)
-        ws2.update_acell(cell_address, now_str)
+                # Записуємо дату/час змін у колонку N (14) таблиці2
+                now_str = datetime.now(ZoneInfo("Europe/Kiev")).strftime("%d.%m.%Y\n%H:%M:%S")
+                ws2 = get_worksheet2()
+                cell_address = rowcol_to_a1(rows[0], 14)
+                ws2.update_acell(cell_address, now_str)
 
-        # Запускаємо перерахунок автопрайсу
+        # Запускаємо перерахунок автопрайсу (бере лок рядка сам – поза секцією вище)
         await re_run_autocalc_for_app(uid, index)
 
         await bot.send_message(user_id, "Дані успішно змінені!", reply_markup=remove_keyboard())
@@ -1236,10 +1167,7 @@ async def process_webapp2_data(user_id: int, data_dict: dict, state: FSMContext)
         await bot.send_message(user_id, "Нічого не змінено.", reply_markup=remove_keyboard())
 
     # ===== НОВИЙ ФРАГМЕНТ =====
-    # Якщо користувач успішно надіслав форму, скидаємо прапорець topicality_in_progress
-    if app.get("topicality_in_progress"):
-        app["topicality_in_progress"] = False
-        save_applications(apps)
+    if was_in_topicality:
         # Запускаємо наступну перевірку заявки через 10 секунд
         await asyncio.create_task(schedule_next_topicality(user_id))
     # ===== КІНЕЦЬ НОВОГО ФРАГМЕНТА =====
@@ -1330,26 +1258,28 @@ async def confirm_deletion(message: types.Message, state: FSMContext):
         return
 
     uid = str(message.from_user.id)
-    apps = load_applications()
-    user_apps = apps.get(uid, [])
-    if index < 0 or index >= len(user_apps):
+    with store_lock():
+        apps = load_applications()
+        user_apps = apps.get(uid, [])
+        app = user_apps[index] if 0 <= index < len(user_apps) else None
+        if app is not None:
+            app["proposal_status"] = "deleted"
+            save_applications(apps)
+    if app is None:
         await message.answer("Невірна заявка.", reply_markup=get_main_menu_keyboard())
         await state.finish()
         return
 
-    app = user_apps[index]
-    app["proposal_status"] = "deleted"
-    save_applications(apps)
-
-    sheet_row = app.get("sheet_row")
-    if sheet_row:
-        try:
-            ws1 = get_worksheet1()
-            ws2 = get_worksheet2()
-            color_entire_row_red(ws1, sheet_row)
-            color_entire_row_red(ws2, sheet_row)
-        except Exception as e:
-            logging.exception(f"Помилка фарбування рядка {sheet_row} в червоний: {e}")
+    async with lock_application_row(uid, app.get("timestamp", "")) as rows:
+        if rows is not None:
+            sheet_row = rows[0]
+            try:
+                ws1 = get_worksheet1()
+                ws2 = get_worksheet2()
+                color_entire_row_red(ws1, sheet_row)
+                color_entire_row_red(ws2, sheet_row)
+            except Exception as e:
+                logging.exception(f"Помилка фарбування рядка {sheet_row} в червоний: {e}")
 
     await message.answer("Заявка видалена.", reply_markup=get_main_menu_keyboard())
     await state.finish()
@@ -1504,7 +1434,9 @@ async def process_webapp_data_direct(user_id: int, data: dict, edit_index: int =
         await curr_state.update_data(edit_index=edit_index, sheet_row=sheet_row, webapp_data=data)
         await curr_state.set_state(ApplicationStates.editing_application.state)
     else:
-        await curr_state.update_data(webapp_data=data)
+        # Ключ ідемпотентності – один на чернетку, навіть якщо її редагували кілька разів
+        submission_id = (await curr_state.get_data()).get("submission_id") or uuid.uuid4().hex
+        await curr_state.update_data(webapp_data=data, submission_id=submission_id)
         await curr_state.set_state(ApplicationStates.confirm_application.state)
 
 
@@ -1538,7 +1470,6 @@ async def cancel_process_reply(message: types.Message, state: FSMContext):
 @dp.message_handler(Text(equals="Підтвердити"), state=ApplicationStates.confirm_application)
 async def confirm_application_handler(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
-    await message.answer("Очікуйте, зберігаємо заявку...")
     data_state = await state.get_data()
     webapp_data = data_state.get("webapp_data")
 
@@ -1547,19 +1478,21 @@ async def confirm_application_handler(message: types.Message, state: FSMContext)
         await state.finish()
         return
 
-    from db import load_users
-    users = load_users()
     if "fullname" not in webapp_data or not webapp_data.get("fullname"):
-        approved_user_info = users.get("approved_users", {}).get(str(user_id), {})
+        approved_user_info = get_approved_user(user_id) or {}
         webapp_data["fullname"] = approved_user_info.get("fullname", "")
 
     webapp_data["chat_id"] = str(message.chat.id)
     webapp_data["original_manager_price"] = webapp_data.get("manager_price", "")
 
+    # Таблицю заповнює publisher у фоні; тут – лише локальний запис і задача в черзі.
+    # Повторне «Підтвердити» з тим самим ключем не створить другої заявки.
+    submission_id = data_state.get("submission_id") or uuid.uuid4().hex
     try:
-        sheet_row = update_google_sheet(webapp_data)
-        webapp_data["sheet_row"] = sheet_row
-        add_application(user_id, message.chat.id, webapp_data)
+        if find_application_by_submission(user_id, submission_id) is None:
+            webapp_data["submission_id"] = submission_id
+            add_application(user_id, message.chat.id, webapp_data)
+        enqueue_publication(submission_id, user_id)
         await state.finish()
         await message.answer("Ваша заявка прийнята!", reply_markup=get_main_menu_keyboard())
     except Exception as e: